@@ -1,45 +1,202 @@
 from loader import Loader
 from graph import *
+from compact import CompactGraph
+from kmertable import KmerTable, BYTES_PER_OCCURRENCE
+from checkpoint import save_graph, load_graph, read_meta
+from collections import deque
+
+
+class Worklist(object):
+    """
+    Hàng đợi các đỉnh cần xét trong quá trình gộp cạnh, mỗi đỉnh chỉ nằm trong hàng đợi nhiều nhất một lần
+    """
+    
+    def __init__(self, vertices: Iterable[Vertex]) -> None:
+        """
+
+        Args:
+            vertices (Iterable[Vertex]): Các đỉnh ban đầu, được xét theo thứ tự này
+        """
+        
+        self.queue: deque = deque()
+        self.queued: Set[Vertex] = set()
+        for vertex in vertices:
+            self.push(vertex=vertex)
+    
+    
+    def __len__(self) -> int:
+        return len(self.queue)
+    
+    
+    def push(self, vertex: Vertex) -> None:
+        """Thêm đỉnh vào cuối hàng đợi nếu đỉnh chưa có trong hàng đợi
+        """
+        
+        if vertex not in self.queued:
+            self.queued.add(vertex)
+            self.queue.append(vertex)
+    
+    
+    def pop(self) -> Vertex:
+        """Lấy đỉnh ở đầu hàng đợi
+        """
+        
+        vertex: Vertex = self.queue.popleft()
+        self.queued.discard(vertex)
+        
+        return vertex
+    
+    
+    def push_around(self, edge: Edge, vertex: Vertex) -> None:
+        """Đưa lại vào hàng đợi các đỉnh có thể gộp thêm được sau khi cạnh mới edge được tạo ở đỉnh vertex
+        """
+        
+        self.push(vertex=edge.in_vertex)
+        self.push(vertex=vertex)
+        self.push(vertex=edge.out_vertex)
 
 
 class Assembler(object):
-    def __init__(self, filename: str, k: int, error_correct: bool=False) -> None:
+    def __init__(self, filename: str, k: int, error_correct: bool=False, workers: int=1, engine: str="object", threshold: int=0, simplify: bool=False, canonical: bool=False,
+                 memory_budget: Optional[int]=None, workdir: Optional[str]=None, profiler: Optional[Profiler]=None) -> None:
         """Khởi tạo Assembler
 
         Args:
             filename (str): File chứa các read
             k (int): Độ dài một k-mer
             error_correct (bool, optional): Có sửa lỗi hay không. Defaults to False.
+            workers (int, optional): Số tiến trình dùng để đếm k-mer khi dựng đồ thị. Defaults to 1.
+            engine (str, optional): "object" dùng đồ thị Vertex/Edge, "compact" dùng đồ thị dạng mảng CompactGraph
+                (tốn ít bộ nhớ hơn nhưng không hỗ trợ make_superpath). Defaults to "object".
+            threshold (int, optional): Ngưỡng k-mer tốt khi sửa lỗi, 0 thì chọn tự động từ phổ k-mer. Defaults to 0.
+            simplify (bool, optional): Cắt tip và gỡ bong bóng trước khi gộp cạnh. Defaults to False.
+            canonical (bool, optional): Đưa các read của cả hai mạch về cùng một mạch theo k-mer chính tắc. Defaults to False.
+            memory_budget (int, optional): Nếu có thì đếm k-mer ngoài bộ nhớ bằng bảng trên đĩa với số byte tối đa này và dựng
+                CompactGraph từ bảng theo từng đoạn; chỉ dùng được với engine="compact" vì đồ thị object luôn giữ mọi lần
+                xuất hiện trong bộ nhớ. Defaults to None.
+            workdir (str, optional): Thư mục chứa bảng k-mer trên đĩa, None thì dùng thư mục tạm. Defaults to None.
+            profiler (Profiler, optional): Đo thời gian, bộ nhớ và các bộ đếm của từng giai đoạn. Defaults to None.
         """
         
-        # Load file
-        reads: Loader = Loader.load(filename=filename)
+        if engine not in ("object", "compact"):
+            raise ValueError("engine phải là \"object\" hoặc \"compact\"")
+        if memory_budget is not None and engine != "compact":
+            raise ValueError("memory_budget chỉ dùng được với engine=\"compact\"")
+        
+        self.profiler: Profiler = profiler if profiler is not None else NULL_PROFILER
+        # Đọc dần các read từ file và nén 2 bit vào ReadStore, Graph dùng chung store này
+        with self.profiler.stage("load"):
+            reads: Loader = Loader.load(filename=filename)
         
         # Khởi tạo đồ thị
-        self.graph: Graph = Graph(seqs=reads, k=k, threshold=error_correct)
-        self.k: int = k
+        if engine == "compact":
+            store: ReadStore = reads.reads
+            if error_correct:
+                with self.profiler.stage("error_correct"):
+                    store, _, _, _ = correct_store(store=store, k=k, threshold=threshold)
+            if canonical:
+                with self.profiler.stage("orient"):
+                    store, _, _ = orient_reads(store=store, k=k)
+            with self.profiler.stage("build"):
+                if memory_budget is not None:
+                    with KmerTable.build(store=store, k=k, dirname=workdir, memory_budget=memory_budget) as table:
+                        graph: Union[Graph, CompactGraph] = CompactGraph.from_kmer_table(
+                            table=table, chunk_size=max(1, memory_budget // BYTES_PER_OCCURRENCE))
+                else:
+                    graph = CompactGraph.from_reads(store=store, k=k, workers=workers)
+        else:
+            # Các giai đoạn bên trong Graph.__init__ (sửa lỗi, align_read, build) được đo lồng trong giai đoạn graph
+            with self.profiler.stage("graph"):
+                graph = Graph(seqs=reads, k=k, threshold=threshold, error_correct=error_correct, workers=workers,
+                              canonical=canonical, profiler=self.profiler)
+        self.init_fields(graph=graph, engine=engine, simplify=simplify, profiler=self.profiler)
         
         
-    def make_superpath(self) -> None:
-        self.merge_single_edges()
-        self.merge_multiple_edges()
+    def init_fields(self, graph: Union[Graph, CompactGraph], engine: str="object", simplify: bool=False, merged: bool=False,
+                    profiler: Optional[Profiler]=None) -> None:
+        """Gán mọi thuộc tính của Assembler, dùng chung cho __init__ và Assembler.from_graph
+
+        Args:
+            graph (Union[Graph, CompactGraph]): Đồ thị
+            engine (str, optional): "object" hoặc "compact". Defaults to "object".
+            simplify (bool, optional): Cắt tip và gỡ bong bóng trước khi gộp cạnh. Defaults to False.
+            merged (bool, optional): Đồ thị đã được gộp cạnh hay chưa. Defaults to False.
+            profiler (Profiler, optional): Đo thời gian, bộ nhớ và các bộ đếm của từng giai đoạn. Defaults to None.
+        """
         
+        self.graph: Union[Graph, CompactGraph] = graph
+        self.k: int = graph.k
+        self.engine: str = engine
+        self.simplify: bool = simplify
+        self.merged: bool = merged # Các cạnh đã được gộp (make_superpath), không thêm read được nữa
+        self.profiler: Profiler = profiler if profiler is not None else NULL_PROFILER
         
-    def merge_single_edges(self) -> None:
-        """Gộp các cạnh nếu có thể
+        
+    @staticmethod
+    def from_graph(graph: Union[Graph, CompactGraph], engine: str="object", simplify: bool=False, merged: bool=False,
+                   profiler: Optional[Profiler]=None) -> "Assembler":
+        """Assembler cho một đồ thị đã có (đọc từ checkpoint hoặc dựng cho một thành phần) mà không đọc file read
+
+        Args:
+            graph (Union[Graph, CompactGraph]): Đồ thị
+            engine (str, optional): "object" hoặc "compact". Defaults to "object".
+            simplify (bool, optional): Cắt tip và gỡ bong bóng trước khi gộp cạnh. Defaults to False.
+            merged (bool, optional): Đồ thị đã được gộp cạnh hay chưa. Defaults to False.
+            profiler (Profiler, optional): Đo thời gian, bộ nhớ và các bộ đếm của từng giai đoạn. Defaults to None.
 
         Returns:
-            bool: Có thể gộp được hai cạnh nào đó không
+            Assembler: Assembler của đồ thị
         """
-        vertex_list: List[Vertex] = self.graph.vertex_list.copy()
-        #for vertex in self.graph.vertex_list:
-        while len(vertex_list) != 0:
-            vertex: Vertex = vertex_list.pop(0)
+        
+        assembler: Assembler = Assembler.__new__(Assembler)
+        assembler.init_fields(graph=graph, engine=engine, simplify=simplify, merged=merged, profiler=profiler)
+        
+        return assembler
+        
+        
+    def add_reads(self, filename: str) -> None:
+        """Thêm các read trong một file mới (ví dụ một lane mới) vào đồ thị đã dựng mà không dựng lại từ đầu
+
+        Args:
+            filename (str): File chứa các read mới
+        """
+        
+        if self.engine == "compact":
+            raise ValueError("add_reads chỉ hỗ trợ engine=\"object\"")
+        if self.merged:
+            raise ValueError("Không thể thêm read sau khi đã gộp cạnh (make_superpath)")
+        self.graph.add_reads(seqs=Loader.load(filename=filename))
+        
+        
+    def make_superpath(self) -> None:
+        if self.engine == "compact":
+            raise ValueError("make_superpath cần thông tin các read, hãy dùng engine=\"object\"")
+        self.merged = True
+        if self.simplify:
+            with self.profiler.stage("simplify"):
+                self.graph.simplify()
+        # Gộp trước các đường không phân nhánh, vòng gộp từng cặp chỉ còn phải xét các đỉnh phân nhánh
+        with self.profiler.stage("compact_unitigs"):
+            self.graph.compact_unitigs()
+        with self.profiler.stage("merge_single_edges"):
+            self.merge_single_edges()
+        with self.profiler.stage("merge_multiple_edges"):
+            self.merge_multiple_edges()
+        self.profiler.record("superpath_vertices", len(self.graph.vertex_list))
+        self.profiler.record("superpath_edges", len(self.graph.edge_list))
+        
+        
+    def merge_single_edges(self) -> None:
+        """Gộp các cạnh đơn cho đến khi không gộp thêm được nữa. Các đỉnh được xét theo hàng đợi (worklist),
+        sau mỗi lần gộp các đỉnh quanh cạnh mới được đưa lại vào hàng đợi; cạnh và đỉnh bị gỡ chỉ được đánh dấu
+        và được dọn một lần bằng Graph.clean ở cuối
+        """
+        worklist: Worklist = Worklist(vertices=self.graph.vertex_list)
+        while len(worklist) != 0:
+            vertex: Vertex = worklist.pop()
             num_in_edge: int = len(vertex.in_edges)
             num_out_edge: int = len(vertex.out_edges)
             # Đỉnh đầu hoặc đỉnh kết thúc nên bỏ qua
-            '''if (num_in_edge == 0 or num_out_edge == 0) and abs(num_in_edge - num_out_edge) == 1:
-                continue'''
             if abs(vertex.compute_degree()) == 1:
                 continue
             # Đỉnh đã bị loại bỏ
@@ -49,58 +206,52 @@ class Assembler(object):
             out_edges: List[Edge] = vertex.out_edges.copy()
             # Nếu là đỉnh cân bằng, ta xét xem có thể gộp các cạnh vào và cạnh ra được không
             if num_in_edge == num_out_edge:
-                #if num_in_edge == 1:
                 # So sánh từng cạnh với nhau
                 for x in in_edges:
-                    x_reads = x.reads.copy()
                     for y in out_edges:
-                        # Kiểm tra từng read trong x xem x có thuộc vào read nào trong y hay không
-                        if x.multiplicities == y.multiplicities:
-                            for read in x_reads:
-                                # Kiểm tra x và y có cùng một read
-                                if read in y.reads:
-                                    # Kiểm tra x và y có liền kề nhau trong read này hay không
-                                    if read.check_consecutive_edges(x=x, y=y):
-                                        if self.graph.merge(x=x, y=y):
-                                            self.graph.clean()
+                        # Cạnh đã bị gộp trước đó trong lần xét đỉnh này
+                        if x.removed or y.removed:
+                            continue
+                        # x và y phải liền kề nhau trong ít nhất một read (tra trong pair_index)
+                        if x.multiplicities == y.multiplicities and len(self.graph.pair_reads(x=x, y=y)) > 0:
+                            z: Optional[Edge] = self.graph.merge(x=x, y=y)
+                            if z:
+                                worklist.push_around(edge=z, vertex=vertex)
                                     
         self.graph.clean()
         
         
     def merge_multiple_edges(self) -> None:
         """
-        Gộp các cạnh bội
+        Gộp các cạnh bội cho đến khi không gộp thêm được nữa, dùng hàng đợi các đỉnh như merge_single_edges
         """
-        vertex_list: List[Vertex] = self.graph.vertex_list.copy()
-        while len(vertex_list) != 0:
-            vertex: Vertex = vertex_list.pop(0)
+        worklist: Worklist = Worklist(vertices=self.graph.vertex_list)
+        debug: bool = logger.isEnabledFor(logging.DEBUG)
+        while len(worklist) != 0:
+            vertex: Vertex = worklist.pop()
             num_in_edge: int = len(vertex.in_edges)
             num_out_edge: int = len(vertex.out_edges)
-            diff: int = num_out_edge - num_in_edge
-            '''if (num_in_edge == 0 or num_out_edge == 0) and abs(diff) == 1:
-                continue'''
             if abs(vertex.compute_degree()) == 1:
                 continue
             if num_in_edge == 0 and num_out_edge == 0:
                 continue
-            #assert diff != 0, print(vertex)
             in_edges: List[Edge] = vertex.in_edges.copy()
             out_edges: List[Edge] = vertex.out_edges.copy()
-            print("=============================={}=======================================".format(vertex))
+            if debug:
+                logger.debug("==============================%s=======================================", vertex)
             for x in in_edges:
                 if x.multiplicities == 0:
                     continue
-                x_reads = x.reads.copy()
                 for y in out_edges:
                     if x.multiplicities == 0 or y.multiplicities == 0 or x == y:
                         continue
-                    for read in x_reads:
-                        if read in y.reads:
-                            if read.check_consecutive_edges(x=x, y=y):
-                                print("{} và {} gộp được".format(x.sequence, y.sequence), end=" ")
-                                if self.graph.merge_mul(x=x, y=y):
-                                    self.graph.clean()
-                                    break
+                    # x và y phải liền kề nhau trong ít nhất một read (tra trong pair_index)
+                    if len(self.graph.pair_reads(x=x, y=y)) > 0:
+                        z: Optional[Edge] = self.graph.merge_mul(x=x, y=y)
+                        if z:
+                            worklist.push_around(edge=z, vertex=vertex)
+                            
+        self.graph.clean()
         
     
     def is_eulerian(self) -> bool:
@@ -110,75 +261,110 @@ class Assembler(object):
         Returns:
             bool: Nếu là đồ thị Euler trả về True, nếu không là False
         """
-        non_bal: int = 0
-        diff_list: List[int] = []
-        for i, vertex in enumerate(self.graph.vertex_list):
-            diff = len(vertex.out_edges) - len(vertex.in_edges)
-            if diff != 0:
-                non_bal += 1
-                '''in_degree: int = 0
-                for in_edge in vertex.in_edges:
-                    in_degree += in_edge.multiplicities
-                out_degree: int = 0
-                for out_edge in vertex.out_edges:
-                    out_degree += out_edge.multiplicities'''
-                
-                print(i, vertex, diff)
-                
-            diff_mul = vertex.compute_degree()
-            if diff_mul == 0:
-                continue
-            else:
-                if abs(diff_mul) >= 2:
-                    return False
-                else:
-                    diff_list.append(diff_mul)
-            
+        # Điều kiện bậc chỉ mất O(1) nhờ các đỉnh không cân bằng được cập nhật dần, tính liên thông chỉ được duyệt khi cần
+        return self.graph.is_eulerian()
         
-        if len(diff_list) == 2 and diff_list[0] * diff_list[-1] == -1:
-            return True
-        else:
-            return False
         
+    def hierholzer(self, start_vertex: Vertex) -> List[Edge]:
+        """Tìm đường đi Euler bắt đầu từ start_vertex bằng thuật toán Hierholzer dùng ngăn xếp (không đệ quy),
+        mỗi cạnh được đi qua đúng bằng số bội của nó
+
+        Args:
+            start_vertex (Vertex): Đỉnh bắt đầu
+
+        Returns:
+            List[Edge]: Các cạnh của đường đi theo thứ tự
+        """
         
-    def dfs_visit(self, path: List[Edge], vertex: Vertex, end_vertex: Vertex) -> Tuple[List[Edge], bool, bool]:
+        # Vị trí cạnh ra tiếp theo cần xét của mỗi đỉnh, các cạnh trước vị trí này đã đi hết số bội
+        next_out: Dict[Vertex, int] = {}
+        stack: List[Tuple[Vertex, Optional[Edge]]] = [(start_vertex, None)]
+        path: List[Edge] = []
+        while len(stack) > 0:
+            vertex, in_edge = stack[-1]
+            out_edges: List[Edge] = vertex.out_edges
+            i: int = next_out.get(vertex, 0)
+            while i < len(out_edges) and out_edges[i].visited >= out_edges[i].multiplicities:
+                i += 1
+            next_out[vertex] = i
+            if i < len(out_edges):
+                edge: Edge = out_edges[i]
+                edge.visited += 1
+                stack.append((edge.out_vertex, edge))
+            else:
+                # Đỉnh không còn cạnh ra nào, đưa cạnh đi vào đỉnh vào đường đi
+                stack.pop()
+                if in_edge is not None:
+                    path.append(in_edge)
+        path.reverse()
         
-        out_edges: List[Edge] = vertex.out_edges
-        for o_edge in out_edges:
-            if (o_edge.visited < o_edge.multiplicities):
-                o_edge.visited += 1
-                path.append(o_edge)
-                all_visited: bool = self.graph.check_all_visited()
-                o_vertex: Vertex = o_edge.out_vertex
-                if all_visited and o_vertex == end_vertex:
-                    return path, all_visited, o_vertex == end_vertex
-                else:
-                    if o_vertex != end_vertex:
-                        path, all_visited, end_equal = self.dfs_visit(path=path, vertex=o_vertex, end_vertex=end_vertex)
-                        if all_visited and end_equal:
-                            return path, all_visited, end_equal
-                    else:
-                        path.remove(o_edge)
-                        o_edge.visited -= 1
+        return path
     
     
     def find_eulerian_path(self) -> str:
-        start_vertex: Vertex = None
-        end_vertex: Vertex = None
+        if self.engine == "compact":
+            return self.graph.find_eulerian_path()
+        if not self.graph.is_eulerian():
+            raise ValueError("Đồ thị không có đường đi Euler (không cân bằng bậc hoặc có nhiều thành phần liên thông), hãy dùng find_contigs")
+        
+        start_vertex, end_vertex = self.graph.get_start_end_vertices()
+        num_edges: int = 0
         for vertex in self.graph.vertex_list:
-            if vertex.compute_degree() == 1:
-                start_vertex = vertex
-            if vertex.compute_degree() == -1:
-                end_vertex = vertex
-        path: List[Edge] = []   
-        path, all_visited, end_equal = self.dfs_visit(path=path, vertex=start_vertex, end_vertex=end_vertex)
-        assert all_visited and end_equal
-        origin_string: str = ""
-        for i, edge in enumerate(path):
-            if i == 0:
-                origin_string += edge.sequence
-            else:
-                origin_string += edge.sequence[self.graph.k - 1:]
-                
-        return origin_string
-    
\ No newline at end of file
+            for edge in vertex.out_edges:
+                edge.visited = 0
+                num_edges += edge.multiplicities
+        with self.profiler.stage("traversal"):
+            path: List[Edge] = self.hierholzer(start_vertex=start_vertex)
+        # Đường đi phải đi qua tất cả các cạnh và kết thúc tại đỉnh kết thúc
+        if len(path) != num_edges or path[-1].out_vertex != end_vertex:
+            raise RuntimeError("Đường đi Euler chỉ đi qua {}/{} cạnh".format(len(path), num_edges))
+        
+        # Ghép chuỗi một lần thay vì cộng dồn từng cạnh
+        k: int = self.graph.k
+        return "".join([path[0].sequence] + [edge.sequence[k - 1:] for edge in path[1:]])
+        
+    
+    def find_contigs(self) -> List[str]:
+        """Ghép các contig khi đồ thị không phải đồ thị Euler hoặc có nhiều thành phần liên thông:
+        mỗi thành phần được phủ bằng ít đường đi không chung cạnh nhất (CompactGraph.contig_paths)
+
+        Returns:
+            List[str]: Các contig
+        """
+        
+        with self.profiler.stage("traversal"):
+            if self.engine == "compact":
+                return self.graph.find_contigs()
+            
+            return CompactGraph.from_graph(graph=self.graph).find_contigs()
+    
+    
+    def save(self, dirname: str) -> None:
+        """Lưu đồ thị hiện tại (trước hoặc sau make_superpath) vào checkpoint để dùng lại mà không phải dựng lại
+
+        Args:
+            dirname (str): Thư mục lưu
+        """
+        
+        if self.engine == "compact":
+            raise ValueError("Checkpoint chỉ hỗ trợ engine=\"object\"")
+        save_graph(graph=self.graph, dirname=dirname, extra={"engine": self.engine, "simplify": self.simplify,
+                                                                    "merged": self.merged})
+        
+        
+    @staticmethod
+    def load(dirname: str, mmap: bool=True) -> "Assembler":
+        """Đọc Assembler từ checkpoint đã lưu bằng Assembler.save
+
+        Args:
+            dirname (str): Thư mục đã lưu
+            mmap (bool, optional): Có memory-map kho read hay không. Defaults to True.
+
+        Returns:
+            Assembler: Assembler với đồ thị đã được khôi phục
+        """
+        
+        extra: Dict = read_meta(dirname=dirname)["extra"]
+        
+        return Assembler.from_graph(graph=load_graph(dirname=dirname, mmap=mmap), engine=extra.get("engine", "object"),
+                                    simplify=extra.get("simplify", False), merged=extra.get("merged", False))
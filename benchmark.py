@@ -0,0 +1,284 @@
+import os
+import sys
+import json
+import math
+import argparse
+import tempfile
+import platform
+import multiprocessing
+from typing import List, Dict, Any, Optional
+import numpy as np
+from store import encode, decode
+from formats import BUFFER_SIZE
+from assembly import Assembler
+from instrument import Profiler
+
+
+# Các giai đoạn được so sánh giữa hai lần chạy
+BENCHMARK_STAGES: List[str] = ["load", "graph", "align_read", "count_kmers", "make_superpath", "find_eulerian_path"]
+
+# Kích thước bộ gen mặc định khi quét
+DEFAULT_SIZES: List[int] = [2000, 5000, 10000, 20000]
+
+
+def random_genome(length: int, repeat_fraction: float=0.0, repeat_length: int=0, seed: int=0) -> str:
+    """Sinh bộ gen ngẫu nhiên có lặp: một đoạn lặp dài repeat_length được chèn nhiều lần sao cho các bản sao
+    chiếm khoảng repeat_fraction độ dài bộ gen, phần còn lại là các đoạn ngẫu nhiên không lặp
+
+    Args:
+        length (int): Độ dài bộ gen
+        repeat_fraction (float, optional): Tỉ lệ độ dài bộ gen nằm trong các bản sao lặp. Defaults to 0.0.
+        repeat_length (int, optional): Độ dài đoạn lặp. Defaults to 0.
+        seed (int, optional): Hạt giống ngẫu nhiên. Defaults to 0.
+
+    Returns:
+        str: Bộ gen
+    """
+
+    if not 0 <= repeat_fraction < 1:
+        raise ValueError("repeat_fraction phải nằm trong [0, 1)")
+    rng: np.random.Generator = np.random.default_rng(seed)
+    n_copies: int = int(round(repeat_fraction * length / repeat_length)) if repeat_length > 0 else 0
+    unique_length: int = length - n_copies * repeat_length
+    unique: np.ndarray = rng.integers(0, 4, size=unique_length, dtype=np.uint8)
+    if n_copies == 0:
+        return decode(codes=unique)
+
+    # Các bản sao được chèn vào giữa các đoạn không lặp, hai đầu bộ gen luôn là đoạn không lặp
+    repeat: np.ndarray = rng.integers(0, 4, size=repeat_length, dtype=np.uint8)
+    cuts: np.ndarray = np.sort(rng.integers(1, max(2, unique_length), size=n_copies))
+    parts: List[np.ndarray] = []
+    start: int = 0
+    for cut in cuts.tolist():
+        parts.append(unique[start:cut])
+        parts.append(repeat)
+        start = cut
+    parts.append(unique[start:])
+
+    return decode(codes=np.concatenate(parts))
+
+
+def simulate_reads(genome: str, coverage: float, read_length: int, error_rate: float=0.0, seed: int=0) -> List[str]:
+    """Sinh các read từ bộ gen: vị trí bắt đầu được chọn đều ngẫu nhiên (luôn có read ở hai đầu bộ gen để bộ gen
+    được phủ hết), mỗi nucleotide bị thay bằng một nucleotide khác với xác suất error_rate
+
+    Args:
+        genome (str): Bộ gen
+        coverage (float): Độ phủ trung bình
+        read_length (int): Độ dài read
+        error_rate (float, optional): Tỉ lệ lỗi thay thế. Defaults to 0.0.
+        seed (int, optional): Hạt giống ngẫu nhiên. Defaults to 0.
+
+    Returns:
+        List[str]: Các read theo thứ tự vị trí bắt đầu
+    """
+
+    if read_length > len(genome):
+        raise ValueError("read_length dài hơn bộ gen")
+    rng: np.random.Generator = np.random.default_rng(seed)
+    codes: np.ndarray = encode(seq=genome)
+    n_reads: int = max(2, math.ceil(coverage * len(genome) / read_length))
+    last: int = len(genome) - read_length
+    starts: np.ndarray = np.sort(np.concatenate([[0, last], rng.integers(0, last + 1, size=n_reads - 2)]))
+
+    reads: List[str] = []
+    for start in starts.tolist():
+        read: np.ndarray = codes[start:start + read_length].copy()
+        if error_rate > 0:
+            errors: np.ndarray = rng.random(read_length) < error_rate
+            # Cộng thêm 1..3 (mod 4) để nucleotide thay thế luôn khác nucleotide ban đầu
+            read[errors] = (read[errors] + rng.integers(1, 4, size=int(errors.sum()), dtype=np.uint8)) % 4
+        reads.append(decode(codes=read))
+
+    return reads
+
+
+def write_fastq(reads: List[str], filename: str, prefix: str="read") -> None:
+    """Ghi các read ra file FASTQ với chất lượng cố định
+
+    Args:
+        reads (List[str]): Các read
+        filename (str): File cần ghi
+        prefix (str, optional): Tiền tố tên read. Defaults to "read".
+    """
+
+    with open(file=filename, mode="w", buffering=BUFFER_SIZE) as f:
+        for i, read in enumerate(reads):
+            f.write("@{}_{}\n{}\n+\n{}\n".format(prefix, i, read, "I" * len(read)))
+
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """Sinh bộ gen và các read của một trường hợp, ghép lại và đo thời gian từng giai đoạn
+
+    Args:
+        case (Dict[str, Any]): Cấu hình gồm length, repeat_fraction, repeat_length, coverage, read_length, error_rate, k,
+            seed, workers (số tiến trình đếm k-mer, mặc định 1) và workdir (thư mục ghi file FASTQ)
+
+    Returns:
+        Dict[str, Any]: Cấu hình cùng số read, thời gian (giây) của từng giai đoạn, các bộ đếm, bộ nhớ đỉnh
+            và kết quả kiểm tra chuỗi ghép được so với bộ gen
+    """
+
+    genome: str = random_genome(length=case["length"], repeat_fraction=case["repeat_fraction"],
+                                repeat_length=case["repeat_length"], seed=case["seed"])
+    reads: List[str] = simulate_reads(genome=genome, coverage=case["coverage"], read_length=case["read_length"],
+                                      error_rate=case["error_rate"], seed=case["seed"] + 1)
+    filename: str = os.path.join(case["workdir"], "genome_{}_{}_{}.fastq".format(case["length"], case["seed"], case.get("workers", 1)))
+    write_fastq(reads=reads, filename=filename)
+
+    result: Dict[str, Any] = {name: value for name, value in case.items() if name != "workdir"}
+    result["n_reads"] = len(reads)
+    profiler: Profiler = Profiler()
+    try:
+        assembler: Assembler = Assembler(filename=filename, k=case["k"], error_correct=case["error_rate"] > 0,
+                                         workers=case.get("workers", 1), profiler=profiler)
+        with profiler.stage("make_superpath"):
+            assembler.make_superpath()
+        result["is_eulerian"] = assembler.is_eulerian()
+        if result["is_eulerian"]:
+            with profiler.stage("find_eulerian_path"):
+                contigs: List[str] = [assembler.find_eulerian_path()]
+        else:
+            with profiler.stage("find_contigs"):
+                contigs = assembler.find_contigs()
+        result["n_contigs"] = len(contigs)
+        result["longest_contig"] = max((len(contig) for contig in contigs), default=0)
+        result["matches"] = len(contigs) == 1 and contigs[0] == genome
+        result["error"] = None
+    except Exception as e:
+        # Một trường hợp lỗi không làm dừng cả lần quét
+        result["matches"] = False
+        result["error"] = "{}: {}".format(type(e).__name__, e)
+    finally:
+        os.remove(filename)
+
+    report: Dict[str, Any] = profiler.report()
+    seconds: Dict[str, float] = {}
+    for stage in report["stages"]:
+        seconds[stage["name"]] = seconds.get(stage["name"], 0.0) + stage["seconds"]
+    result["seconds"] = seconds
+    result["total_seconds"] = report["total_seconds"]
+    result["peak_rss_bytes"] = report["peak_rss_bytes"]
+    result["counters"] = report["counters"]
+
+    return result
+
+
+def run_sweep(sizes: List[int], coverage: float=20.0, read_length: int=100, error_rate: float=0.0,
+              repeat_fraction: float=0.0, repeat_length: int=0, k: int=21, seed: int=0, isolate: bool=True,
+              workers: Optional[List[int]]=None) -> Dict[str, Any]:
+    """Chạy run_case với từng kích thước bộ gen và từng số tiến trình. Chỉ bước đếm k-mer (giai đoạn count_kmers) chạy
+    song song, so sánh các số tiến trình cho biết phần tuần tự còn lại của giai đoạn graph
+
+    Args:
+        sizes (List[int]): Các độ dài bộ gen
+        coverage (float, optional): Độ phủ. Defaults to 20.0.
+        read_length (int, optional): Độ dài read. Defaults to 100.
+        error_rate (float, optional): Tỉ lệ lỗi thay thế, lớn hơn 0 thì bật sửa lỗi. Defaults to 0.0.
+        repeat_fraction (float, optional): Tỉ lệ lặp của bộ gen. Defaults to 0.0.
+        repeat_length (int, optional): Độ dài đoạn lặp. Defaults to 0.
+        k (int, optional): Độ dài k-mer. Defaults to 21.
+        seed (int, optional): Hạt giống ngẫu nhiên. Defaults to 0.
+        isolate (bool, optional): Chạy mỗi trường hợp trong một tiến trình riêng để bộ nhớ đỉnh được đo riêng. Defaults to True.
+        workers (List[int], optional): Các số tiến trình đếm k-mer. Defaults to [1].
+
+    Returns:
+        Dict[str, Any]: Báo cáo gồm thông tin môi trường và kết quả của các trường hợp
+    """
+
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as workdir:
+        cases: List[Dict[str, Any]] = [{"length": length, "repeat_fraction": repeat_fraction, "repeat_length": repeat_length,
+                                        "coverage": coverage, "read_length": read_length, "error_rate": error_rate,
+                                        "k": k, "seed": seed, "workers": n_workers, "workdir": workdir}
+                                       for length in sizes for n_workers in (workers or [1])]
+        if isolate:
+            with multiprocessing.Pool(processes=1, maxtasksperchild=1) as pool:
+                results: List[Dict[str, Any]] = pool.map(run_case, cases, chunksize=1)
+        else:
+            results = [run_case(case) for case in cases]
+
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(), "cases": results}
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float=1.2) -> List[str]:
+    """So sánh hai báo cáo của run_sweep: các trường hợp cùng cấu hình được ghép cặp, một giai đoạn bị coi là chậm đi
+    nếu thời gian mới lớn hơn tolerance lần thời gian cũ; trường hợp trước ghép đúng mà nay sai cũng được báo
+
+    Args:
+        baseline (Dict[str, Any]): Báo cáo cũ
+        current (Dict[str, Any]): Báo cáo mới
+        tolerance (float, optional): Tỉ lệ chậm đi cho phép. Defaults to 1.2.
+
+    Returns:
+        List[str]: Mô tả các chỗ bị chậm đi hoặc sai, rỗng nếu không có
+    """
+
+    def config(result: Dict[str, Any]) -> tuple:
+        return (result["length"], result["repeat_fraction"], result["repeat_length"], result["coverage"],
+                result["read_length"], result["error_rate"], result["k"], result["seed"], result.get("workers", 1))
+
+    old: Dict[tuple, Dict[str, Any]] = {config(result): result for result in baseline["cases"]}
+    regressions: List[str] = []
+    for result in current["cases"]:
+        before: Optional[Dict[str, Any]] = old.get(config(result))
+        if before is None:
+            continue
+        if before["matches"] and not result["matches"]:
+            regressions.append("length={} workers={}: không còn ghép đúng bộ gen".format(result["length"], result.get("workers", 1)))
+        for stage in BENCHMARK_STAGES:
+            if stage in before["seconds"] and stage in result["seconds"] and \
+                    result["seconds"][stage] > tolerance * before["seconds"][stage]:
+                regressions.append("length={} workers={}: {} chậm đi {:.2f} lần ({:.4f}s -> {:.4f}s)".format(
+                    result["length"], result.get("workers", 1), stage, result["seconds"][stage] / before["seconds"][stage],
+                    before["seconds"][stage], result["seconds"][stage]))
+
+    return regressions
+
+
+def main(argv: Optional[List[str]]=None) -> int:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Đo thời gian ghép trên bộ gen và read mô phỏng")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Các độ dài bộ gen")
+    parser.add_argument("--coverage", type=float, default=20.0)
+    parser.add_argument("--read-length", type=int, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--repeat-fraction", type=float, default=0.0)
+    parser.add_argument("--repeat-length", type=int, default=0)
+    parser.add_argument("-k", type=int, default=21)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Các số tiến trình đếm k-mer cần so sánh")
+    parser.add_argument("--no-isolate", action="store_true", help="Chạy mọi trường hợp trong cùng tiến trình")
+    parser.add_argument("--output", default="benchmark.json", help="File JSON ghi kết quả")
+    parser.add_argument("--baseline", default=None, help="File JSON của lần chạy trước để so sánh")
+    parser.add_argument("--tolerance", type=float, default=1.2)
+    args: argparse.Namespace = parser.parse_args(argv)
+
+    report: Dict[str, Any] = run_sweep(sizes=args.sizes, coverage=args.coverage, read_length=args.read_length,
+                                       error_rate=args.error_rate, repeat_fraction=args.repeat_fraction,
+                                       repeat_length=args.repeat_length, k=args.k, seed=args.seed, isolate=not args.no_isolate,
+                                       workers=args.workers)
+    with open(file=args.output, mode="w") as f:
+        json.dump(report, f, indent=2)
+
+    print("{:>10} {:>8} {:>8} {}  {:>8}".format("length", "workers", "reads", " ".join("{:>18}".format(s) for s in BENCHMARK_STAGES),
+                                                "matches"))
+    for result in report["cases"]:
+        print("{:>10} {:>8} {:>8} {}  {:>8}".format(result["length"], result["workers"], result["n_reads"],
+                                                    " ".join("{:>18.4f}".format(result["seconds"].get(s, float("nan")))
+                                                             for s in BENCHMARK_STAGES),
+                                                    str(result["matches"])))
+        if result["error"] is not None:
+            print("{:>10} lỗi: {}".format("", result["error"]))
+
+    failed: bool = any(not result["matches"] for result in report["cases"])
+    if args.baseline is not None:
+        with open(file=args.baseline, mode="r") as f:
+            regressions: List[str] = compare(baseline=json.load(f), current=report, tolerance=args.tolerance)
+        for line in regressions:
+            print(line)
+        failed = failed or len(regressions) > 0
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
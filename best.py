@@ -0,0 +1,223 @@
+import math
+from typing import List, Dict, Tuple, Iterator
+
+try:
+    from scipy.sparse import csc_matrix
+    from scipy.sparse.linalg import splu
+except ImportError:
+    # scipy không bắt buộc, khi không có thì dùng phép khử Gauss thưa viết bằng Python
+    csc_matrix = None
+    splu = None
+
+
+# Một hàng của ma trận thưa: cột -> giá trị khác 0
+SparseRow = Dict[int, int]
+
+# Các cơ sở Miller-Rabin đủ để kiểm tra chính xác mọi số nhỏ hơn 3.3 * 10^24
+_WITNESSES: Tuple[int, ...] = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+
+def is_prime(n: int) -> bool:
+    """Kiểm tra số nguyên tố bằng Miller-Rabin tất định (chính xác với n < 3.3 * 10^24)
+
+    Args:
+        n (int): Số cần kiểm tra
+
+    Returns:
+        bool: True nếu n là số nguyên tố
+    """
+
+    if n < 2:
+        return False
+    for p in _WITNESSES:
+        if n % p == 0:
+            return n == p
+    d: int = n - 1
+    s: int = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _WITNESSES:
+        x: int = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+
+    return True
+
+
+def large_primes(start: int = (1 << 61) - 1) -> Iterator[int]:
+    """Duyệt các số nguyên tố giảm dần bắt đầu từ start
+
+    Args:
+        start (int, optional): Số bắt đầu. Defaults to 2^61 - 1.
+
+    Yields:
+        int: Các số nguyên tố
+    """
+
+    n: int = start if start % 2 == 1 else start - 1
+    while n > 2:
+        if is_prime(n):
+            yield n
+        n -= 2
+
+
+def determinant_mod(rows: List[SparseRow], p: int) -> int:
+    """Định thức modulo p của ma trận vuông thưa bằng phép khử Gauss thưa,
+    ở mỗi cột chọn hàng trục có ít phần tử khác 0 nhất để hạn chế phát sinh phần tử mới
+
+    Args:
+        rows (List[SparseRow]): Các hàng của ma trận
+        p (int): Số nguyên tố
+
+    Returns:
+        int: Định thức modulo p
+    """
+
+    n: int = len(rows)
+    work: List[SparseRow] = [{c: v % p for c, v in row.items() if v % p != 0} for row in rows]
+    # Cột -> các hàng còn lại có phần tử khác 0 ở cột đó
+    col_rows: List[set] = [set() for _ in range(n)]
+    for r, row in enumerate(work):
+        for c in row:
+            col_rows[c].add(r)
+
+    det: int = 1
+    pivot_of: List[int] = [0] * n
+    for c in range(n):
+        if len(col_rows[c]) == 0:
+            return 0
+        r: int = min(col_rows[c], key=lambda i: (len(work[i]), i))
+        pivot_of[c] = r
+        pivot_row: SparseRow = work[r]
+        pivot: int = pivot_row[c]
+        det = det * pivot % p
+        inverse: int = pow(pivot, -1, p)
+
+        for col in pivot_row:
+            col_rows[col].discard(r)
+        for i in list(col_rows[c]):
+            row: SparseRow = work[i]
+            factor: int = row[c] * inverse % p
+            for col, value in pivot_row.items():
+                new_value: int = (row.get(col, 0) - factor * value) % p
+                if new_value == 0:
+                    if col in row:
+                        del row[col]
+                        col_rows[col].discard(i)
+                else:
+                    if col not in row:
+                        col_rows[col].add(i)
+                    row[col] = new_value
+
+    # Dấu của hoán vị cột -> hàng trục
+    sign: int = 1
+    seen: List[bool] = [False] * n
+    for c in range(n):
+        if not seen[c]:
+            length: int = 0
+            j: int = c
+            while not seen[j]:
+                seen[j] = True
+                j = pivot_of[j]
+                length += 1
+            if length % 2 == 0:
+                sign = -sign
+
+    return det if sign == 1 else (-det) % p
+
+
+def exact_determinant(rows: List[SparseRow], bound: int) -> int:
+    """Định thức chính xác (số nguyên lớn) của ma trận nguyên thưa có định thức nằm trong [0, bound],
+    tính modulo nhiều số nguyên tố lớn rồi ghép lại bằng định lý phần dư Trung Hoa
+
+    Args:
+        rows (List[SparseRow]): Các hàng của ma trận
+        bound (int): Cận trên của định thức
+
+    Returns:
+        int: Định thức
+    """
+
+    if len(rows) == 0:
+        return 1
+    if bound <= 0:
+        return 0
+
+    residue: int = 0
+    modulus: int = 1
+    for p in large_primes():
+        r: int = determinant_mod(rows=rows, p=p)
+        # x = residue (mod modulus), x = r (mod p)
+        residue += modulus * ((r - residue) * pow(modulus, -1, p) % p)
+        modulus *= p
+        if modulus > bound:
+            break
+
+    return residue
+
+
+def log_abs_determinant(rows: List[SparseRow]) -> float:
+    """Logarit tự nhiên của trị tuyệt đối định thức, dùng phân tích LU thưa của scipy nếu có,
+    nếu không thì khử Gauss thưa với số thực (chọn trục có trị tuyệt đối lớn nhất trong cột)
+
+    Args:
+        rows (List[SparseRow]): Các hàng của ma trận
+
+    Returns:
+        float: log|det|, -inf nếu ma trận suy biến
+    """
+
+    n: int = len(rows)
+    if n == 0:
+        return 0.0
+
+    if splu is not None:
+        data: List[float] = [float(v) for row in rows for v in row.values()]
+        row_index: List[int] = [r for r, row in enumerate(rows) for _ in row]
+        col_index: List[int] = [c for row in rows for c in row]
+        try:
+            lu = splu(csc_matrix((data, (row_index, col_index)), shape=(n, n)))
+        except RuntimeError:
+            # Ma trận suy biến
+            return -math.inf
+        return float(sum(math.log(abs(v)) for v in lu.U.diagonal()))
+
+    work: List[Dict[int, float]] = [{c: float(v) for c, v in row.items() if v != 0} for row in rows]
+    col_rows: List[set] = [set() for _ in range(n)]
+    for r, row in enumerate(work):
+        for c in row:
+            col_rows[c].add(r)
+
+    log_det: float = 0.0
+    for c in range(n):
+        if len(col_rows[c]) == 0:
+            return -math.inf
+        r: int = max(col_rows[c], key=lambda i: (abs(work[i][c]), -len(work[i])))
+        pivot_row: Dict[int, float] = work[r]
+        pivot: float = pivot_row[c]
+        log_det += math.log(abs(pivot))
+
+        for col in pivot_row:
+            col_rows[col].discard(r)
+        for i in list(col_rows[c]):
+            row: Dict[int, float] = work[i]
+            factor: float = row[c] / pivot
+            for col, value in pivot_row.items():
+                new_value: float = row.get(col, 0.0) - factor * value
+                if col == c or new_value == 0.0:
+                    if col in row:
+                        del row[col]
+                        col_rows[col].discard(i)
+                else:
+                    if col not in row:
+                        col_rows[col].add(i)
+                    row[col] = new_value
+
+    return log_det
@@ -0,0 +1,239 @@
+import os
+import json
+from typing import List, Dict, Tuple, Optional, Any
+import numpy as np
+from store import ReadStore
+from overlap import OverlapIntervals
+from graph import Vertex, Edge, Read, Graph
+
+
+# Định dạng checkpoint, tăng VERSION mỗi khi thay đổi các mảng được lưu
+FORMAT: str = "eulerian-graph"
+VERSION: int = 2
+
+
+def pack_keys(keys: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Nén các khóa (mã 2 bit, độ dài tùy ý) thành một mảng byte liên tục
+
+    Args:
+        keys (List[int]): Các khóa
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Các byte (little-endian) và offsets, khóa thứ i nằm trong data[offsets[i]:offsets[i+1]]
+    """
+
+    chunks: List[bytes] = [key.to_bytes((key.bit_length() + 7) // 8, "little") for key in keys]
+    offsets: np.ndarray = np.zeros(shape=len(chunks) + 1, dtype=np.int64)
+    np.cumsum([len(chunk) for chunk in chunks], out=offsets[1:])
+
+    return np.frombuffer(b"".join(chunks), dtype=np.uint8), offsets
+
+
+def unpack_keys(data: np.ndarray, offsets: np.ndarray) -> List[int]:
+    """Giải nén các khóa đã nén bằng pack_keys
+    """
+
+    raw: bytes = np.asarray(data).tobytes()
+    bounds: List[int] = offsets.tolist()
+
+    return [int.from_bytes(raw[bounds[i]:bounds[i + 1]], "little") for i in range(len(bounds) - 1)]
+
+
+def to_csr(rows: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Ghép các danh sách số nguyên thành dạng CSR: hàng i là values[offsets[i]:offsets[i+1]]
+    """
+
+    offsets: np.ndarray = np.zeros(shape=len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=offsets[1:])
+    values: np.ndarray = np.fromiter((value for row in rows for value in row), dtype=np.int64, count=int(offsets[-1]))
+
+    return offsets, values
+
+
+def from_csr(offsets: np.ndarray, values: np.ndarray) -> List[List[int]]:
+    """Tách mảng CSR thành các danh sách
+    """
+
+    bounds: List[int] = offsets.tolist()
+    flat: List[int] = values.tolist()
+
+    return [flat[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+
+def save_graph(graph: Graph, dirname: str, extra: Optional[Dict[str, Any]]=None) -> None:
+    """Lưu toàn bộ trạng thái của đồ thị (kể cả sau make_superpath) vào một thư mục các file .npy:
+    đỉnh, cạnh được đánh số nguyên, khóa được nén 2 bit, đường đi và đoạn trùng của các read dạng CSR
+
+    Args:
+        graph (Graph): Đồ thị
+        dirname (str): Thư mục lưu
+        extra (Dict[str, Any], optional): Thông tin thêm được lưu cùng (ví dụ tham số của Assembler). Defaults to None.
+    """
+
+    # Đánh số mọi đỉnh, cạnh còn được tham chiếu, kể cả các cạnh đã bị gỡ nhưng chưa bị Graph.clean xóa
+    vertex_id: Dict[Vertex, int] = {}
+    edge_id: Dict[Edge, int] = {}
+    for vertex in list(graph.vertex_list) + list(graph.vertex_dict.values()):
+        vertex_id.setdefault(vertex, len(vertex_id))
+    edges: List[Edge] = list(graph.edge_list) + list(graph.edge_dict.values())
+    edges += [edge for vertex in list(vertex_id) for edge in vertex.out_edges + vertex.in_edges]
+    edges += [edge for read in graph.read_list for _, edge in read.path()]
+    for edge in edges:
+        if edge not in edge_id:
+            edge_id[edge] = len(edge_id)
+            vertex_id.setdefault(edge.in_vertex, len(vertex_id))
+            vertex_id.setdefault(edge.out_vertex, len(vertex_id))
+    read_id: Dict[Read, int] = {read: read.read_id for read in graph.read_list}
+
+    arrays: Dict[str, np.ndarray] = {}
+    arrays["vertex_keys"], arrays["vertex_key_offsets"] = pack_keys([vertex.key for vertex in vertex_id])
+    arrays["vertex_degrees"] = np.array([(vertex.in_degree, vertex.out_degree) for vertex in vertex_id], dtype=np.int64).reshape(-1, 2)
+    arrays["out_edge_offsets"], arrays["out_edges"] = to_csr([[edge_id[edge] for edge in vertex.out_edges] for vertex in vertex_id])
+    arrays["in_edge_offsets"], arrays["in_edges"] = to_csr([[edge_id[edge] for edge in vertex.in_edges] for vertex in vertex_id])
+    arrays["vertex_list"] = np.array([vertex_id[vertex] for vertex in graph.vertex_list], dtype=np.int64)
+    arrays["vertex_dict"] = np.array([vertex_id[vertex] for vertex in graph.vertex_dict.values()], dtype=np.int64)
+    arrays["unbalanced"] = np.array([(vertex_id[vertex], diff) for vertex, diff in graph.unbalanced.items()], dtype=np.int64).reshape(-1, 2)
+
+    arrays["edge_keys"], arrays["edge_key_offsets"] = pack_keys([edge.key for edge in edge_id])
+    arrays["edge_vertices"] = np.array([(vertex_id[edge.in_vertex], vertex_id[edge.out_vertex]) for edge in edge_id], dtype=np.int64).reshape(-1, 2)
+    arrays["edge_state"] = np.array([(edge.multiplicities, edge.visited, edge.linked_from, edge.linked_to) for edge in edge_id],
+                                    dtype=np.int64).reshape(-1, 4)
+    arrays["edge_list"] = np.array([edge_id[edge] for edge in graph.edge_list], dtype=np.int64)
+    arrays["edge_dict"] = np.array([edge_id[edge] for edge in graph.edge_dict.values()], dtype=np.int64)
+    # Edge.reads và Edge.position_in_read giữ nguyên thứ tự
+    arrays["edge_read_offsets"], arrays["edge_reads"] = to_csr([[read_id[read] for read in edge.reads] for edge in edge_id])
+    arrays["edge_position_offsets"], arrays["edge_positions"] = to_csr(
+        [edge.position_in_read[read] for edge in edge_id for read in edge.reads])
+
+    arrays["read_strands"] = np.array([read.strand for read in graph.read_list], dtype=np.int8)
+    arrays["path_offsets"], arrays["path_positions"] = to_csr([read.get_edges_position() for read in graph.read_list])
+    arrays["path_edges"] = np.array([edge_id[edge] for read in graph.read_list for _, edge in read.path()], dtype=np.int64)
+    arrays["path_break_offsets"], arrays["path_breaks"] = to_csr(
+        [sorted(read.slot_position[slot] for slot in read.breaks) for read in graph.read_list])
+    for name in ("front_of", "behind_of"):
+        arrays[name + "_offsets"], arrays[name] = to_csr(
+            [[value for other, pos in getattr(read, name).items() for value in (read_id[other], pos[0], pos[1])] for read in graph.read_list])
+
+    pairs: List[Tuple[Tuple[Edge, Edge], Dict[Read, List[int]]]] = list(graph.pair_index.items())
+    arrays["pairs"] = np.array([(edge_id[x], edge_id[y]) for (x, y), _ in pairs], dtype=np.int64).reshape(-1, 2)
+    arrays["pair_read_offsets"], arrays["pair_reads"] = to_csr([[read_id[read] for read in reads] for _, reads in pairs])
+    arrays["pair_position_offsets"], arrays["pair_positions"] = to_csr(
+        [positions for _, reads in pairs for positions in reads.values()])
+
+    os.makedirs(dirname, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(dirname, name + ".npy"), array)
+    graph.seqs.save(dirname=os.path.join(dirname, "reads"))
+    with open(os.path.join(dirname, "graph.json"), mode="w") as f:
+        json.dump({"format": FORMAT, "version": VERSION, "k": graph.k, "threshold": graph.threshold,
+                   "extra": extra if extra is not None else {}}, f)
+
+
+def read_meta(dirname: str) -> Dict[str, Any]:
+    """Đọc và kiểm tra phần mô tả của checkpoint
+
+    Args:
+        dirname (str): Thư mục đã lưu
+
+    Returns:
+        Dict[str, Any]: Định dạng, phiên bản, k, threshold và thông tin thêm
+    """
+
+    with open(os.path.join(dirname, "graph.json"), mode="r") as f:
+        meta: Dict[str, Any] = json.load(f)
+    if meta.get("format") != FORMAT:
+        raise ValueError("{} không phải là checkpoint của đồ thị".format(dirname))
+    if meta.get("version") != VERSION:
+        raise ValueError("Không đọc được checkpoint phiên bản {} (phiên bản hiện tại là {})".format(meta.get("version"), VERSION))
+
+    return meta
+
+
+def load_graph(dirname: str, mmap: bool=True) -> Graph:
+    """Đọc đồ thị đã lưu bằng save_graph mà không phải đọc lại file read và dựng lại đồ thị. Các mảng được đọc hết vào bộ nhớ
+    vì đỉnh, cạnh và đường đi của read đều được dựng lại thành object; chỉ kho read (được đọc dần khi cần chuỗi) được memory-map
+
+    Args:
+        dirname (str): Thư mục đã lưu
+        mmap (bool, optional): Có memory-map kho read hay không. Defaults to True.
+
+    Returns:
+        Graph: Đồ thị
+    """
+
+    meta: Dict[str, Any] = read_meta(dirname=dirname)
+
+    def load(name: str) -> np.ndarray:
+        return np.load(os.path.join(dirname, name + ".npy"))
+
+    graph: Graph = Graph.empty(k=meta["k"], threshold=meta["threshold"],
+                               seqs=ReadStore.open(dirname=os.path.join(dirname, "reads"), mmap=mmap))
+
+    vertices: List[Vertex] = [Vertex(key=key, graph=graph) for key in unpack_keys(load("vertex_keys"), load("vertex_key_offsets"))]
+    for vertex, (in_degree, out_degree) in zip(vertices, load("vertex_degrees").tolist()):
+        vertex.in_degree = in_degree
+        vertex.out_degree = out_degree
+
+    edges: List[Edge] = []
+    for key, (u, v), (multiplicities, visited, linked_from, linked_to) in zip(
+            unpack_keys(load("edge_keys"), load("edge_key_offsets")), load("edge_vertices").tolist(), load("edge_state").tolist()):
+        edge: Edge = Edge(in_vertex=vertices[u], out_vertex=vertices[v], key=key)
+        edge._multiplicities = multiplicities
+        edge.visited = visited
+        edge.linked_from = bool(linked_from)
+        edge.linked_to = bool(linked_to)
+        edges.append(edge)
+    for vertex, out_edges, in_edges in zip(vertices, from_csr(load("out_edge_offsets"), load("out_edges")),
+                                           from_csr(load("in_edge_offsets"), load("in_edges"))):
+        vertex.out_edges = [edges[e] for e in out_edges]
+        vertex.in_edges = [edges[e] for e in in_edges]
+
+    graph.vertex_list = [vertices[v] for v in load("vertex_list").tolist()]
+    graph.vertex_dict = {vertices[v].key: vertices[v] for v in load("vertex_dict").tolist()}
+    graph.edge_list = [edges[e] for e in load("edge_list").tolist()]
+    graph.edge_dict = {edges[e].key: edges[e] for e in load("edge_dict").tolist()}
+    graph.unbalanced = {vertices[v]: diff for v, diff in load("unbalanced").tolist()}
+
+    # Đường đi của read được dựng lại trực tiếp trên các mảng ô, Edge.reads và pair_index được gán từ checkpoint
+    strands: List[int] = load("read_strands").tolist()
+    graph.read_list = [Read(store=graph.seqs, read_id=r, pair_index=graph.pair_index, strand=strands[r]) for r in range(len(strands))]
+    path_edges: List[int] = load("path_edges").tolist()
+    start: int = 0
+    for read, positions in zip(graph.read_list, from_csr(load("path_offsets"), load("path_positions"))):
+        n: int = len(positions)
+        read.slot_position = positions
+        read.slot_edge = [edges[e] for e in path_edges[start:start + n]]
+        read.next_slot = list(range(1, n)) + [-1] if n > 0 else []
+        read.prev_slot = list(range(-1, n - 1))
+        read.position_to_slot = {position: slot for slot, position in enumerate(positions)}
+        read.head = 0 if n > 0 else -1
+        read.tail = n - 1
+        start += n
+    for read, positions in zip(graph.read_list, from_csr(load("path_break_offsets"), load("path_breaks"))):
+        read.breaks = {read.position_to_slot[position] for position in positions}
+    for name in ("front_of", "behind_of"):
+        for read, values in zip(graph.read_list, from_csr(load(name + "_offsets"), load(name))):
+            setattr(read, name, {graph.read_list[values[j]]: (values[j + 1], values[j + 2]) for j in range(0, len(values), 3)})
+
+    edge_positions: List[List[int]] = from_csr(load("edge_position_offsets"), load("edge_positions"))
+    j: int = 0
+    for edge, read_ids in zip(edges, from_csr(load("edge_read_offsets"), load("edge_reads"))):
+        for r in read_ids:
+            edge.reads[graph.read_list[r]] = None
+            edge.position_in_read[graph.read_list[r]] = edge_positions[j]
+            j += 1
+
+    pair_positions: List[List[int]] = from_csr(load("pair_position_offsets"), load("pair_positions"))
+    j = 0
+    for (x, y), read_ids in zip(load("pairs").tolist(), from_csr(load("pair_read_offsets"), load("pair_reads"))):
+        reads: Dict[Read, List[int]] = {}
+        for r in read_ids:
+            reads[graph.read_list[r]] = pair_positions[j]
+            j += 1
+        graph.pair_index[(edges[x], edges[y])] = reads
+
+    graph.overlap_intervals = OverlapIntervals(
+        front_of={read: [(other, pos[0], pos[1]) for other, pos in read.front_of.items()] for read in graph.read_list},
+        behind_of={read: [(other, pos[0], pos[1]) for other, pos in read.behind_of.items()] for read in graph.read_list})
+
+    return graph
@@ -0,0 +1,493 @@
+from typing import List, Dict, Tuple, Optional
+import numpy as np
+from store import ReadStore
+from kmer import key_to_sequence
+from overlap import find_overlaps
+from counting import count_kmers
+from kmertable import KmerTable
+
+
+def index_dtype(n: int) -> type:
+    """Kiểu số nguyên nhỏ nhất đủ để đánh chỉ số n phần tử
+    """
+
+    return np.int32 if n < 2 ** 31 else np.int64
+
+
+def build_csr(vertices: np.ndarray, n_vertices: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Tạo biểu diễn CSR: các cạnh của đỉnh v là edges[offsets[v]:offsets[v+1]], giữ nguyên thứ tự id cạnh
+
+    Args:
+        vertices (np.ndarray): Đỉnh (nguồn hoặc đích) của mỗi cạnh
+        n_vertices (int): Số đỉnh
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: offsets và edges
+    """
+
+    edges: np.ndarray = np.argsort(vertices, kind="stable").astype(index_dtype(len(vertices)))
+    offsets: np.ndarray = np.zeros(shape=n_vertices + 1, dtype=np.int64)
+    np.cumsum(np.bincount(vertices, minlength=n_vertices), out=offsets[1:])
+
+    return offsets, edges
+
+
+class CompactGraph(object):
+    """
+    Đồ thị de Bruijn dạng mảng: đỉnh và cạnh là các số nguyên, danh sách kề lưu dạng CSR,
+    bội, số lần đi qua và khóa của chuỗi đại diện lưu trong các mảng song song.
+    """
+
+    def __init__(self, k: int, vertex_keys: np.ndarray, edge_keys: np.ndarray, src: np.ndarray, dst: np.ndarray,
+                 multiplicities: np.ndarray) -> None:
+        """
+
+        Args:
+            k (int): Độ dài k-mer
+            vertex_keys (np.ndarray): Khóa của chuỗi đại diện cho mỗi đỉnh
+            edge_keys (np.ndarray): Khóa của chuỗi đại diện cho mỗi cạnh
+            src (np.ndarray): Đỉnh vào của mỗi cạnh
+            dst (np.ndarray): Đỉnh ra của mỗi cạnh
+            multiplicities (np.ndarray): Bội của mỗi cạnh
+        """
+
+        n_vertices: int = len(vertex_keys)
+        n_edges: int = len(edge_keys)
+        self.k: int = k
+        self.vertex_keys: np.ndarray = vertex_keys
+        self.edge_keys: np.ndarray = edge_keys
+        self.src: np.ndarray = src.astype(index_dtype(n_vertices))
+        self.dst: np.ndarray = dst.astype(index_dtype(n_vertices))
+        self.multiplicities: np.ndarray = multiplicities.astype(np.int32)
+        self.visited: np.ndarray = np.zeros(shape=n_edges, dtype=np.int32)
+        self.out_offsets, self.out_edges = build_csr(vertices=self.src, n_vertices=n_vertices)
+        self.in_offsets, self.in_edges = build_csr(vertices=self.dst, n_vertices=n_vertices)
+
+
+    @staticmethod
+    def from_table(k: int, edge_keys: np.ndarray, multiplicities: np.ndarray) -> "CompactGraph":
+        """Tạo đồ thị từ bảng k-mer (khóa, bội) đã sắp xếp theo lần xuất hiện đầu tiên,
+        id các đỉnh được cấp theo cùng thứ tự Graph.new_vertex được gọi khi dựng đồ thị object
+
+        Args:
+            k (int): Độ dài k-mer
+            edge_keys (np.ndarray): Khóa của các k-mer
+            multiplicities (np.ndarray): Bội của các k-mer
+
+        Returns:
+            CompactGraph: Đồ thị dạng mảng
+        """
+
+        vertex_top: int = 1 << (2 * (k - 1))
+        vertex_mask: int = vertex_top - 1
+        if edge_keys.dtype == object:
+            prefixes: np.ndarray = np.array([(key >> 2) & vertex_mask | vertex_top for key in edge_keys], dtype=object)
+            suffixes: np.ndarray = np.array([key & vertex_mask | vertex_top for key in edge_keys], dtype=object)
+        else:
+            prefixes = (edge_keys >> np.uint64(2)) & np.uint64(vertex_mask) | np.uint64(vertex_top)
+            suffixes = edge_keys & np.uint64(vertex_mask) | np.uint64(vertex_top)
+
+        # Mỗi cạnh tạo đỉnh tiền tố rồi đỉnh hậu tố, id của đỉnh theo lần xuất hiện đầu tiên trong dãy này
+        ends: np.ndarray = np.empty(shape=2 * len(edge_keys), dtype=edge_keys.dtype)
+        ends[0::2] = prefixes
+        ends[1::2] = suffixes
+        unique, first, inverse = np.unique(ends, return_index=True, return_inverse=True)
+        order: np.ndarray = np.argsort(first)
+        rank: np.ndarray = np.empty(shape=len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        vertex_ids: np.ndarray = rank[inverse.reshape(-1)]
+
+        return CompactGraph(k=k, vertex_keys=unique[order], edge_keys=edge_keys, src=vertex_ids[0::2],
+                            dst=vertex_ids[1::2], multiplicities=multiplicities)
+
+
+    @staticmethod
+    def from_reads(store: ReadStore, k: int, workers: int=1) -> "CompactGraph":
+        """Dựng đồ thị dạng mảng trực tiếp từ các read mà không tạo object Vertex, Edge, Read
+
+        Args:
+            store (ReadStore): Kho chứa các read
+            k (int): Độ dài k-mer
+            workers (int, optional): Số tiến trình đếm k-mer. Defaults to 1.
+
+        Returns:
+            CompactGraph: Đồ thị dạng mảng
+        """
+
+        front_of, behind_of = find_overlaps(store=store, min_length=k)
+        table, _ = count_kmers(store=store, k=k, workers=workers, front_of=front_of, behind_of=behind_of, keep_occurrences=False)
+
+        return CompactGraph.from_table(k=k, edge_keys=table[0], multiplicities=table[1])
+
+
+    @staticmethod
+    def from_kmer_table(table: KmerTable, chunk_size: int=1 << 20) -> "CompactGraph":
+        """Dựng đồ thị dạng mảng từ bảng k-mer trên đĩa (KmerTable.build), kết quả giống from_table. Bảng được đọc theo
+        từng đoạn chunk_size dòng theo thứ tự xuất hiện đầu tiên, các đỉnh được gom dần thành một mảng khóa đã sắp xếp
+        nên ngoài các mảng của chính đồ thị không có mảng tạm nào dài gấp đôi số cạnh như np.unique trong from_table
+
+        Args:
+            table (KmerTable): Bảng k-mer
+            chunk_size (int, optional): Số dòng của bảng được đọc mỗi lần. Defaults to 1 << 20.
+
+        Returns:
+            CompactGraph: Đồ thị dạng mảng
+        """
+
+        k: int = table.k
+        vertex_top: np.uint64 = np.uint64(1 << (2 * (k - 1)))
+        vertex_mask: np.uint64 = np.uint64((1 << (2 * (k - 1))) - 1)
+        order: np.ndarray = table.first_occurrence_order()
+        n_edges: int = len(order)
+        chunks: List[Tuple[int, int]] = [(start, min(n_edges, start + chunk_size)) for start in range(0, n_edges, chunk_size)]
+        edge_keys: np.ndarray = np.empty(shape=n_edges, dtype=np.uint64)
+        multiplicities: np.ndarray = np.empty(shape=n_edges, dtype=np.int64)
+
+        def ends_of(start: int, end: int) -> np.ndarray:
+            # Đỉnh tiền tố rồi đỉnh hậu tố của mỗi cạnh, như thứ tự Graph.new_vertex được gọi
+            keys: np.ndarray = edge_keys[start:end]
+            ends: np.ndarray = np.empty(shape=2 * len(keys), dtype=np.uint64)
+            ends[0::2] = (keys >> np.uint64(2)) & vertex_mask | vertex_top
+            ends[1::2] = keys & vertex_mask | vertex_top
+            return ends
+
+        # Lượt 1: đọc bảng theo thứ tự xuất hiện đầu tiên và gom khóa các đỉnh
+        vertex_keys: np.ndarray = np.empty(shape=0, dtype=np.uint64)
+        for start, end in chunks:
+            rows: np.ndarray = order[start:end]
+            edge_keys[start:end] = table.keys[rows]
+            multiplicities[start:end] = table.multiplicities[rows]
+            vertex_keys = np.union1d(vertex_keys, ends_of(start=start, end=end))
+
+        # Lượt 2: lần xuất hiện đầu tiên của mỗi đỉnh trong dãy các đầu mút, id đỉnh theo thứ tự đó
+        first: np.ndarray = np.full(shape=len(vertex_keys), fill_value=2 * n_edges, dtype=np.int64)
+        for start, end in chunks:
+            index, first_in_chunk = np.unique(np.searchsorted(vertex_keys, ends_of(start=start, end=end)), return_index=True)
+            first[index] = np.minimum(first[index], first_in_chunk + 2 * start)
+        vertex_order: np.ndarray = np.argsort(first)
+        rank: np.ndarray = np.empty(shape=len(vertex_order), dtype=np.int64)
+        rank[vertex_order] = np.arange(len(vertex_order))
+        del first
+
+        src: np.ndarray = np.empty(shape=n_edges, dtype=index_dtype(len(vertex_keys)))
+        dst: np.ndarray = np.empty(shape=n_edges, dtype=src.dtype)
+        for start, end in chunks:
+            vertex_ids: np.ndarray = rank[np.searchsorted(vertex_keys, ends_of(start=start, end=end))]
+            src[start:end] = vertex_ids[0::2]
+            dst[start:end] = vertex_ids[1::2]
+
+        return CompactGraph(k=k, vertex_keys=vertex_keys[vertex_order], edge_keys=edge_keys, src=src, dst=dst,
+                            multiplicities=multiplicities)
+
+
+    @staticmethod
+    def from_graph(graph) -> "CompactGraph":
+        """Chuyển đồ thị object (Graph) sang dạng mảng, thứ tự đỉnh và thứ tự cạnh kề của mỗi đỉnh được giữ nguyên
+
+        Args:
+            graph (Graph): Đồ thị object
+
+        Returns:
+            CompactGraph: Đồ thị dạng mảng
+        """
+
+        vertex_to_id: Dict = {vertex: i for i, vertex in enumerate(graph.vertex_list)}
+        edge_to_id: Dict = {}
+        for vertex in graph.vertex_list:
+            for edge in vertex.out_edges:
+                edge_to_id.setdefault(edge, len(edge_to_id))
+                for end in (edge.in_vertex, edge.out_vertex):
+                    vertex_to_id.setdefault(end, len(vertex_to_id))
+        edges: List = list(edge_to_id)
+
+        def key_array(keys: List[int]) -> np.ndarray:
+            if all(key < 2 ** 64 for key in keys):
+                return np.array(keys, dtype=np.uint64)
+            array: np.ndarray = np.empty(shape=len(keys), dtype=object)
+            array[:] = keys
+            return array
+
+        compact: CompactGraph = CompactGraph(k=graph.k, vertex_keys=key_array([vertex.key for vertex in vertex_to_id]),
+                                             edge_keys=key_array([edge.key for edge in edges]),
+                                             src=np.array([vertex_to_id[edge.in_vertex] for edge in edges], dtype=np.int64),
+                                             dst=np.array([vertex_to_id[edge.out_vertex] for edge in edges], dtype=np.int64),
+                                             multiplicities=np.array([edge.multiplicities for edge in edges], dtype=np.int64))
+
+        # Thứ tự cạnh vào của mỗi đỉnh theo đúng Vertex.in_edges
+        in_edges: List[int] = [edge_to_id[edge] for vertex in vertex_to_id for edge in vertex.in_edges if edge in edge_to_id]
+        if len(in_edges) == len(edges):
+            compact.in_edges = np.array(in_edges, dtype=compact.in_edges.dtype)
+
+        return compact
+
+
+    @property
+    def n_vertices(self) -> int:
+        return len(self.vertex_keys)
+
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.edge_keys)
+
+
+    def out_of(self, vertex: int) -> np.ndarray:
+        """Các cạnh đi ra từ đỉnh
+        """
+
+        return self.out_edges[self.out_offsets[vertex]:self.out_offsets[vertex + 1]]
+
+
+    def in_of(self, vertex: int) -> np.ndarray:
+        """Các cạnh đi vào đỉnh
+        """
+
+        return self.in_edges[self.in_offsets[vertex]:self.in_offsets[vertex + 1]]
+
+
+    def degrees(self) -> np.ndarray:
+        """Độ chênh lệch bậc ra và bậc vào (có tính bội) của mọi đỉnh, như Vertex.compute_degree
+
+        Returns:
+            np.ndarray: Mảng độ chênh lệch
+        """
+
+        out_degree: np.ndarray = np.bincount(self.src, weights=self.multiplicities, minlength=self.n_vertices)
+        in_degree: np.ndarray = np.bincount(self.dst, weights=self.multiplicities, minlength=self.n_vertices)
+
+        return (out_degree - in_degree).astype(np.int64)
+
+
+    def out_degrees(self) -> np.ndarray:
+        """Bậc ra (có tính bội) của mọi đỉnh, như Vertex.compute_out_degree
+        """
+
+        return np.bincount(self.src, weights=self.multiplicities, minlength=self.n_vertices).astype(np.int64)
+
+
+    def is_eulerian(self) -> bool:
+        """Kiểm tra đồ thị có phải là đồ thị Euler hay không (cùng điều kiện với Assembler.is_eulerian)
+
+        Returns:
+            bool: Nếu là đồ thị Euler trả về True, nếu không là False
+        """
+
+        degrees: np.ndarray = self.degrees()
+        unbalanced: np.ndarray = degrees[degrees != 0]
+        if np.any(np.abs(unbalanced) >= 2):
+            return False
+
+        if len(unbalanced) != 2 or int(unbalanced[0] * unbalanced[-1]) != -1:
+            return False
+
+        # Đồ thị cân bằng bậc nhưng có nhiều thành phần liên thông yếu thì không có đường đi Euler
+        return int(self.components().max()) == 0
+
+
+    def sequence(self, edge: int) -> str:
+        """Chuỗi đại diện cho cạnh
+        """
+
+        return key_to_sequence(int(self.edge_keys[edge]))
+
+
+    def vertex_sequence(self, vertex: int) -> str:
+        """Chuỗi đại diện cho đỉnh
+        """
+
+        return key_to_sequence(int(self.vertex_keys[vertex]))
+
+
+    def find_eulerian_path(self) -> str:
+        """Tìm đường đi Euler từ đỉnh có bậc ra lớn hơn bậc vào tới đỉnh có bậc vào lớn hơn bậc ra
+        bằng thuật toán Hierholzer, duyệt các cạnh theo cùng thứ tự như Assembler.hierholzer
+
+        Returns:
+            str: Chuỗi được ghép từ đường đi
+        """
+
+        if not self.is_eulerian():
+            raise ValueError("Đồ thị không có đường đi Euler (không cân bằng bậc hoặc có nhiều thành phần liên thông), hãy dùng find_contigs")
+        degrees: np.ndarray = self.degrees()
+        start_vertex: int = int(np.flatnonzero(degrees == 1)[-1])
+        end_vertex: int = int(np.flatnonzero(degrees == -1)[-1])
+
+        out_offsets: List[int] = self.out_offsets.tolist()
+        out_edges: List[int] = self.out_edges.tolist()
+        dst: List[int] = self.dst.tolist()
+        multiplicities: List[int] = self.multiplicities.tolist()
+        visited: List[int] = [0] * self.n_edges
+        # Vị trí cạnh ra tiếp theo cần xét của mỗi đỉnh trong out_edges
+        next_out: List[int] = out_offsets[:-1]
+
+        stack: List[Tuple[int, int]] = [(start_vertex, -1)]
+        path: List[int] = []
+        while len(stack) > 0:
+            vertex, in_edge = stack[-1]
+            i: int = next_out[vertex]
+            end: int = out_offsets[vertex + 1]
+            while i < end and visited[out_edges[i]] >= multiplicities[out_edges[i]]:
+                i += 1
+            next_out[vertex] = i
+            if i < end:
+                edge: int = out_edges[i]
+                visited[edge] += 1
+                stack.append((dst[edge], edge))
+            else:
+                stack.pop()
+                if in_edge != -1:
+                    path.append(in_edge)
+        path.reverse()
+        self.visited[:] = visited
+
+        # Đường đi phải đi qua tất cả các cạnh và kết thúc tại đỉnh kết thúc
+        if len(path) != sum(multiplicities) or dst[path[-1]] != end_vertex:
+            raise RuntimeError("Đường đi Euler chỉ đi qua {}/{} cạnh".format(len(path), sum(multiplicities)))
+
+        return self.spell(path=path)
+
+
+    def components(self) -> np.ndarray:
+        """Gán nhãn thành phần liên thông yếu cho mọi đỉnh bằng BFS trên cả cạnh ra và cạnh vào
+
+        Returns:
+            np.ndarray: Nhãn thành phần của mỗi đỉnh (đánh số theo đỉnh nhỏ nhất), -1 với đỉnh không có cạnh
+        """
+
+        out_offsets: List[int] = self.out_offsets.tolist()
+        in_offsets: List[int] = self.in_offsets.tolist()
+        out_edges: List[int] = self.out_edges.tolist()
+        in_edges: List[int] = self.in_edges.tolist()
+        src: List[int] = self.src.tolist()
+        dst: List[int] = self.dst.tolist()
+        labels: List[int] = [-1] * self.n_vertices
+        n_components: int = 0
+        for root in range(self.n_vertices):
+            if labels[root] != -1 or out_offsets[root] == out_offsets[root + 1] and in_offsets[root] == in_offsets[root + 1]:
+                continue
+            labels[root] = n_components
+            queue: List[int] = [root]
+            while len(queue) > 0:
+                vertex: int = queue.pop()
+                neighbors: List[int] = [dst[e] for e in out_edges[out_offsets[vertex]:out_offsets[vertex + 1]]]
+                neighbors += [src[e] for e in in_edges[in_offsets[vertex]:in_offsets[vertex + 1]]]
+                for other in neighbors:
+                    if labels[other] == -1:
+                        labels[other] = n_components
+                        queue.append(other)
+            n_components += 1
+
+        return np.array(labels, dtype=np.int64)
+
+
+    def contig_paths(self) -> List[List[int]]:
+        """Phủ các cạnh (tính cả bội) của đồ thị bằng ít đường đi không chung cạnh nhất, dùng được cả khi đồ thị
+        không phải đồ thị Euler hoặc có nhiều thành phần liên thông. Trong mỗi thành phần, mỗi đỉnh thừa cạnh vào được nối
+        bằng một cạnh giả tới một đỉnh thừa cạnh ra để mọi đỉnh cân bằng, sau đó một chu trình Euler (Hierholzer) được cắt
+        tại các cạnh giả. Số đường đi của một thành phần là tổng độ chênh lệch dương (ít nhất 1), tổng thời gian O(E)
+
+        Returns:
+            List[List[int]]: Các đường đi (dãy id cạnh), theo thứ tự thành phần
+        """
+
+        n_edges: int = self.n_edges
+        labels: np.ndarray = self.components()
+        n_components: int = int(labels.max()) + 1 if len(labels) > 0 else 0
+        degrees: np.ndarray = self.degrees()
+
+        # Cạnh giả đi từ đỉnh thừa cạnh vào tới đỉnh thừa cạnh ra trong cùng thành phần, mỗi đơn vị chênh lệch một cạnh
+        sources: np.ndarray = np.repeat(np.arange(self.n_vertices), np.maximum(degrees, 0))
+        sinks: np.ndarray = np.repeat(np.arange(self.n_vertices), np.maximum(-degrees, 0))
+        sources = sources[np.argsort(labels[sources], kind="stable")]
+        sinks = sinks[np.argsort(labels[sinks], kind="stable")]
+        assert len(sources) == len(sinks)
+
+        src: np.ndarray = np.concatenate([self.src, sinks]).astype(np.int64)
+        dst: List[int] = np.concatenate([self.dst, sources]).astype(np.int64).tolist()
+        multiplicities: List[int] = self.multiplicities.tolist() + [1] * len(sources)
+        out_offsets, out_edges = build_csr(vertices=src, n_vertices=self.n_vertices)
+        out_offsets = out_offsets.tolist()
+        out_edges = out_edges.tolist()
+        visited: List[int] = [0] * len(multiplicities)
+        next_out: List[int] = out_offsets[:-1]
+
+        # Đỉnh bắt đầu của mỗi thành phần: đỉnh thừa cạnh ra đầu tiên, nếu không có thì đỉnh đầu tiên có cạnh ra
+        starts: List[int] = [-1] * n_components
+        for vertex in sources.tolist():
+            if starts[labels[vertex]] == -1:
+                starts[labels[vertex]] = vertex
+        for vertex in np.flatnonzero(self.out_offsets[1:] > self.out_offsets[:-1]).tolist():
+            if starts[labels[vertex]] == -1:
+                starts[labels[vertex]] = vertex
+
+        paths: List[List[int]] = []
+        for start_vertex in starts:
+            if start_vertex == -1:
+                continue
+            # Chu trình Euler của thành phần
+            stack: List[Tuple[int, int]] = [(start_vertex, -1)]
+            circuit: List[int] = []
+            while len(stack) > 0:
+                vertex, in_edge = stack[-1]
+                i: int = next_out[vertex]
+                end: int = out_offsets[vertex + 1]
+                while i < end and visited[out_edges[i]] >= multiplicities[out_edges[i]]:
+                    i += 1
+                next_out[vertex] = i
+                if i < end:
+                    edge: int = out_edges[i]
+                    visited[edge] += 1
+                    stack.append((dst[edge], edge))
+                else:
+                    stack.pop()
+                    if in_edge != -1:
+                        circuit.append(in_edge)
+            circuit.reverse()
+
+            # Xoay chu trình để bắt đầu ngay sau một cạnh giả rồi cắt tại các cạnh giả
+            cuts: List[int] = [j for j, edge in enumerate(circuit) if edge >= n_edges]
+            if len(cuts) > 0:
+                circuit = circuit[cuts[-1] + 1:] + circuit[:cuts[-1] + 1]
+            path: List[int] = []
+            for edge in circuit:
+                if edge >= n_edges:
+                    paths.append(path)
+                    path = []
+                else:
+                    path.append(edge)
+            if len(path) > 0:
+                paths.append(path)
+        self.visited[:] = visited[:n_edges]
+
+        return [path for path in paths if len(path) > 0]
+
+
+    def find_contigs(self) -> List[str]:
+        """Các contig được ghép từ contig_paths
+
+        Returns:
+            List[str]: Các contig
+        """
+
+        return [self.spell(path=path) for path in self.contig_paths()]
+
+
+    def spell(self, path: List[int]) -> str:
+        """Ghép chuỗi từ một đường đi gồm các cạnh
+
+        Args:
+            path (List[int]): Các cạnh theo thứ tự
+
+        Returns:
+            str: Chuỗi được ghép
+        """
+
+        return "".join([self.sequence(path[0])] + [self.sequence(edge)[self.k - 1:] for edge in path[1:]])
+
+
+    def nbytes(self) -> int:
+        """Tổng số byte của các mảng
+        """
+
+        return sum(array.nbytes for array in (self.vertex_keys, self.edge_keys, self.src, self.dst, self.multiplicities,
+                                              self.visited, self.out_offsets, self.out_edges, self.in_offsets, self.in_edges))
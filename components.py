@@ -0,0 +1,154 @@
+import multiprocessing
+from typing import List, Dict, Tuple, Optional, Any
+import numpy as np
+from store import ReadStore
+from kmer import kmer_key_array
+from graph import Graph
+from assembly import Assembler
+from instrument import Profiler, NULL_PROFILER
+
+
+class ComponentResult(object):
+    """
+    Kết quả ghép của một thành phần liên thông yếu của đồ thị
+    """
+
+    def __init__(self, read_ids: List[int], is_eulerian: bool, contigs: List[str], n_paths: Optional[int]) -> None:
+        """
+
+        Args:
+            read_ids (List[int]): id (trong kho read ban đầu) của các read thuộc thành phần
+            is_eulerian (bool): Thành phần có phải đồ thị Euler sau make_superpath hay không
+            contigs (List[str]): Chuỗi được ghép từ đường đi Euler nếu có, nếu không thì các contig
+            n_paths (int, optional): Số đường đi Euler, None nếu không phải đồ thị Euler hoặc không được tính
+        """
+
+        self.read_ids: List[int] = read_ids
+        self.is_eulerian: bool = is_eulerian
+        self.contigs: List[str] = contigs
+        self.n_paths: Optional[int] = n_paths
+
+
+def find_root(parent: List[int], v: int) -> int:
+    """Gốc của tập chứa v trong union-find, nén đường đi theo kiểu chia đôi
+    """
+
+    while parent[v] != v:
+        parent[v] = parent[parent[v]]
+        v = parent[v]
+
+    return v
+
+
+def split_store(store: ReadStore, k: int) -> List[List[int]]:
+    """Chia các read theo thành phần liên thông yếu của đồ thị de Bruijn mà không cần dựng đồ thị: mỗi k-mer của read là một
+    cạnh nối hai đỉnh (k-1)-mer đầu và cuối của nó, hai read cùng thành phần khi và chỉ khi chúng nối được với nhau qua
+    các read có chung đỉnh. Các read có chung một đỉnh được nối bằng union-find sau khi sắp xếp các khóa đỉnh
+
+    Args:
+        store (ReadStore): Kho chứa các read
+        k (int): Độ dài k-mer
+
+    Returns:
+        List[List[int]]: id của các read trong mỗi thành phần, các thành phần theo thứ tự read nhỏ nhất.
+            Read không có k-mer nào (ngắn hơn k) không thuộc thành phần nào
+    """
+
+    vertex_keys: List[np.ndarray] = []
+    read_ids: List[np.ndarray] = []
+    has_kmer: List[bool] = []
+    for read_id in range(len(store)):
+        _, keys = kmer_key_array(codes=store.codes(read_id), k=k)
+        # Khóa có bit đánh dấu độ dài ở vị trí 2k nên dịch phải 2 bit cho ngay khóa của (k-1)-mer đầu,
+        # khóa của (k-1)-mer cuối là 2(k-1) bit thấp cộng bit đánh dấu mới
+        typed: Any = int if keys.dtype == object else np.uint64
+        marker: Any = typed(1 << (2 * (k - 1)))
+        vertex_keys.append(keys >> typed(2))
+        vertex_keys.append((keys & (marker - typed(1))) | marker)
+        read_ids.append(np.full(shape=2 * len(keys), fill_value=read_id, dtype=np.int64))
+        has_kmer.append(len(keys) > 0)
+
+    parent: List[int] = list(range(len(store)))
+    if len(vertex_keys) > 0:
+        all_keys: np.ndarray = np.concatenate(vertex_keys)
+        all_read_ids: np.ndarray = np.concatenate(read_ids)
+        order: np.ndarray = np.argsort(all_keys, kind="stable")
+        all_keys = all_keys[order]
+        all_read_ids = all_read_ids[order]
+        linked: np.ndarray = np.flatnonzero((all_keys[1:] == all_keys[:-1]) & (all_read_ids[1:] != all_read_ids[:-1]))
+        for a, b in zip(all_read_ids[linked].tolist(), all_read_ids[linked + 1].tolist()):
+            a = find_root(parent=parent, v=a)
+            b = find_root(parent=parent, v=b)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+    groups: Dict[int, List[int]] = {}
+    for read_id in range(len(store)):
+        if has_kmer[read_id]:
+            groups.setdefault(find_root(parent=parent, v=read_id), []).append(read_id)
+
+    return sorted(groups.values(), key=lambda ids: ids[0])
+
+
+def _assemble_component(args: Tuple[ReadStore, List[int], int, bool, bool]) -> ComponentResult:
+    """Dựng và ghép đồ thị của một thành phần trong tiến trình con
+    """
+
+    store, read_ids, k, simplify, count_paths = args
+    assembler: Assembler = Assembler.from_graph(graph=Graph(seqs=store, k=k, threshold=0), simplify=simplify)
+    assembler.make_superpath()
+    is_eulerian: bool = assembler.is_eulerian()
+    if is_eulerian:
+        contigs: List[str] = [assembler.find_eulerian_path()]
+        n_paths: Optional[int] = assembler.graph.get_numbers_eulerian_path() if count_paths else None
+    else:
+        contigs = assembler.find_contigs()
+        n_paths = None
+
+    return ComponentResult(read_ids=read_ids, is_eulerian=is_eulerian, contigs=contigs, n_paths=n_paths)
+
+
+def assemble_components(store: ReadStore, k: int, workers: int=1, simplify: bool=False, count_paths: bool=True,
+                        profiler: Optional[Profiler]=None) -> List[ComponentResult]:
+    """Ghép từng thành phần liên thông yếu một cách độc lập (dựng đồ thị, make_superpath, kiểm tra Euler, tìm đường đi
+    hoặc contig, đếm số đường đi) trên một pool tiến trình. Các thành phần được tìm thẳng từ các read (split_store) nên
+    đồ thị của toàn bộ dữ liệu không bao giờ được dựng; mỗi thành phần được gửi đi dưới dạng ReadStore nén 2 bit
+    chỉ gồm các read của nó và đồ thị được dựng trong tiến trình con
+
+    Args:
+        store (ReadStore): Kho chứa các read (đã sửa lỗi, đã cùng chiều nếu cần)
+        k (int): Độ dài k-mer
+        workers (int, optional): Số tiến trình. Defaults to 1.
+        simplify (bool, optional): Cắt tip và gỡ bong bóng trước khi gộp cạnh. Defaults to False.
+        count_paths (bool, optional): Có đếm số đường đi Euler của các thành phần Euler hay không. Defaults to True.
+        profiler (Profiler, optional): Đo thời gian, bộ nhớ của việc chia và ghép các thành phần trong tiến trình chính
+            (các tiến trình con không được đo riêng). Defaults to None.
+
+    Returns:
+        List[ComponentResult]: Kết quả của các thành phần, theo thứ tự read nhỏ nhất
+    """
+
+    if profiler is None:
+        profiler = NULL_PROFILER
+    tasks: List[Tuple[ReadStore, List[int], int, bool, bool]] = []
+    with profiler.stage("split_components"):
+        for read_ids in split_store(store=store, k=k):
+            component: ReadStore = ReadStore.from_sequences(seqs=(store.sequence(r) for r in read_ids))
+            tasks.append((component, read_ids, k, simplify, count_paths))
+            profiler.maximum("largest_component_reads", len(read_ids))
+    profiler.record("components", len(tasks))
+
+    with profiler.stage("assemble_components"):
+        if workers > 1 and len(tasks) > 1:
+            # Thành phần lớn được gửi trước để các tiến trình kết thúc gần cùng lúc, kết quả được xếp lại theo thứ tự ban đầu
+            order: List[int] = sorted(range(len(tasks)), key=lambda i: -len(tasks[i][1]))
+            with multiprocessing.Pool(processes=workers) as pool:
+                done: List[ComponentResult] = pool.map(_assemble_component, [tasks[i] for i in order], chunksize=1)
+            results: List[Optional[ComponentResult]] = [None] * len(tasks)
+            for i, result in zip(order, done):
+                results[i] = result
+        else:
+            results = [_assemble_component(task) for task in tasks]
+    profiler.record("eulerian_components", sum(result.is_eulerian for result in results))
+
+    return results
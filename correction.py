@@ -0,0 +1,185 @@
+from typing import List, Tuple, Optional
+import numpy as np
+from store import ReadStore, BASES, INVALID_CODE
+from kmer import kmer_key_array
+
+
+def count_all_kmers(store: ReadStore, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Đếm số lần xuất hiện của mọi k-mer trong tất cả các read (không xét đoạn trùng giữa các read)
+
+    Args:
+        store (ReadStore): Kho chứa các read
+        k (int): Độ dài k-mer
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Các khóa k-mer khác nhau (tăng dần) và số lần xuất hiện tương ứng
+    """
+
+    keys: List[np.ndarray] = [kmer_key_array(codes=store.codes(n), k=k)[1] for n in range(len(store))]
+    if len(keys) == 0:
+        return kmer_key_array(codes=np.empty(shape=0, dtype=np.uint8), k=k)[1], np.empty(shape=0, dtype=np.int64)
+
+    return np.unique(np.concatenate(keys), return_counts=True)
+
+
+def abundance_histogram(counts: np.ndarray) -> np.ndarray:
+    """Phổ k-mer: histogram[c] là số k-mer khác nhau xuất hiện đúng c lần
+
+    Args:
+        counts (np.ndarray): Số lần xuất hiện của mỗi k-mer
+
+    Returns:
+        np.ndarray: Histogram
+    """
+
+    return np.bincount(counts, minlength=2)
+
+
+def solid_cutoff(histogram: np.ndarray) -> int:
+    """Chọn ngưỡng tự động tại điểm trũng đầu tiên của phổ k-mer, giữa đỉnh các k-mer lỗi (số lần thấp) và đỉnh độ phủ
+
+    Args:
+        histogram (np.ndarray): Phổ k-mer (abundance_histogram)
+
+    Returns:
+        int: Số lần xuất hiện nhỏ nhất của một k-mer tốt, 1 nếu phổ không có điểm trũng (giữ lại tất cả)
+    """
+
+    c: int = 1
+    while c + 1 < len(histogram) and histogram[c + 1] <= histogram[c]:
+        c += 1
+    if c + 1 >= len(histogram):
+        return 1
+
+    return c
+
+
+class KmerSpectrum(object):
+    """
+    Bảng số lần xuất hiện của các k-mer, tra cứu theo lô bằng tìm kiếm nhị phân trên mảng khóa đã sắp xếp
+    """
+
+    def __init__(self, store: ReadStore, k: int, threshold: int = 0) -> None:
+        """
+
+        Args:
+            store (ReadStore): Kho chứa các read
+            k (int): Độ dài k-mer
+            threshold (int, optional): Số lần xuất hiện nhỏ nhất của k-mer tốt, nhỏ hơn 1 thì chọn tự động từ phổ. Defaults to 0.
+        """
+
+        self.k: int = k
+        self.keys, self.counts = count_all_kmers(store=store, k=k)
+        self.histogram: np.ndarray = abundance_histogram(counts=self.counts)
+        self.cutoff: int = threshold if threshold >= 1 else solid_cutoff(histogram=self.histogram)
+
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Số lần xuất hiện của các khóa, 0 nếu khóa không có trong bảng
+
+        Args:
+            keys (np.ndarray): Các khóa k-mer
+
+        Returns:
+            np.ndarray: Số lần xuất hiện
+        """
+
+        if len(self.keys) == 0 or len(keys) == 0:
+            return np.zeros(shape=len(keys), dtype=np.int64)
+        index: np.ndarray = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+
+        return np.where(self.keys[index] == keys, self.counts[index], 0)
+
+
+    def is_solid(self, keys: np.ndarray) -> np.ndarray:
+        """Các khóa có số lần xuất hiện đạt ngưỡng
+        """
+
+        return self.lookup(keys=keys) >= self.cutoff
+
+
+    def correct(self, codes: np.ndarray) -> Optional[np.ndarray]:
+        """Sửa read bằng cách thay đúng một nucleotide sao cho mọi k-mer của read đều là k-mer tốt
+
+        Args:
+            codes (np.ndarray): Các mã 2 bit của read
+
+        Returns:
+            Optional[np.ndarray]: Mã của read (đã sửa nếu cần), None nếu không sửa được
+        """
+
+        k: int = self.k
+        positions, keys = kmer_key_array(codes=codes, k=k)
+        weak: np.ndarray = positions[~self.is_solid(keys=keys)]
+        if len(weak) == 0:
+            return codes
+
+        # Nucleotide bị lỗi phải nằm trong mọi k-mer yếu
+        low: int = int(weak.max())
+        high: int = int(weak.min()) + k
+        best: Optional[Tuple[int, int, int]] = None
+        for j in range(low, min(high, len(codes))):
+            if codes[j] == INVALID_CODE:
+                continue
+            start: int = max(0, j - k + 1)
+            window: np.ndarray = codes[start:min(len(codes), j + k)].copy()
+            for base in range(4):
+                if base == codes[j]:
+                    continue
+                window[j - start] = base
+                _, candidate = kmer_key_array(codes=window, k=k)
+                found: np.ndarray = self.lookup(keys=candidate)
+                if len(found) > 0 and found.min() >= self.cutoff:
+                    # Ưu tiên cách sửa mà k-mer yếu nhất sau khi sửa có số lần xuất hiện lớn nhất
+                    if best is None or int(found.min()) > best[0]:
+                        best = (int(found.min()), j, base)
+        if best is None:
+            return None
+
+        corrected: np.ndarray = codes.copy()
+        corrected[best[1]] = best[2]
+
+        return corrected
+
+
+def correct_store(store: ReadStore, k: int, threshold: int = 0, drop: bool = False) -> Tuple[ReadStore, int, int, int]:
+    """Sửa lỗi theo phổ k-mer trước khi dựng đồ thị: các read có k-mer yếu được sửa một nucleotide,
+    read không sửa được thì được giữ nguyên (hoặc bị bỏ nếu drop=True). Các read ở hai đầu bộ gen có ít
+    k-mer được phủ nên thường không sửa được, bỏ chúng sẽ làm mất hai đầu của contig
+
+    Args:
+        store (ReadStore): Kho chứa các read
+        k (int): Độ dài k-mer
+        threshold (int, optional): Ngưỡng k-mer tốt, nhỏ hơn 1 thì chọn tự động. Defaults to 0.
+        drop (bool, optional): Bỏ các read không sửa được. Defaults to False.
+
+    Returns:
+        Tuple[ReadStore, int, int, int]: Kho read mới, ngưỡng được dùng, số read được sửa và số read không sửa được
+            (bị bỏ nếu drop=True, giữ nguyên nếu không)
+    """
+
+    spectrum: KmerSpectrum = KmerSpectrum(store=store, k=k, threshold=threshold)
+    corrected_store: ReadStore = ReadStore()
+    num_corrected: int = 0
+    num_uncorrectable: int = 0
+
+    def corrected_reads():
+        nonlocal num_corrected, num_uncorrectable
+        for n in range(len(store)):
+            codes: np.ndarray = store.codes(n)
+            corrected: Optional[np.ndarray] = spectrum.correct(codes=codes)
+            if corrected is None:
+                num_uncorrectable += 1
+                if drop:
+                    continue
+                corrected = codes
+            seq: str = store.sequence(n)
+            if corrected is not codes:
+                num_corrected += 1
+                j: int = int(np.flatnonzero(corrected != codes)[0])
+                seq = seq[:j] + chr(BASES[corrected[j]]) + seq[j + 1:]
+            yield seq
+
+    corrected_store.extend(seqs=corrected_reads())
+
+    return corrected_store, spectrum.cutoff, num_corrected, num_uncorrectable
@@ -0,0 +1,274 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from typing import Callable, List, Dict, Tuple, Optional
+import numpy as np
+from store import ReadStore
+from kmer import kmer_key_array
+from overlap import OverlapIntervals
+
+
+# Quan hệ chồng lên nhau của một read: (id read kia, vị trí bắt đầu, vị trí kết thúc) như Read.front_of / Read.behind_of
+Overlaps = Dict[int, List[Tuple[int, int, int]]]
+
+# Các lần xuất hiện của k-mer: (khóa, id read, vị trí trong read)
+Occurrences = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# Trạng thái dùng chung trong mỗi tiến trình con, được gán một lần bởi _init_worker
+_store: Optional[ReadStore] = None
+_k: int = 0
+_n_shards: int = 1
+_intervals: Optional[OverlapIntervals] = None
+
+
+def _init_worker(store: ReadStore, k: int, n_shards: int, front_of: Overlaps, behind_of: Overlaps) -> None:
+    global _store, _k, _n_shards, _intervals
+    _store = store
+    _k = k
+    _n_shards = n_shards
+    _intervals = OverlapIntervals(front_of=front_of, behind_of=behind_of)
+
+
+def _empty_keys(k: int) -> np.ndarray:
+    return np.empty(shape=0, dtype=np.uint64 if k <= 31 else object)
+
+
+_MASK64: int = (1 << 64) - 1
+
+
+def mix64(keys: np.ndarray) -> np.ndarray:
+    """Hàm trộn splitmix64 trên các khóa: các bit thấp của khóa chỉ phụ thuộc vào vài nucleotide cuối của k-mer
+    nên lấy thẳng khóa % n_shards dễ làm lệch các shard; khóa của k > 31 (mảng object) chỉ giữ 64 bit thấp
+
+    Args:
+        keys (np.ndarray): Các khóa k-mer
+
+    Returns:
+        np.ndarray: Giá trị đã trộn (uint64)
+    """
+
+    if keys.dtype == object:
+        keys = (keys & _MASK64).astype(np.uint64)
+    z: np.ndarray = keys.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+
+    return z ^ (z >> np.uint64(31))
+
+
+def shard_of(keys: np.ndarray, n_shards: int) -> np.ndarray:
+    """Shard của mỗi khóa (theo giá trị đã trộn bởi mix64), mọi lần xuất hiện của cùng một k-mer luôn thuộc cùng một shard
+
+    Args:
+        keys (np.ndarray): Các khóa k-mer
+        n_shards (int): Số shard
+
+    Returns:
+        np.ndarray: Chỉ số shard của mỗi khóa
+    """
+
+    return (mix64(keys=keys) % np.uint64(n_shards)).astype(np.int64)
+
+
+def _extract_chunk(read_range: Tuple[int, int]) -> List[Occurrences]:
+    """Tìm tất cả k-mer của các read trong đoạn [start, end) và chia chúng theo shard
+    """
+
+    start, end = read_range
+    keys: List[np.ndarray] = [_empty_keys(_k)]
+    read_ids: List[np.ndarray] = [np.empty(shape=0, dtype=np.int64)]
+    positions: List[np.ndarray] = [np.empty(shape=0, dtype=np.int64)]
+    for read_id in range(start, end):
+        pos, key = kmer_key_array(codes=_store.codes(read_id), k=_k)
+        keys.append(key)
+        read_ids.append(np.full(shape=len(pos), fill_value=read_id, dtype=np.int64))
+        positions.append(pos)
+
+    all_keys: np.ndarray = np.concatenate(keys)
+    all_read_ids: np.ndarray = np.concatenate(read_ids)
+    all_positions: np.ndarray = np.concatenate(positions)
+    shards: np.ndarray = shard_of(keys=all_keys, n_shards=_n_shards)
+
+    return [(all_keys[shards == s], all_read_ids[shards == s], all_positions[shards == s]) for s in range(_n_shards)]
+
+
+def count_occurrences(keys: np.ndarray, read_ids: np.ndarray, positions: np.ndarray, k: int,
+                      intervals: OverlapIntervals) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Tính bội của từng k-mer từ các lần xuất hiện của nó, lần xuất hiện nằm trong đoạn trùng với một read đã xét
+    thì không làm tăng bội. Các lần xuất hiện phải được sắp xếp theo (id read, vị trí)
+
+    Args:
+        keys (np.ndarray): Khóa của các lần xuất hiện
+        read_ids (np.ndarray): Id read của các lần xuất hiện
+        positions (np.ndarray): Vị trí trong read của các lần xuất hiện
+        k (int): Độ dài k-mer
+        intervals (OverlapIntervals): Các đoạn trùng giữa các read
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Khóa (tăng dần), bội, id read và vị trí của lần xuất hiện đầu tiên
+    """
+
+    if len(keys) == 0:
+        return keys, read_ids, read_ids, positions
+
+    # Sắp xếp theo (khóa, id read, vị trí), các lần xuất hiện đã theo thứ tự nên chỉ cần sắp xếp ổn định theo khóa
+    order: np.ndarray = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    read_ids = read_ids[order].tolist()
+    positions = positions[order].tolist()
+
+    bounds: List[int] = np.flatnonzero(keys[1:] != keys[:-1]).tolist()
+    starts: List[int] = [0] + [b + 1 for b in bounds]
+    ends: List[int] = starts[1:] + [len(keys)]
+
+    multiplicities: List[int] = []
+    for start, end in zip(starts, ends):
+        multiplicity: int = 1
+        if end - start > 1:
+            seen: Dict[int, List[int]] = {read_ids[start]: [positions[start]]}
+            for j in range(start + 1, end):
+                read_id: int = read_ids[j]
+                if not intervals.is_covered(read=read_id, i=positions[j], length=k, positions=seen):
+                    multiplicity += 1
+                seen.setdefault(read_id, []).append(positions[j])
+        multiplicities.append(multiplicity)
+
+    return (keys[starts], np.array(multiplicities, dtype=np.int64),
+            np.array([read_ids[j] for j in starts], dtype=np.int64), np.array([positions[j] for j in starts], dtype=np.int64))
+
+
+def _count_shard(parts: List[Occurrences]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Gộp các lần xuất hiện của một shard từ mọi đoạn read và tính bội của từng k-mer
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Khóa, bội, id read và vị trí của lần xuất hiện đầu tiên
+    """
+
+    return count_occurrences(keys=np.concatenate([part[0] for part in parts]),
+                             read_ids=np.concatenate([part[1] for part in parts]),
+                             positions=np.concatenate([part[2] for part in parts]), k=_k, intervals=_intervals)
+
+
+def _spill_path(dirname: str, shard: int, chunk: int, column: str) -> str:
+    return os.path.join(dirname, "shard{}_chunk{}_{}.npy".format(shard, chunk, column))
+
+
+_SPILL_COLUMNS: Tuple[str, ...] = ("keys", "read_ids", "positions")
+
+
+def _spill_chunk(args: Tuple[int, Tuple[int, int], str]) -> None:
+    """Tìm k-mer của một đoạn read (như _extract_chunk) và ghi các lần xuất hiện của từng shard ra các file .npy
+    trong dirname thay vì gửi về tiến trình chính
+    """
+
+    chunk, read_range, dirname = args
+    for shard, part in enumerate(_extract_chunk(read_range)):
+        for column, array in zip(_SPILL_COLUMNS, part):
+            np.save(_spill_path(dirname=dirname, shard=shard, chunk=chunk, column=column), array)
+
+
+def _count_spilled_shard(args: Tuple[int, int, str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Đọc các lần xuất hiện của một shard do _spill_chunk ghi (theo thứ tự đoạn read) và tính bội của từng k-mer
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Khóa, bội, id read và vị trí của lần xuất hiện đầu tiên
+    """
+
+    shard, n_chunks, dirname = args
+    parts: List[Occurrences] = []
+    for chunk in range(n_chunks):
+        paths: List[str] = [_spill_path(dirname=dirname, shard=shard, chunk=chunk, column=column) for column in _SPILL_COLUMNS]
+        # Khóa với k > 31 là mảng object nên cần allow_pickle
+        parts.append(tuple(np.load(path, allow_pickle=True) for path in paths))
+        for path in paths:
+            os.remove(path)
+
+    return _count_shard(parts)
+
+
+def _count_spilled(run: Callable, chunks: List[Tuple[int, int]], n_shards: int) -> List[Tuple[np.ndarray, ...]]:
+    """Đếm k-mer mà không gửi các lần xuất hiện qua tiến trình chính: mỗi đoạn read được tìm k-mer một lần và
+    chia theo shard ra các file tạm, sau đó mỗi shard đọc các file của nó và chỉ gửi về bảng đã đếm
+
+    Args:
+        run (Callable): Hàm map (Pool.map hoặc map tuần tự)
+        chunks (List[Tuple[int, int]]): Các đoạn read
+        n_shards (int): Số shard
+
+    Returns:
+        List[Tuple[np.ndarray, ...]]: Bảng đã đếm của từng shard
+    """
+
+    dirname: str = tempfile.mkdtemp(prefix="kmer-shards-")
+    try:
+        run(_spill_chunk, [(c, chunk, dirname) for c, chunk in enumerate(chunks)])
+        return run(_count_spilled_shard, [(s, len(chunks), dirname) for s in range(n_shards)])
+    finally:
+        shutil.rmtree(dirname, ignore_errors=True)
+
+
+def count_kmers(store: ReadStore, k: int, workers: int, front_of: Overlaps, behind_of: Overlaps,
+                n_shards: Optional[int]=None, keep_occurrences: bool=True) -> Tuple[Tuple[np.ndarray, ...], Optional[Occurrences]]:
+    """Đếm k-mer song song: mỗi tiến trình tìm k-mer của một đoạn read rồi chia theo shard (shard_of),
+    sau đó mỗi shard được gộp và tính bội độc lập vì không có k-mer nào thuộc hai shard. Chỉ bước đếm chạy song song,
+    các lần xuất hiện (nếu keep_occurrences) được gửi về tiến trình chính để gắn vào đồ thị
+
+    Args:
+        store (ReadStore): Kho chứa các read
+        k (int): Độ dài k-mer
+        workers (int): Số tiến trình
+        front_of (Overlaps): Read.front_of của mỗi read theo id
+        behind_of (Overlaps): Read.behind_of của mỗi read theo id
+        n_shards (int, optional): Số shard. Defaults to workers.
+        keep_occurrences (bool, optional): Có trả về tất cả các lần xuất hiện hay không. Nếu False thì các lần xuất hiện
+            của từng shard được ghi ra file tạm và chỉ bảng đã đếm được gửi về, các lần xuất hiện không đi qua tiến trình chính. Defaults to True.
+
+    Returns:
+        Tuple[Tuple[np.ndarray, ...], Optional[Occurrences]]: Bảng k-mer (khóa, bội, id read và vị trí xuất hiện đầu tiên) sắp xếp theo lần xuất hiện đầu tiên,
+        và tất cả các lần xuất hiện sắp xếp theo (id read, vị trí), None nếu keep_occurrences là False
+    """
+
+    workers = max(1, workers)
+    n_shards = n_shards or workers
+    n_reads: int = len(store)
+    n_chunks: int = max(1, min(n_reads, 4 * workers))
+    bounds: List[int] = [n_reads * c // n_chunks for c in range(n_chunks + 1)]
+    chunks: List[Tuple[int, int]] = [(bounds[c], bounds[c + 1]) for c in range(n_chunks)]
+
+    init_args = (store, k, n_shards, front_of, behind_of)
+    if workers > 1:
+        with multiprocessing.Pool(processes=workers, initializer=_init_worker, initargs=init_args) as pool:
+            if keep_occurrences:
+                extracted: List[List[Occurrences]] = pool.map(_extract_chunk, chunks)
+                shards: List[List[Occurrences]] = [[chunk[s] for chunk in extracted] for s in range(n_shards)]
+                del extracted
+                counted = pool.map(_count_shard, shards)
+            else:
+                counted = _count_spilled(run=pool.map, chunks=chunks, n_shards=n_shards)
+    else:
+        # Chạy ngay trong tiến trình hiện tại
+        _init_worker(*init_args)
+        if keep_occurrences:
+            extracted = list(map(_extract_chunk, chunks))
+            shards = [[chunk[s] for chunk in extracted] for s in range(n_shards)]
+            del extracted
+            counted = list(map(_count_shard, shards))
+        else:
+            counted = _count_spilled(run=lambda function, args: list(map(function, args)), chunks=chunks, n_shards=n_shards)
+
+    # Bảng k-mer theo thứ tự xuất hiện đầu tiên, đúng thứ tự các cạnh được tạo khi dựng đồ thị tuần tự
+    table: List[np.ndarray] = [np.concatenate([c[j] for c in counted]) for j in range(4)]
+    order: np.ndarray = np.lexsort((table[3], table[2]))
+    table = [column[order] for column in table]
+
+    if not keep_occurrences:
+        return tuple(table), None
+
+    # Tất cả các lần xuất hiện theo (id read, vị trí)
+    keys: np.ndarray = np.concatenate([part[0] for shard in shards for part in shard])
+    read_ids: np.ndarray = np.concatenate([part[1] for shard in shards for part in shard])
+    positions: np.ndarray = np.concatenate([part[2] for shard in shards for part in shard])
+    order = np.lexsort((positions, read_ids))
+
+    return tuple(table), (keys[order], read_ids[order], positions[order])
@@ -0,0 +1,116 @@
+from typing import List, Dict, Iterable, Optional
+from kmer import sequence_to_key
+from graph import Vertex, Edge, Graph
+
+
+# Kích thước bộ đệm khi ghi file (byte)
+BUFFER_SIZE: int = 1 << 20
+
+# Độ dài một dòng chuỗi trong file FASTA
+FASTA_LINE_WIDTH: int = 80
+
+
+def write_fasta(contigs: Iterable[str], filename: str, prefix: str="contig", line_width: int=FASTA_LINE_WIDTH) -> int:
+    """Ghi các contig ra file FASTA, từng contig một qua file có bộ đệm nên contigs có thể là generator
+
+    Args:
+        contigs (Iterable[str]): Các contig
+        filename (str): File cần ghi
+        prefix (str, optional): Tiền tố tên của mỗi contig. Defaults to "contig".
+        line_width (int, optional): Số ký tự mỗi dòng chuỗi, nhỏ hơn 1 thì không xuống dòng. Defaults to FASTA_LINE_WIDTH.
+
+    Returns:
+        int: Số contig đã ghi
+    """
+
+    n: int = 0
+    with open(file=filename, mode="w", buffering=BUFFER_SIZE) as f:
+        for contig in contigs:
+            f.write(">{}_{} length={}\n".format(prefix, n, len(contig)))
+            if line_width < 1:
+                f.write(contig + "\n")
+            else:
+                for i in range(0, len(contig), line_width):
+                    f.write(contig[i:i + line_width] + "\n")
+            n += 1
+
+    return n
+
+
+def segment_name(i: int) -> str:
+    """Tên segment GFA của cạnh thứ i trong edge_list
+    """
+
+    return "e{}".format(i)
+
+
+def write_gfa(graph: Graph, filename: str) -> None:
+    """Ghi đồ thị (sau khi dựng hoặc sau make_superpath) ra file GFA1: mỗi cạnh là một segment (S) với tag bội MU:i
+    và số lần xuất hiện trong các read KC:i, mỗi cặp cạnh nối tiếp qua một đỉnh là một link (L) với đoạn trùng (k-1)M.
+    Độ dài k được ghi trong header (KM:i). Các dòng được ghi từng cạnh một qua file có bộ đệm
+
+    Args:
+        graph (Graph): Đồ thị
+        filename (str): File cần ghi
+    """
+
+    names: Dict[Edge, str] = {edge: segment_name(i) for i, edge in enumerate(graph.edge_list)}
+    overlap: str = "{}M".format(graph.k - 1)
+    with open(file=filename, mode="w", buffering=BUFFER_SIZE) as f:
+        f.write("H\tVN:Z:1.0\tKM:i:{}\n".format(graph.k))
+        for edge in graph.edge_list:
+            f.write("S\t{}\t{}\tMU:i:{}\tKC:i:{}\n".format(names[edge], edge.sequence, edge.multiplicities, edge.coverage))
+        # Link từ mỗi cạnh tới các cạnh đi ra từ đỉnh cuối của nó
+        for edge in graph.edge_list:
+            for out_edge in edge.out_vertex.out_edges:
+                if out_edge in names:
+                    f.write("L\t{}\t+\t{}\t+\t{}\n".format(names[edge], names[out_edge], overlap))
+
+
+def read_tags(fields: List[str]) -> Dict[str, str]:
+    """Các tag dạng TAG:TYPE:VALUE của một dòng GFA
+    """
+
+    tags: Dict[str, str] = {}
+    for field in fields:
+        parts: List[str] = field.split(":", 2)
+        if len(parts) == 3:
+            tags[parts[0]] = parts[2]
+
+    return tags
+
+
+def read_gfa(filename: str, k: Optional[int]=None) -> Graph:
+    """Dựng lại đồ thị từ file GFA do write_gfa ghi: mỗi segment là một cạnh nối đỉnh (k-1)-mer đầu tới đỉnh (k-1)-mer cuối
+    của chuỗi, bội lấy từ tag MU:i (mặc định 1). Các link suy ra được từ đoạn trùng k-1 nên được bỏ qua.
+    Đồ thị đọc được không có read, đủ để kiểm tra Euler, tìm đường đi Euler, contig và đếm số đường đi
+
+    Args:
+        filename (str): File GFA
+        k (int, optional): Độ dài k-mer, None thì lấy từ tag KM:i của header. Defaults to None.
+
+    Returns:
+        Graph: Đồ thị
+    """
+
+    graph: Graph = Graph.empty(k=k if k is not None else 0)
+
+    with open(file=filename, mode="r", buffering=BUFFER_SIZE) as f:
+        for line in f:
+            fields: List[str] = line.rstrip("\r\n").split("\t")
+            if fields[0] == "H" and k is None:
+                graph.k = int(read_tags(fields=fields[1:]).get("KM", 0))
+            elif fields[0] == "S":
+                if graph.k == 0:
+                    raise ValueError("Header của {} không có KM:i, hãy truyền k".format(filename))
+                sequence: str = fields[2]
+                if len(sequence) < graph.k:
+                    raise ValueError("Segment {} ngắn hơn k".format(fields[1]))
+                prefix: int = sequence_to_key(sequence[:graph.k - 1])
+                suffix: int = sequence_to_key(sequence[len(sequence) - graph.k + 1:])
+                p_vertex: Vertex = graph.vertex_dict[prefix] if prefix in graph.vertex_dict else graph.new_vertex(key=prefix)
+                s_vertex: Vertex = graph.vertex_dict[suffix] if suffix in graph.vertex_dict else graph.new_vertex(key=suffix)
+                edge: Edge = graph.new_edge(in_vertex=p_vertex, out_vertex=s_vertex, key=sequence_to_key(sequence))
+                edge.multiplicities = int(read_tags(fields=fields[3:]).get("MU", 1))
+
+    return graph
@@ -1,26 +1,54 @@
 import copy
+import logging
+import heapq
 import math
-from typing import List, Dict, Optional, Tuple, Any, OrderedDict
+from typing import List, Dict, Optional, Tuple, Any, Iterable, Union, Set
 from loader import Loader
+from store import ReadStore
+from kmer import key_length, key_to_sequence, concat_keys, concat_path_keys, kmer_keys
+from overlap import OverlapIndex, OverlapIntervals, suffix_prefix_overlap
+from counting import count_kmers
+from best import exact_determinant, log_abs_determinant
+from correction import correct_store
+from orientation import orient_reads
+from instrument import Profiler, NULL_PROFILER
 #from vertex import Vertex
 #from edge import Edge
 #from read import Read
 import numpy as np
 
 
+logger: logging.Logger = logging.getLogger(__name__)
+
+
 class Vertex(object):
     
     
-    def __init__(self, sequence: str) -> None:
+    def __init__(self, key: int, graph: Optional["Graph"] = None) -> None:
         """
 
         Args:
-            sequence (str): Chuỗi đánh dấu đỉnh
+            key (int): Khóa số nguyên (mã 2 bit) của chuỗi đánh dấu đỉnh
+            graph (Graph, optional): Đồ thị chứa đỉnh, được báo mỗi khi đỉnh thay đổi độ cân bằng. Defaults to None.
         """
         
-        self.sequence: str = sequence
+        self.key: int = key
+        self.graph: Optional[Graph] = graph
         self.in_edges: List[Edge] = []
         self.out_edges: List[Edge] = []
+        self.in_degree: int = 0 # Tổng bội các cạnh trong in_edges
+        self.out_degree: int = 0 # Tổng bội các cạnh trong out_edges
+    
+    
+    @property
+    def sequence(self) -> str:
+        """Chuỗi đánh dấu đỉnh, chỉ được giải mã từ khóa khi cần
+
+        Returns:
+            str: Chuỗi đánh dấu đỉnh
+        """
+        
+        return key_to_sequence(self.key)
     
     
     def __getitem__(self, n: int) -> str:
@@ -43,7 +71,7 @@ class Vertex(object):
             int: Độ dài của chuỗi đại diện cho đỉnh
         """
         
-        return len(self.sequence)
+        return key_length(self.key)
     
     
     def __str__(self) -> str:
@@ -65,7 +93,53 @@ class Vertex(object):
         """    
         
         self.out_edges.append(edge)
+        edge.linked_from = True
+        self.change_degree(out_delta=edge.multiplicities, in_delta=0)
         out_vertex.in_edges.append(edge)
+        edge.linked_to = True
+        out_vertex.change_degree(out_delta=0, in_delta=edge.multiplicities)
+        
+        
+    def remove_out_edge(self, edge) -> None:
+        """Bỏ một cạnh khỏi danh sách các cạnh đi ra của đỉnh hiện tại
+
+        Args:
+            edge (Edge): Cạnh cần bỏ
+        """
+        
+        if edge.linked_from:
+            self.out_edges.remove(edge)
+            edge.linked_from = False
+            self.change_degree(out_delta=-edge.multiplicities, in_delta=0)
+        
+        
+    def remove_in_edge(self, edge) -> None:
+        """Bỏ một cạnh khỏi danh sách các cạnh đi vào của đỉnh hiện tại
+
+        Args:
+            edge (Edge): Cạnh cần bỏ
+        """
+        
+        if edge.linked_to:
+            self.in_edges.remove(edge)
+            edge.linked_to = False
+            self.change_degree(out_delta=0, in_delta=-edge.multiplicities)
+        
+        
+    def change_degree(self, out_delta: int, in_delta: int) -> None:
+        """Cập nhật bậc ra, bậc vào và báo cho đồ thị nếu độ cân bằng của đỉnh thay đổi
+
+        Args:
+            out_delta (int): Lượng thay đổi của bậc ra
+            in_delta (int): Lượng thay đổi của bậc vào
+        """
+        
+        old_diff: int = self.out_degree - self.in_degree
+        self.out_degree += out_delta
+        self.in_degree += in_delta
+        new_diff: int = self.out_degree - self.in_degree
+        if new_diff != old_diff and self.graph is not None:
+            self.graph.update_balance(vertex=self, diff=new_diff)
         
         
     def compute_degree(self) -> int:
@@ -74,14 +148,8 @@ class Vertex(object):
         Returns:
             int: Độ chênh lệch bậc ra và bậc vào của đỉnh
         """
-        in_degree: int = 0
-        for in_edge in self.in_edges:
-            in_degree += in_edge.multiplicities
-        out_degree: int = 0
-        for out_edge in self.out_edges:
-            out_degree += out_edge.multiplicities
         
-        return out_degree - in_degree
+        return self.out_degree - self.in_degree
     
     
     def compute_out_degree(self) -> int:
@@ -90,34 +158,82 @@ class Vertex(object):
         Returns:
             int: Bậc ra của đỉnh
         """
-        out_degree: int = 0
-        for out_edge in self.out_edges:
-            out_degree += out_edge.multiplicities
             
-        return out_degree
+        return self.out_degree
 
         
 class Edge(object):
     
     
-    def __init__(self, in_vertex: Vertex, out_vertex: Vertex, sequence: str) -> None:
+    def __init__(self, in_vertex: Vertex, out_vertex: Vertex, key: int) -> None:
         """
 
         Args:
             in_vertex (Vertex): Đỉnh bắt đầu cạnh hiện tại
             out_vertex (Vertex): Đỉnh kết thúc cạnh hiện tại
-            sequence (str): Chuỗi đại diện cho cạnh hiện tại
+            key (int): Khóa số nguyên (mã 2 bit) của chuỗi đại diện cho cạnh hiện tại
         """
         
-        self.sequence: str = sequence
+        self.key: int = key
         self.in_vertex: Vertex = in_vertex
         self.out_vertex: Vertex = out_vertex
-        self.reads: List[Read] = []
+        self.reads: Dict[Read, None] = {} # Các read chứa cạnh, theo thứ tự được thêm vào
         self.position_in_read: Dict[Read, List[int]] = {}
-        self.multiplicities: int = 1
+        self._multiplicities: int = 1
         self.visited: int = 0
+        self.linked_from: bool = False # Cạnh có nằm trong in_vertex.out_edges hay không
+        self.linked_to: bool = False # Cạnh có nằm trong out_vertex.in_edges hay không
         
     
+    @property
+    def multiplicities(self) -> int:
+        """Bội của cạnh
+        """
+        
+        return self._multiplicities
+    
+    
+    @multiplicities.setter
+    def multiplicities(self, value: int) -> None:
+        """Thay đổi bội của cạnh, đồng thời cập nhật bậc của hai đỉnh đầu mút
+        """
+        
+        delta: int = value - self._multiplicities
+        self._multiplicities = value
+        if delta != 0:
+            if self.linked_from:
+                self.in_vertex.change_degree(out_delta=delta, in_delta=0)
+            if self.linked_to:
+                self.out_vertex.change_degree(out_delta=0, in_delta=delta)
+        
+    
+    @property
+    def coverage(self) -> int:
+        """Số lần cạnh xuất hiện trong tất cả các read (không loại các đoạn trùng như bội)
+        """
+        
+        return sum(len(positions) for positions in self.position_in_read.values())
+    
+    
+    @property
+    def removed(self) -> bool:
+        """Cạnh đã bị gỡ khỏi cả hai đỉnh đầu mút (bị gộp), chỉ bị xóa khỏi edge_list khi Graph.clean được gọi
+        """
+        
+        return not self.linked_from and not self.linked_to
+    
+    
+    @property
+    def sequence(self) -> str:
+        """Chuỗi đại diện cho cạnh, chỉ được giải mã từ khóa khi cần
+
+        Returns:
+            str: Chuỗi đại diện cho cạnh
+        """
+        
+        return key_to_sequence(self.key)
+    
+    
     def __getitem__(self, n: int) -> str:
         """Lấy ký tự thứ n trong chuỗi đại diện cho cạnh
 
@@ -137,7 +253,7 @@ class Edge(object):
         Returns:
             int: Độ dài của chuỗi đại diện cho cạnh
         """
-        return len(self.sequence)
+        return key_length(self.key)
     
     
     def __str__(self) -> str:
@@ -151,24 +267,37 @@ class Edge(object):
     
 class Read(object):
     
-    def __init__(self, sequence: str, read_id: int) -> None:
+    def __init__(self, store: ReadStore, read_id: int, pair_index: Optional[Dict[Tuple[Edge, Edge], Dict[Any, List[int]]]] = None, strand: int = 1) -> None:
         """
 
         Args:
-            sequence (str): Chuỗi đại diện cho read
-            read_id (int): id của read
+            store (ReadStore): Kho chứa chuỗi đã nén của các read
+            read_id (int): id của read, cũng là vị trí của read trong store
+            pair_index (Dict, optional): Chỉ mục cặp cạnh liền kề của đồ thị (Graph.pair_index), được cập nhật cùng đường đi của read. Defaults to None.
+            strand (int, optional): Chiều của read trong store so với read trong file, -1 nếu đã được đảo thành chuỗi bổ sung ngược. Defaults to 1.
         """
-        self.sequence: str = sequence
+        self.store: ReadStore = store
         self.read_id: int = read_id
-        self.edges: List[Edge] = []
-        self.position_to_edge: OrderedDict[int, Edge] = OrderedDict()
-        self.edge_to_positions: Dict[Edge, List[int]] = {}
+        self.strand: int = strand
+        # Đường đi của read là một danh sách liên kết trên mảng: ô s giữ cạnh slot_edge[s] bắt đầu tại vị trí slot_position[s],
+        # các ô chỉ bị thay cạnh hoặc bị bỏ ra khỏi danh sách nên thay cặp (x, y) bằng z chỉ mất O(1)
+        self.slot_position: List[int] = []
+        self.slot_edge: List[Optional[Edge]] = []
+        self.next_slot: List[int] = [] # Ô liền sau, -1 nếu là ô cuối
+        self.prev_slot: List[int] = [] # Ô liền trước, -1 nếu là ô đầu
+        self.position_to_slot: Dict[int, int] = {}
+        self.head: int = -1 # Ô đầu tiên của đường đi
+        self.tail: int = -1 # Ô cuối cùng của đường đi
+        # Các ô bắt đầu một đoạn mới: k-mer liền trước bị bỏ qua (có ký tự không hợp lệ) hoặc cạnh liền trước bị gỡ
+        # (Graph.remove_edge), ô này không liền kề với ô liền trước nên cặp cạnh qua chỗ cắt không được đưa vào pair_index
+        self.breaks: Set[int] = set()
+        self.pair_index: Dict[Tuple[Edge, Edge], Dict[Any, List[int]]] = pair_index if pair_index is not None else {}
         self.front_of: Dict[Any, Tuple[int, int]] = {}
         self.behind_of: Dict[Any, Tuple[int, int]] = {}
         
         
     def __getitem__(self, n: int) -> Edge:
-        """Lấy cạnh thứ n trong danh sách các cạnh của read hiện tại
+        """Lấy cạnh thứ n trong đường đi của read hiện tại
 
         Args:
             n (int): Vị trí của cạnh cần được lấy
@@ -179,13 +308,42 @@ class Read(object):
         return self.edges[n]
     
     
+    @property
+    def edges(self) -> List[Edge]:
+        """Các cạnh theo thứ tự trên đường đi của read
+        
+        Returns:
+            List[Edge]: Danh sách các cạnh
+        """
+        return [edge for _, edge in self.path()]
+    
+    
+    @property
+    def sequence(self) -> str:
+        """Chuỗi đại diện cho Read, được giải mã từ store mỗi khi cần
+
+        Returns:
+            str: Chuỗi đại diện cho Read
+        """
+        return self.store.sequence(self.read_id)
+    
+    
+    def codes(self) -> np.ndarray:
+        """Các mã 2 bit của Read
+
+        Returns:
+            np.ndarray: Mảng uint8 các mã
+        """
+        return self.store.codes(self.read_id)
+    
+    
     def __len__(self) -> int:
         """Trả về độ dài của chuỗi đại diện cho Read
 
         Returns:
             int: Độ dài của chuỗi đại diện cho Read
         """
-        return len(self.sequence)
+        return self.store.length(self.read_id)
     
     
     def __str__(self) -> str:
@@ -197,8 +355,170 @@ class Read(object):
         return self.sequence
     
     
+    def path(self) -> Iterable[Tuple[int, Edge]]:
+        """Duyệt đường đi của read
+
+        Returns:
+            Iterable[Tuple[int, Edge]]: Vị trí bắt đầu và cạnh của từng bước trên đường đi
+        """
+        slot: int = self.head
+        while slot != -1:
+            yield self.slot_position[slot], self.slot_edge[slot]
+            slot = self.next_slot[slot]
+    
+    
+    def add_edge(self, position: int, edge: Edge) -> None:
+        """Nối cạnh edge (một k-mer, chưa được gộp) bắt đầu tại vị trí position vào cuối đường đi của read,
+        nếu k-mer liền trước không phải ở vị trí position - 1 thì đường đi bị cắt tại đây
+
+        Args:
+            position (int): Vị trí ký tự đầu tiên của cạnh trong read
+            edge (Edge): Cạnh
+        """
+        
+        slot: int = len(self.slot_edge)
+        if self.tail != -1 and self.slot_position[self.tail] != position - 1:
+            self.breaks.add(slot)
+        self.slot_position.append(position)
+        self.slot_edge.append(edge)
+        self.next_slot.append(-1)
+        self.prev_slot.append(self.tail)
+        self.position_to_slot[position] = slot
+        if self.tail == -1:
+            self.head = slot
+        else:
+            self.next_slot[self.tail] = slot
+        self.tail = slot
+        
+        self.attach(slot=slot)
+        self.index_pair(slot=slot)
+    
+    
+    def attach(self, slot: int) -> None:
+        """Ghi nhận vị trí của ô slot vào cạnh của nó (Edge.reads và Edge.position_in_read)
+        """
+        
+        edge: Edge = self.slot_edge[slot]
+        edge.reads[self] = None
+        edge.position_in_read.setdefault(self, []).append(self.slot_position[slot])
+    
+    
+    def detach(self, slot: int) -> None:
+        """Bỏ vị trí của ô slot khỏi cạnh của nó, read bị bỏ khỏi cạnh khi không còn vị trí nào
+        """
+        
+        edge: Edge = self.slot_edge[slot]
+        positions: List[int] = edge.position_in_read[self]
+        positions.remove(self.slot_position[slot])
+        if len(positions) == 0:
+            del edge.position_in_read[self]
+            del edge.reads[self]
+    
+    
+    def previous(self, slot: int) -> int:
+        """Ô liền kề trước ô slot, -1 nếu slot là ô đầu hoặc bắt đầu một đoạn mới sau chỗ cắt
+        """
+        
+        if slot in self.breaks:
+            return -1
+        
+        return self.prev_slot[slot]
+    
+    
+    def index_pair(self, slot: int) -> None:
+        """Thêm cặp cạnh (ô liền kề trước, ô slot) vào pair_index
+        """
+        
+        if slot == -1 or self.previous(slot) == -1:
+            return
+        pair: Tuple[Edge, Edge] = (self.slot_edge[self.prev_slot[slot]], self.slot_edge[slot])
+        self.pair_index.setdefault(pair, {}).setdefault(self, []).append(self.slot_position[slot])
+    
+    
+    def unindex_pair(self, slot: int) -> None:
+        """Bỏ cặp cạnh (ô liền kề trước, ô slot) khỏi pair_index
+        """
+        
+        if slot == -1 or self.previous(slot) == -1:
+            return
+        pair: Tuple[Edge, Edge] = (self.slot_edge[self.prev_slot[slot]], self.slot_edge[slot])
+        reads: Dict[Any, List[int]] = self.pair_index[pair]
+        reads[self].remove(self.slot_position[slot])
+        if len(reads[self]) == 0:
+            del reads[self]
+            if len(reads) == 0:
+                del self.pair_index[pair]
+    
+    
+    def replace_edge(self, slot: int, z: Edge) -> None:
+        """Thay cạnh của ô slot bằng z, chỉ hai cặp cạnh chứa ô này thay đổi
+        """
+        
+        after: int = self.next_slot[slot]
+        self.unindex_pair(slot=slot)
+        self.unindex_pair(slot=after)
+        self.detach(slot=slot)
+        self.slot_edge[slot] = z
+        self.attach(slot=slot)
+        self.index_pair(slot=slot)
+        self.index_pair(slot=after)
+    
+    
+    def remove_slot(self, slot: int, split: bool = False) -> None:
+        """Bỏ ô slot khỏi đường đi, hai ô hai bên trở thành liền kề (khi gộp cạnh) hoặc đường đi bị cắt tại đây (khi gỡ cạnh)
+
+        Args:
+            slot (int): Ô bị bỏ
+            split (bool, optional): Cắt đường đi, ô liền sau bắt đầu một đoạn mới. Defaults to False.
+        """
+        
+        before: int = self.prev_slot[slot]
+        after: int = self.next_slot[slot]
+        self.unindex_pair(slot=slot)
+        self.unindex_pair(slot=after)
+        self.detach(slot=slot)
+        
+        if before == -1:
+            self.head = after
+        else:
+            self.next_slot[before] = after
+        if after == -1:
+            self.tail = before
+        else:
+            self.prev_slot[after] = before
+        # Ô liền sau của một ô bắt đầu đoạn cũng bắt đầu đoạn
+        if split or slot in self.breaks:
+            self.breaks.discard(slot)
+            if before != -1 and after != -1:
+                self.breaks.add(after)
+        self.slot_edge[slot] = None
+        del self.position_to_slot[self.slot_position[slot]]
+        
+        self.index_pair(slot=after)
+    
+    
+    def segment_tails(self) -> List[int]:
+        """Ô cuối của từng đoạn của đường đi (các đoạn được ngăn bởi chỗ cắt)
+        """
+        
+        if self.tail == -1:
+            return []
+        
+        return [self.prev_slot[slot] for slot in sorted(self.breaks)] + [self.tail]
+    
+    
+    def segment_heads(self) -> List[int]:
+        """Ô đầu của từng đoạn của đường đi (các đoạn được ngăn bởi chỗ cắt)
+        """
+        
+        if self.head == -1:
+            return []
+        
+        return [self.head] + sorted(self.breaks)
+    
+    
     def change_x(self, x: Edge, z: Edge) -> bool:
-        """Thay đổi cạnh cuối cùng trong tập các cạnh thành cạnh mới z nếu x là cạnh cuối
+        """Thay đổi cạnh cuối cùng của đường đi (hoặc của một đoạn trước chỗ cắt) thành cạnh mới z nếu đó là x
 
         Args:
             x (Edge): Cạnh cũ ở cuối
@@ -208,46 +528,17 @@ class Read(object):
             bool: True nếu cạnh cũ được thay đổi, nếu không là False
         """
         
-        '''if self.edges[-1] == x:
-            self.edges[-1] = z
-            
-            # Thêm read hiện tại và tập các read của cạnh mới
-            z.reads.append(self)
-            
-            # Xóa read hiện tại từ cạnh cũ
-            if self in x.reads:
-                x.reads.remove(self)
-                
-            return True'''
-        pos_of_edges: List[int] = list(self.position_to_edge.keys())
-        if self.position_to_edge[pos_of_edges[-1]] == x:
-            self.position_to_edge[pos_of_edges[-1]] = z
-            
-            # Thay x bằng z
-            for i in range(len(self.edges)):
-                if self.edges[i] == x:
-                    self.edges[i] = z
-                    
-            
-            # Thêm read hiện tại và tập các read của cạnh mới
-            if self not in z.reads:
-                z.reads.append(self)
-            
-            self.add_edge_position(x=x, z=z, position=pos_of_edges[-1])
-            
-            if len(self.edge_to_positions[x]) == 0:
-                # Xóa read hiện tại từ cạnh cũ
-                del self.edge_to_positions[x]
-                if self in x.reads:
-                    x.reads.remove(self)
-            
-            return True
+        changed: bool = False
+        for slot in self.segment_tails():
+            if self.slot_edge[slot] is x:
+                self.replace_edge(slot=slot, z=z)
+                changed = True
         
-        return False
+        return changed
     
     
     def change_y(self, y: Edge, z: Edge) -> bool:
-        """Thay đổi cạnh đầu tiên trong tập các cạnh của read hiện tại thành cạnh mới z nếu cạnh đầu tiên là y
+        """Thay đổi cạnh đầu tiên của đường đi (hoặc của một đoạn sau chỗ cắt) thành cạnh mới z nếu đó là y
 
         Args:
             y (Edge): Cạnh cũ ở đầu
@@ -256,43 +547,14 @@ class Read(object):
         Returns:
             bool: True nếu cạnh cũ được thay đổi, nếu không là False
         """
-        '''if self.edges[0] == y:
-            self.edges[0] = z
-            
-            # Thêm read hiện tại và tập các read của cạnh mới
-            z.reads.append(self)
-            
-            # Xóa read hiện tại từ cạnh cũ
-            if self in y.reads:
-                y.reads.remove(self)
-                
-            return True'''
         
-        pos_of_edges: List[int] = list(self.position_to_edge.keys())
-        if self.position_to_edge[pos_of_edges[0]] == y:
-            self.position_to_edge[pos_of_edges[0]] = z
-            
-            # Thay y bằng z
-            for i in range(len(self.edges)):
-                if self.edges[i] == y:
-                    self.edges[i] = z
-            
-            # Thêm read hiện tại và tập các read của cạnh mới
-            if self not in z.reads:
-                z.reads.append(self)
-            
-            self.add_edge_position(x=y, z=z, position=pos_of_edges[0])
-            
-            if len(self.edge_to_positions[y]) == 0:
-                # Xóa read hiện tại từ cạnh cũ
-                del self.edge_to_positions[y]
-                if self in y.reads:
-                    y.reads.remove(self)
-                
-            return True     
-            
+        changed: bool = False
+        for slot in self.segment_heads():
+            if self.slot_edge[slot] is y:
+                self.replace_edge(slot=slot, z=z)
+                changed = True
         
-        return False
+        return changed
     
     
     def change_xy(self, x: Edge, y: Edge, z: Edge) -> bool:
@@ -309,67 +571,18 @@ class Read(object):
         """
         
         found_xy: bool = False
-        
-        '''# Xét từng cặp cạnh liền nhau có phải là cạnh x là cạnh đầu tiên, y là cạnh liền cạnh x hay không:
-        for i in range(len(self.edges)-1):
+        # Chỉ xét các vị trí của y, theo thứ tự trên đường đi; các cặp được thay lần lượt từ trái sang phải
+        for pos in self.get_consecutive_positions(x=x, y=y):
+            slot: int = self.position_to_slot[pos]
+            before: int = self.previous(slot)
+            # Với x == y, cặp liền trước có thể đã được thay ngay trong lần gọi này
+            if before == -1 or self.slot_edge[before] is not x or self.slot_edge[slot] is not y:
+                continue
+            found_xy = True
             
-            # Nếu tìm thấy x là cạnh liền trước, y là cạnh liền sau cạnh x
-            if self.edges[i] == x and self.edges[i+1] == y:
-                found_xy = True
-                
-                # Thêm cạnh z, xóa bỏ các cạnh x và cạnh y
-                self.edges[i] = z
-                self.edges[i+1] = None
-                
-                # Thêm read hiện tại vào danh sách các read của cạnh mới z
-                z.reads.append(self)
-                
-                # Xóa read hiện tại từ danh sách các read của các cạnh bị xóa x và y
-                if self in x.reads:
-                    x.reads.remove(self)
-                if self in y.reads:
-                    y.reads.remove(self)
-        
-        # Xóa tất cả các cạnh mà vị trí đó là None
-        self.edges = [e for e in self.edges if e != None]'''
-        pos_of_edges: List[int] = list(self.position_to_edge.keys())
-        for i in range(len(pos_of_edges)-1):
-            if self.position_to_edge[pos_of_edges[i]] == x and self.position_to_edge[pos_of_edges[i+1]] == y:
-                found_xy = True
-                
-                # Thêm cạnh z, xóa bỏ các cạnh x và cạnh y
-                self.position_to_edge[pos_of_edges[i]] = z
-                self.position_to_edge[pos_of_edges[i+1]] = None
-                
-                for j in range(len(self.edges)):
-                    if self.edges[j] == x:
-                        self.edges[j] = z
-                    if self.edges[j] == y:
-                        self.edges[j] = None
-                        
-                # Thêm read hiện tại vào danh sách các read của cạnh mới z
-                if self not in z.reads:
-                    z.reads.append(self)
-                
-                self.add_edge_position(x=x, z=z, position=pos_of_edges[i])
-                # Đối với y thì không thế vị trí z vào vị trí y hiện tại
-                self.add_edge_position(x=y, z=z, position=pos_of_edges[i+1], replace_pos=False)
-                
-                # Xóa read hiện tại từ danh sách các read của các cạnh bị xóa x và y
-                if len(self.edge_to_positions[x]) == 0:
-                    del self.edge_to_positions[x]
-                    if self in x.reads:
-                        x.reads.remove(self)
-                if len(self.edge_to_positions[y]) == 0:
-                    del self.edge_to_positions[y]
-                    if self in y.reads:
-                        y.reads.remove(self)
-                
-        # Xóa tất cả các cạnh mà vị trí đó là None
-        self.edges = [e for e in self.edges if e != None]
-        for pos in pos_of_edges:
-            if self.position_to_edge[pos] is None:
-                del self.position_to_edge[pos]        
+            # Ô của y bị bỏ, ô của x giữ vị trí và được thay bằng z
+            self.remove_slot(slot=slot)
+            self.replace_edge(slot=before, z=z)
         
         return found_xy
     
@@ -394,121 +607,197 @@ class Read(object):
     
     def check_consecutive_edges(self, x: Edge, y: Edge) -> bool:
         """
-        Kiểm tra xem hai cạnh x và y có phải là hai cạnh liền kề trong cùng một read này hay không
+        Kiểm tra xem cạnh y có nằm ngay sau cạnh x trong read này hay không, chỉ xét các vị trí của y
 
         Args:
-            x (Edge): Cạnh liền trước hoặc sau
-            y (Edge): Cạnh liền trước hoặc sau
+            x (Edge): Cạnh liền trước
+            y (Edge): Cạnh liền sau
 
         Returns:
             bool: Nếu hai cạnh x và y kề nhau
         """
         
-        found_xy: bool = False
-        
-        # Xét từng cặp cạnh liền nhau có phải là cạnh x là cạnh đầu tiên, y là cạnh liền cạnh x hoặc ngược lại hay không:
-        '''for i in range(len(self.edges)-1):
-            
-            if (self.edges[i] == x and self.edges[i+1] == y) or (self.edges[i] == y and self.edges[i+1] == x):
-                found_xy = True'''
-        pos_of_edges: List[int] = list(self.position_to_edge.keys())
-        for i in range(len(pos_of_edges)-1):
-            if (self.position_to_edge[pos_of_edges[i]] == x and self.position_to_edge[pos_of_edges[i+1]] == y):
-                found_xy = True
-        '''positions_x: List[int] = x.position_in_read[self]
-        positions_y: List[int] = y.position_in_read[self]
-        for pos_x in positions_x:
-            for pos_y in positions_y:
-                if abs(pos_x - pos_y) == 1:
-                    found_xy = True'''
+        for pos in y.position_in_read.get(self, ()):
+            before: int = self.previous(self.position_to_slot[pos])
+            if before != -1 and self.slot_edge[before] is x:
+                return True
                 
-        return found_xy
+        return False
     
     
     def get_consecutive_positions(self, x: Edge, y: Edge) -> List[int]:
+        """Các vị trí của y mà cạnh liền trước là x, theo thứ tự trên đường đi
+
+        Args:
+            x (Edge): Cạnh liền trước
+            y (Edge): Cạnh liền sau
+
+        Returns:
+            List[int]: Vị trí của y
+        """
+        
         consecutive_pos: List[int] = []
-        pos_of_edges: List[int] = list(self.position_to_edge.keys())
-        for i in range(len(pos_of_edges)-1):
-            if (self.position_to_edge[pos_of_edges[i]] == x and self.position_to_edge[pos_of_edges[i+1]] == y):
-                consecutive_pos.append(pos_of_edges[i+1])
+        for pos in y.position_in_read.get(self, ()):
+            before: int = self.previous(self.position_to_slot[pos])
+            if before != -1 and self.slot_edge[before] is x:
+                consecutive_pos.append(pos)
                 
-        return consecutive_pos
+        return sorted(consecutive_pos)
+                
+    
+    def pairs(self) -> Iterable[Tuple[Edge, Edge, int]]:
+        """Duyệt các cặp cạnh liền kề trong read, bỏ qua các chỗ cắt
+
+        Returns:
+            Iterable[Tuple[Edge, Edge, int]]: Cạnh trước, cạnh sau và vị trí của cạnh sau
+        """
+        slot: int = self.head
+        while slot != -1:
+            before: int = self.previous(slot)
+            if before != -1:
+                yield self.slot_edge[before], self.slot_edge[slot], self.slot_position[slot]
+            slot = self.next_slot[slot]
                 
     
     def get_edges_position(self) -> List[int]:
-        return self.position_to_edge.keys()
+        return [pos for pos, _ in self.path()]
     
+class Graph(object):
     
-    def add_edge_position(self, x: Edge, z: Edge, position: int, replace_pos: bool=True) -> None:
-        # Đối với y thì không thế vị trí z vào vị trí y hiện tại
-        if replace_pos:
-            if self not in z.position_in_read:
-                    z.position_in_read[self] = [position]
-            else:
-                z.position_in_read[self].append(position)
+    def __init__(self, seqs: Optional[Union[Loader, ReadStore, Iterable[str]]], k: int, threshold: int, error_correct: bool = False, workers: int = 1, canonical: bool = False,
+                 profiler: Optional[Profiler] = None) -> None:
+        """
 
-            if z not in self.edge_to_positions:
-                self.edge_to_positions[z] = [position]
-            else:
-                self.edge_to_positions[z].append(position)
+        Args:
+            seqs (Union[Loader, ReadStore, Iterable[str]]): Các reads đọc được trong loader, ReadStore hoặc generator Loader.stream
+            k (int): k-mers, số ký tự trong một chuỗi đại diện cho một cạnh
+            threshold (int): ngưỡng để sửa lỗi, số lần xuất hiện nhỏ nhất của một k-mer tốt (nhỏ hơn 1 thì chọn tự động từ phổ k-mer)
+            error_correct (bool, optional): Có sử lỗi hay không. Defaults to False.
+            workers (int, optional): Số tiến trình đếm k-mer, lớn hơn 1 thì đếm song song (tạo đỉnh, cạnh vẫn tuần tự). Defaults to 1.
+            canonical (bool, optional): Các read có thể đến từ cả hai mạch, đưa chúng về cùng một mạch theo k-mer chính tắc trước khi dựng đồ thị. Defaults to False.
+            profiler (Profiler, optional): Đo thời gian, bộ nhớ các giai đoạn và đếm các lần gộp. Defaults to None.
+        """
+        
+        self.init_empty(k=k, threshold=threshold, profiler=profiler)
+        
+        # Các read được nén trong ReadStore, dùng lại store của Loader nếu có
+        if isinstance(seqs, Loader):
+            seqs = seqs.reads
+        if not isinstance(seqs, ReadStore):
+            # seqs có thể là một generator nên chỉ duyệt một lần
+            seqs = ReadStore.from_sequences(seqs=seqs)
+        
+        # Sửa các read có k-mer yếu trước khi tạo đỉnh và cạnh
+        if error_correct:
+            with self.profiler.stage("error_correct"):
+                seqs, self.threshold, num_corrected, num_uncorrectable = correct_store(store=seqs, k=k, threshold=threshold)
+            self.profiler.record("reads_corrected", num_corrected)
+            self.profiler.record("reads_uncorrectable", num_uncorrectable)
+            logger.info("Sửa lỗi với ngưỡng %d: sửa %d read, %d read không sửa được", self.threshold, num_corrected, num_uncorrectable)
+        # Đảo các read thuộc mạch ngược để k-mer và chuỗi bổ sung ngược của nó đi vào cùng một cạnh
+        strands: np.ndarray = np.ones(shape=len(seqs), dtype=np.int8)
+        if canonical:
+            with self.profiler.stage("orient"):
+                seqs, strands, conflicts = orient_reads(store=seqs, k=k)
+            self.profiler.record("orientation_conflicts", len(conflicts))
+            logger.info("Đảo chiều %d read", int((strands == -1).sum()))
+            if len(conflicts) > 0:
+                logger.warning("%d cặp read có k-mer chung mâu thuẫn với chiều được chọn (đoạn lặp đảo ngược?)", len(conflicts))
+        self.seqs = seqs
+        
+        for s in range(len(seqs)):
+            # Tạo object Read
+            read: Read = Read(store=seqs, read_id=s, pair_index=self.pair_index, strand=int(strands[s]))
+            self.read_list.append(read)
             
-        self.edge_to_positions[x].remove(position)
-        x.position_in_read[self].remove(position)
+        with self.profiler.stage("align_read"):
+            self.align_read(min_length=k)
         
-        assert self.edge_to_positions[x] == x.position_in_read[self]
+        with self.profiler.stage("build"):
+            if workers > 1:
+                self.build_sharded(workers=workers)
+            else:
+                self.build_serial(read_list=self.read_list.copy())
+        self.profiler.record("reads", len(self.read_list))
+        self.profiler.record("built_vertices", len(self.vertex_list))
+        self.profiler.record("built_edges", len(self.edge_list))
+
+        # Chỉ duyệt các đỉnh khi bật mức DEBUG
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, vertex in enumerate(self.vertex_list):
+                logger.debug("%d %s %d %d", i, vertex, len(vertex.out_edges) - len(vertex.in_edges), vertex.compute_degree())
     
-class Graph(object):
     
-    def __init__(self, seqs: Optional[Loader], k: int, threshold: int, error_correct: bool = False) -> None:
-        """
+    def init_empty(self, k: int, threshold: int = 0, seqs: Optional[ReadStore] = None, profiler: Optional[Profiler] = None) -> None:
+        """Gán mọi thuộc tính của một đồ thị chưa có đỉnh, cạnh và read. Mọi thuộc tính mới của Graph được khai báo ở đây
+        để __init__ và các nơi dựng đồ thị không qua __init__ (Graph.empty) luôn có đủ thuộc tính
 
         Args:
-            seqs (Loader): Các reads đọc được trong loader
-            k (int): k-mers, số ký tự trong một chuỗi đại diện cho một cạnh
-            threshold (int): ngưỡng để sửa lỗi
-            error_correct (bool, optional): Có sử lỗi hay không. Defaults to False.
+            k (int): Độ dài k-mer
+            threshold (int, optional): Ngưỡng để sửa lỗi. Defaults to 0.
+            seqs (ReadStore, optional): Kho chứa các read, None thì dùng kho rỗng. Defaults to None.
+            profiler (Profiler, optional): Đo thời gian và đếm các lần gộp. Defaults to None.
         """
         
         self.vertex_list: List[Vertex] = [] # Danh sách các đỉnh trong đồ thị
-        self.vertex_dict: Dict[str, Vertex] = {} # Danh sách các đỉnh được đánh chỉ mục bởi chuỗi đại diện
+        self.vertex_dict: Dict[int, Vertex] = {} # Danh sách các đỉnh được đánh chỉ mục bởi khóa của chuỗi đại diện
         self.edge_list: List[Edge] = [] # Danh sách các cạnh trong đồ thị
-        self.edge_dict: Dict[str, Edge] = {} # Danh sách các cạnh trong đồ thị được chỉ mục bởi chuỗi đại diện
+        self.edge_dict: Dict[int, Edge] = {} # Danh sách các cạnh trong đồ thị được chỉ mục bởi khóa của chuỗi đại diện
         self.read_list: List[Read] = [] # Danh sách các reads trong đồ thị
         self.k: int = k # Độ dài chuỗi đại diện cho một cạnh
-        self.seqs: Optional[Loader] = seqs # Các read được đọc từ loader
+        self.unbalanced: Dict[Vertex, int] = {} # Các đỉnh có bậc ra khác bậc vào và độ chênh lệch của chúng
+        self.pair_index: Dict[Tuple[Edge, Edge], Dict[Read, List[int]]] = {} # Cặp cạnh liền kề (x, y) -> các read chứa cặp và vị trí của y
         self.threshold: int = threshold # Ngưỡng để sửa lỗi
+        self.overlap_intervals: Optional[OverlapIntervals] = None # Các đoạn trùng giữa các read, được tạo bởi align_read
+        self.overlap_index: Optional[OverlapIndex] = None # Chỉ mục seed của các read, được giữ lại để thêm read mới
+        self.profiler: Profiler = profiler if profiler is not None else NULL_PROFILER
+        self.seqs: ReadStore = seqs if seqs is not None else ReadStore() # Các read được đọc từ loader
+    
+    
+    @staticmethod
+    def empty(k: int, threshold: int = 0, seqs: Optional[ReadStore] = None, profiler: Optional[Profiler] = None) -> "Graph":
+        """Đồ thị rỗng không đi qua Graph.__init__ (không đọc read, không dựng đỉnh và cạnh), dùng khi đồ thị được dựng lại
+        từ checkpoint, từ file GFA hoặc từ một phần của đồ thị khác
+
+        Args:
+            k (int): Độ dài k-mer
+            threshold (int, optional): Ngưỡng để sửa lỗi. Defaults to 0.
+            seqs (ReadStore, optional): Kho chứa các read. Defaults to None.
+            profiler (Profiler, optional): Đo thời gian và đếm các lần gộp. Defaults to None.
+
+        Returns:
+            Graph: Đồ thị rỗng
+        """
         
+        graph: Graph = Graph.__new__(Graph)
+        graph.init_empty(k=k, threshold=threshold, seqs=seqs, profiler=profiler)
         
-        for s in range(len(seqs)):
-            # Lấy các read
-            seq: str = seqs[s]
-            # Tạo object Read
-            read: Read = Read(sequence=seq, read_id=s)
-            self.read_list.append(read)
-            
-        self.align_read(min_length=k)
-                    
-        read_list: List[Read] = self.read_list.copy()
+        return graph
+    
+    
+    def build_serial(self, read_list: List[Read]) -> None:
+        """Dựng các đỉnh và các cạnh bằng cách duyệt lần lượt từng read
+
+        Args:
+            read_list (List[Read]): Các read cần thêm vào đồ thị
+        """
+        
+        k: int = self.k
         for read in read_list:
-            seq: str = read.sequence
-            # Tạo các đỉnh và các cạnh
-            for i in range(len(seq)-k+1):
-                # Tạo k-mer
-                k_mer: str = seq[i:i+k]
-                prefix: str = k_mer[:k-1]
-                suffix: str = k_mer[1:]
+            # Tạo các đỉnh và các cạnh, các k-mer được mã hóa cuộn thành số nguyên thay vì cắt chuỗi con
+            for i, k_mer, prefix, suffix in kmer_keys(codes=read.codes(), k=k):
 
                 # Tạo đỉnh tiền tố
                 if prefix in self.vertex_dict:
                     p_vertex: Vertex = self.vertex_dict[prefix]
                 else:
-                    p_vertex: Vertex = self.new_vertex(sequence=prefix)
+                    p_vertex: Vertex = self.new_vertex(key=prefix)
 
                 # Tạo đỉnh hậu tố
                 if suffix in self.vertex_dict:
                     s_vertex: Vertex = self.vertex_dict[suffix]
                 else:
-                    s_vertex: Vertex = self.new_vertex(sequence=suffix)
+                    s_vertex: Vertex = self.new_vertex(key=suffix)
 
                 # Tạo cạnh
                 if k_mer in self.edge_dict:
@@ -516,89 +805,167 @@ class Graph(object):
                     # Kiểm tra xem edge này có nằm trong đoạn trùng của read hiện tại với một read khác hay không,
                     # Nếu có trùng thì bội giữ nguyên,
                     # còn không bội cộng thêm 1
-                    exist: bool = False
-                    overlap_reads = read.front_of
-                    for over_read in overlap_reads:
-                        pos: Tuple[int, int] = overlap_reads[over_read]
-                        if i >= pos[0]:
-                            if over_read in edge.position_in_read:
-                                position_in_overlap_read = edge.position_in_read[over_read]
-                                for position in position_in_overlap_read:
-                                    if position + len(edge.sequence) <= pos[1]:
-                                        exist = True
-                    
-                    overlap_reads = read.behind_of
-                    for over_read in overlap_reads:
-                        pos: Tuple[int, int] = overlap_reads[over_read]
-                        if i + len(edge.sequence) <= pos[1]:
-                            if over_read in edge.position_in_read:
-                                position_in_overlap_read = edge.position_in_read[over_read]
-                                for position in position_in_overlap_read:
-                                    if position >= pos[0]:
-                                        exist = True
-                                
+                    exist: bool = self.overlap_intervals.is_covered(read=read, i=i, length=len(edge), positions=edge.position_in_read)
                     if not exist:
                         edge.multiplicities += 1
                 else:
-                    edge: Edge = self.new_edge(in_vertex=p_vertex, out_vertex=s_vertex, sequence=k_mer)
-
-                # Thêm cạnh vào danh sách cạnh của read
-                if edge not in read.edges:
-                    read.edges.append(edge)
-                # Thêm read vào danh sách read của cạnh
-                if read not in edge.reads:
-                    edge.reads.append(read)
-                # Vị trí của ký tự đầu tiên của edge trong read
-                if read not in edge.position_in_read:
-                    edge.position_in_read[read] = [i]
-                else:
-                    edge.position_in_read[read].append(i)
-                if edge not in read.edge_to_positions:
-                    read.edge_to_positions[edge] = [i]
-                else:
-                    read.edge_to_positions[edge].append(i)
-                read.position_to_edge[i] = edge
-
-        for i, vertex in enumerate(self.vertex_list):
-            '''in_degree: int = 0
-            for in_edge in vertex.in_edges:
-                in_degree += in_edge.multiplicities
-            out_degree: int = 0
-            for out_edge in vertex.out_edges:
-                out_degree += out_edge.multiplicities'''
-            print(i, vertex, len(vertex.out_edges) - len(vertex.in_edges), vertex.compute_degree())
+                    edge: Edge = self.new_edge(in_vertex=p_vertex, out_vertex=s_vertex, key=k_mer)
+
+                self.add_occurrence(read=read, i=i, edge=edge)
+    
+    
+    def build_sharded(self, workers: int) -> None:
+        """Dựng các đỉnh và các cạnh từ bảng k-mer được đếm song song (counting.count_kmers),
+        kết quả giống hệt build_serial: cùng thứ tự đỉnh, cạnh, cùng bội và vị trí trong các read.
+        Chỉ bước đếm chạy song song: tạo đỉnh, cạnh và gắn các lần xuất hiện vào read (cũng như align_read) vẫn tuần tự
+        trong tiến trình chính vì các đối tượng Vertex, Edge, Read không chia sẻ được giữa các tiến trình
+
+        Args:
+            workers (int): Số tiến trình
+        """
+        
+        k: int = self.k
+        front_of, behind_of = self.overlaps_by_id()
+        with self.profiler.stage("count_kmers"):
+            table, occurrences = count_kmers(store=self.seqs, k=k, workers=workers, front_of=front_of, behind_of=behind_of)
+        
+        # Tạo các đỉnh và cạnh theo thứ tự xuất hiện đầu tiên của mỗi k-mer
+        vertex_top: int = 1 << (2 * (k - 1))
+        vertex_mask: int = vertex_top - 1
+        for k_mer, multiplicities in zip(table[0].tolist(), table[1].tolist()):
+            prefix: int = (k_mer >> 2) & vertex_mask | vertex_top
+            suffix: int = k_mer & vertex_mask | vertex_top
+            p_vertex: Vertex = self.vertex_dict[prefix] if prefix in self.vertex_dict else self.new_vertex(key=prefix)
+            s_vertex: Vertex = self.vertex_dict[suffix] if suffix in self.vertex_dict else self.new_vertex(key=suffix)
+            edge: Edge = self.new_edge(in_vertex=p_vertex, out_vertex=s_vertex, key=k_mer)
+            edge.multiplicities = multiplicities
+        
+        # Gắn các cạnh vào các read theo thứ tự (read, vị trí)
+        for k_mer, read_id, i in zip(*(column.tolist() for column in occurrences)):
+            self.add_occurrence(read=self.read_list[read_id], i=i, edge=self.edge_dict[k_mer])
+    
+    
+    def overlaps_by_id(self) -> Tuple[Dict[int, List[Tuple[int, int, int]]], Dict[int, List[Tuple[int, int, int]]]]:
+        """Read.front_of và Read.behind_of của mọi read theo id, dạng (id read kia, vị trí bắt đầu, vị trí kết thúc)
+        """
+        
+        front_of: Dict[int, List[Tuple[int, int, int]]] = {}
+        behind_of: Dict[int, List[Tuple[int, int, int]]] = {}
+        for read in self.read_list:
+            front_of[read.read_id] = [(r.read_id, pos[0], pos[1]) for r, pos in read.front_of.items()]
+            behind_of[read.read_id] = [(r.read_id, pos[0], pos[1]) for r, pos in read.behind_of.items()]
+        
+        return front_of, behind_of
+    
+    
+    def add_occurrence(self, read: Read, i: int, edge: Edge) -> None:
+        """Ghi nhận cạnh edge xuất hiện tại vị trí i của read
+
+        Args:
+            read (Read): Read chứa cạnh
+            i (int): Vị trí ký tự đầu tiên của cạnh trong read
+            edge (Edge): Cạnh
+        """
+        
+        # Read tự cập nhật Edge.reads, Edge.position_in_read và cặp cạnh liền kề trong pair_index
+        read.add_edge(position=i, edge=edge)
     
      
     @staticmethod
     def overlap(first_str: str, second_str: str, min_length: int=5) -> int:
-        pos: int = -1
-        for i in range(min_length, min(len(first_str), len(second_str)) + 1):
-            suff: str = first_str[-i:]
-            pref: str = second_str[:i]
-            if suff == pref:    
-                pos = i
+        """Độ dài đoạn trùng lớn nhất (>= min_length) giữa hậu tố của first_str và tiền tố của second_str
 
-        return pos
+        Returns:
+            int: Độ dài đoạn trùng, -1 nếu không có
+        """
+        
+        return suffix_prefix_overlap(first_str=first_str, second_str=second_str, min_length=min_length)
     
     
     def align_read(self, min_length: int) -> None:
-        read_list: List[Read] = self.read_list.copy()
-        while len(read_list) > 0:
-            first = read_list.pop(0)
-            the_rest = read_list.copy()
-            for second in the_rest:
-                first_pos: int = self.overlap(first_str=first.sequence, second_str=second.sequence, min_length=min_length)
-                second_pos: int = self.overlap(first_str=second.sequence, second_str=first.sequence, min_length=min_length)
-                
-                if first_pos != -1:
-                    first.front_of[second] = (len(first) - first_pos, first_pos)
-                    second.behind_of[first] = (len(first) - first_pos, first_pos)
-                    
-                if second_pos != -1:
-                    second.front_of[first] = (len(second) - second_pos, second_pos)
-                    first.behind_of[second] = (len(second) - second_pos, second_pos)
+        """Tìm các cặp read chồng lên nhau, chỉ kiểm tra các cặp có chung seed độ dài min_length
+
+        Args:
+            min_length (int): Độ dài đoạn trùng nhỏ nhất
+        """
+        
+        index: OverlapIndex = OverlapIndex(store=self.seqs, min_length=min_length)
+        self.overlap_index = index
+        for first in self.read_list:
+            for second_id, pos in index.overlaps(read_id=first.read_id):
+                second: Read = self.read_list[second_id]
+                first.front_of[second] = (len(first) - pos, pos)
+                second.behind_of[first] = (len(first) - pos, pos)
+        
+        # Các đoạn trùng được đánh chỉ mục theo read kia để mỗi lần kiểm tra là một lần tra dict và một lần tìm kiếm nhị phân
+        self.overlap_intervals = OverlapIntervals(
+            front_of={read: [(other, pos[0], pos[1]) for other, pos in read.front_of.items()] for read in self.read_list},
+            behind_of={read: [(other, pos[0], pos[1]) for other, pos in read.behind_of.items()] for read in self.read_list})
                     
                 
+    def add_reads(self, seqs: Union[Loader, ReadStore, Iterable[str]]) -> List[Read]:
+        """Thêm các read mới vào đồ thị đã dựng, chỉ các read mới được xử lý: đoạn trùng của chúng với mọi read,
+        đỉnh, cạnh, bội và đường đi được cập nhật như khi dựng lại toàn bộ đồ thị với các read mới nằm ở cuối.
+        Chỉ dùng trước khi gộp cạnh (simplify, make_superpath) vì các cạnh phải còn là k-mer
+
+        Args:
+            seqs (Union[Loader, ReadStore, Iterable[str]]): Các read mới
+
+        Returns:
+            List[Read]: Các object Read vừa được thêm
+        """
+        
+        if isinstance(seqs, Loader):
+            seqs = seqs.reads
+        start: int = len(self.seqs)
+        self.seqs.extend(seqs=seqs)
+        new_reads: List[Read] = [Read(store=self.seqs, read_id=s, pair_index=self.pair_index) for s in range(start, len(self.seqs))]
+        self.read_list.extend(new_reads)
+        
+        self.align_new_reads(new_reads=new_reads)
+        self.build_serial(read_list=new_reads)
+        
+        return new_reads
+    
+    
+    def align_new_reads(self, new_reads: List[Read]) -> None:
+        """Tìm các cặp read chồng lên nhau có ít nhất một read mới. Cặp (read mới, read bất kỳ) được tìm qua chỉ mục seed,
+        cặp (read cũ, read mới) được tìm qua cạnh có chuỗi là seed của read mới vì cạnh đó đã biết các read cũ chứa nó
+
+        Args:
+            new_reads (List[Read]): Các read mới, nằm ở cuối read_list
+        """
+        
+        k: int = self.k
+        if self.overlap_index is None:
+            # Đồ thị được đọc từ checkpoint, chỉ mục seed được dựng lại một lần (đã gồm các read mới)
+            self.overlap_index = OverlapIndex(store=self.seqs, min_length=k)
+        else:
+            for read in new_reads:
+                self.overlap_index.add(read_id=read.read_id)
+        
+        pairs: List[Tuple[Read, Read, int]] = []
+        for second in new_reads:
+            for _, seed, _, _ in kmer_keys(codes=second.codes()[:k], k=k):
+                edge: Optional[Edge] = self.edge_dict.get(seed)
+                if edge is None:
+                    continue
+                for first in edge.reads:
+                    pos: int = suffix_prefix_overlap(first_str=first.sequence, second_str=second.sequence, min_length=k)
+                    if pos != -1:
+                        pairs.append((first, second, pos))
+        for first in new_reads:
+            for second_id, pos in self.overlap_index.overlaps(read_id=first.read_id):
+                pairs.append((first, self.read_list[second_id], pos))
+        
+        # Thêm theo thứ tự (read trước, read sau) như align_read để front_of, behind_of giống hệt khi dựng lại
+        pairs.sort(key=lambda pair: (pair[0].read_id, pair[1].read_id))
+        for first, second, pos in pairs:
+            first.front_of[second] = (len(first) - pos, pos)
+            second.behind_of[first] = (len(first) - pos, pos)
+            self.overlap_intervals.add(first=first, second=second, start=len(first) - pos, end=pos)
+    
+    
     def __str__(self) -> str:
         """_summary_
 
@@ -606,50 +973,80 @@ class Graph(object):
             str: In ra các cạnh và các đỉnh kề
         """
         
-        out: str = ""
-        for edge in self.edge_list:
-            out = out + str(edge) + ": " + str(edge.in_vertex) + ", " + str(edge.out_vertex) + ", multiplicities: " + str(edge.multiplicities) + "\n"
-            
-        return out
+        # Ghép một lần thay vì cộng dồn chuỗi qua từng cạnh
+        return "".join(str(edge) + ": " + str(edge.in_vertex) + ", " + str(edge.out_vertex) + ", multiplicities: " + str(edge.multiplicities) + "\n"
+                       for edge in self.edge_list)
     
     
-    def new_vertex(self, sequence: str) -> Vertex:
+    def new_vertex(self, key: int) -> Vertex:
         """Tạo ra một đỉnh mới thêm vào đồ thị
 
         Args:
-            sequence (str): Chuỗi đại diện cho đỉnh
+            key (int): Khóa của chuỗi đại diện cho đỉnh
 
         Returns:
             Vertex: Đỉnh mới được tạo ra
         """
         
-        vertex: Vertex = Vertex(sequence=sequence)
+        vertex: Vertex = Vertex(key=key, graph=self)
         self.vertex_list.append(vertex)
-        self.vertex_dict[sequence] = vertex
+        self.vertex_dict[key] = vertex
         
         return vertex
     
     
-    def new_edge(self, in_vertex: Vertex, out_vertex: Vertex, sequence: str) -> Edge:
-        """Tạo ra một cạnh mới thêm vào đồ thị khi cho biết đỉnh vào, đỉnh ra, chuỗi đại diện cho cạnh
+    def new_edge(self, in_vertex: Vertex, out_vertex: Vertex, key: int) -> Edge:
+        """Tạo ra một cạnh mới thêm vào đồ thị khi cho biết đỉnh vào, đỉnh ra, khóa của chuỗi đại diện cho cạnh
 
         Args:
             in_vertex (Vertex): Đỉnh vào cạnh mới
             out_vertex (Vertex): Đỉnh ra cạnh mới
-            sequence (str): Chuỗi đại diện cho cạnh mới
+            key (int): Khóa của chuỗi đại diện cho cạnh mới
 
         Returns:
             Edge: Cạnh mới được tạo ra
         """
         
-        edge: Edge = Edge(in_vertex=in_vertex, out_vertex=out_vertex, sequence=sequence)
+        edge: Edge = Edge(in_vertex=in_vertex, out_vertex=out_vertex, key=key)
         self.edge_list.append(edge)
         in_vertex.add_out_edge(out_vertex=out_vertex, edge=edge)
-        self.edge_dict[sequence] = edge
+        self.edge_dict[key] = edge
         
         return edge
     
 
+    def pair_reads(self, x: Edge, y: Edge) -> Dict[Read, List[int]]:
+        """Các read có cạnh y nằm ngay sau cạnh x, kèm vị trí của y trong read
+
+        Args:
+            x (Edge): Cạnh trước
+            y (Edge): Cạnh sau
+
+        Returns:
+            Dict[Read, List[int]]: Read -> các vị trí của y
+        """
+        
+        return self.pair_index.get((x, y), {})
+    
+    
+    def affected_reads(self, x: Edge, y: Edge) -> List[Read]:
+        """Các read chứa cạnh x hoặc cạnh y, theo thứ tự trong read_list; chỉ những read này bị thay đổi khi gộp x và y
+
+        Args:
+            x (Edge): Cạnh trước
+            y (Edge): Cạnh sau
+
+        Returns:
+            List[Read]: Các read bị ảnh hưởng
+        """
+        
+        reads: Dict[int, Read] = {read.read_id: read for read in x.reads}
+        for read in y.reads:
+            reads[read.read_id] = read
+            
+        return [reads[read_id] for read_id in sorted(reads)]
+    
+    
     def merge(self, x: Edge, y: Edge) -> Edge:
         """Gộp hai cạnh kề nhau x và y
 
@@ -674,31 +1071,31 @@ class Graph(object):
             len(mid_vertex.out_edges) == 0 or len(out_vertex.in_edges) == 0:
                 return None
             
-        # Tạo chuỗi đại diện mới cho cạnh mới        
-        y_length: int = len(y.sequence)
-        seq: str = x.sequence + y.sequence[self.k-1:]
+        # Tạo khóa của chuỗi đại diện mới cho cạnh mới (x + y[k-1:])
+        key: int = concat_keys(x_key=x.key, y_key=y.key, overlap=self.k-1)
         
         # Tạo một cạnh mới
-        if seq in self.edge_dict:
-            z: Edge = self.edge_dict[seq]
+        if key in self.edge_dict:
+            z: Edge = self.edge_dict[key]
         else:        
-            z: Edge = self.new_edge(in_vertex=in_vertex, out_vertex=out_vertex, sequence=seq)
+            z: Edge = self.new_edge(in_vertex=in_vertex, out_vertex=out_vertex, key=key)
         
         # Kiểm tra bội số của cạnh x và y
-        assert x.multiplicities == y.multiplicities, print(x, y)
+        if x.multiplicities != y.multiplicities:
+            raise ValueError("merge cần hai cạnh cùng bội, x: {} ({}), y: {} ({})".format(x, x.multiplicities, y, y.multiplicities))
         z.multiplicities = x.multiplicities
         
         # Cập nhật các đỉnh và đường đi
-        if x in in_vertex.out_edges:
-            in_vertex.out_edges.remove(x)
-        if x in mid_vertex.in_edges:
-            mid_vertex.in_edges.remove(x)
-        if y in mid_vertex.out_edges:
-            mid_vertex.out_edges.remove(y)
-        if y in out_vertex.in_edges:
-            out_vertex.in_edges.remove(y)
-        for read in self.read_list:
+        in_vertex.remove_out_edge(x)
+        mid_vertex.remove_in_edge(x)
+        mid_vertex.remove_out_edge(y)
+        out_vertex.remove_in_edge(y)
+        reads: List[Read] = self.affected_reads(x=x, y=y)
+        for read in reads:
             read.update(x=x, y=y, z=z)
+        self.profiler.count("merges")
+        self.profiler.count("merge_reads_touched", len(reads))
+        self.profiler.maximum("merge_reads_touched_max", len(reads))
             
         return z
     
@@ -737,87 +1134,419 @@ class Graph(object):
             len(mid_vertex.out_edges) == 0 or len(out_vertex.in_edges) == 0:
                 return None
             
-        # Tạo chuỗi đại diện mới cho cạnh mới        
-        y_length: int = len(y.sequence)
-        seq: str = x.sequence + y.sequence[self.k-1:]
-        print("thành {}".format(seq), end=" ")
+        # Tạo khóa của chuỗi đại diện mới cho cạnh mới (x + y[k-1:])
+        key: int = concat_keys(x_key=x.key, y_key=y.key, overlap=self.k-1)
         
         # Tạo một cạnh mới
-        if seq in self.edge_dict:
-            z: Edge = self.edge_dict[seq]
+        if key in self.edge_dict:
+            z: Edge = self.edge_dict[key]
         else:        
-            z: Edge = self.new_edge(in_vertex=in_vertex, out_vertex=out_vertex, sequence=seq)
+            z: Edge = self.new_edge(in_vertex=in_vertex, out_vertex=out_vertex, key=key)
         
         # Tính số bội trùng nhau (số vị trí liền kề liên tiếp trong các read, do các cạnh được merge với nhau có bội kề nhau nhưng một vài bội khác của hai cạnh x và y lại không kề nhau, vì vậy cần phải tính chi tiết có bao nhiêu bội đứng cạnh nhau trong các read)
-        # Nhưng liệu có cần tính đến các đoạn overlap của các read?????????
+        # Lần liền kề nằm trong đoạn trùng với một read đã được tính thì không được tính lại
         min_multiplicities: int = self.get_actual_merged_multiplicities(x=x, y=y)
         
         if min_multiplicities < x.multiplicities and min_multiplicities < y.multiplicities:
             case = 3
         #min_multiplicities = min(x.multiplicities, y.multiplicities)
-        assert min_multiplicities <= min(x.multiplicities, y.multiplicities), print("\n min_multiplicities: {}, x: {}, {}, y: {}, {}".format(min_multiplicities, x, x.multiplicities, y, y.multiplicities))
+        if min_multiplicities > min(x.multiplicities, y.multiplicities):
+            raise RuntimeError("Bội của cạnh gộp {} lớn hơn bội của x: {} ({}) hoặc y: {} ({})".format(
+                min_multiplicities, x, x.multiplicities, y, y.multiplicities))
         z.multiplicities = min_multiplicities
         # Cập nhật bội số
         x.multiplicities = x.multiplicities - min_multiplicities
         y.multiplicities = y.multiplicities - min_multiplicities
-        print("với bội số {}".format(min_multiplicities))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s và %s gộp được thành %s với bội số %d", x.sequence, y.sequence, key_to_sequence(key), min_multiplicities)
         
         if x.multiplicities == 0:
-            if x in in_vertex.out_edges:
-                in_vertex.out_edges.remove(x)
-            if x in mid_vertex.in_edges:
-                mid_vertex.in_edges.remove(x)
+            in_vertex.remove_out_edge(x)
+            mid_vertex.remove_in_edge(x)
 
 
         if y.multiplicities == 0:
-            if y in mid_vertex.out_edges:
-                mid_vertex.out_edges.remove(y)
-            if y in out_vertex.in_edges:
-                out_vertex.in_edges.remove(y)
+            mid_vertex.remove_out_edge(y)
+            out_vertex.remove_in_edge(y)
         
     
-        if case == 1:
-            for read in self.read_list:
+        # Chỉ các read chứa x hoặc y mới có thể bị thay đổi
+        reads: List[Read] = self.affected_reads(x=x, y=y)
+        for read in reads:
+            if case == 1:
                 read.change_xy(x=x, y=y, z=z)
                 read.change_y(y=y, z=z)
-        elif case == 2:
-            for read in self.read_list:
+            elif case == 2:
                 read.change_xy(x=x, y=y, z=z)
                 read.change_x(x=x, z=z)
-        elif case == 3:
-            for read in self.read_list:
-                read.update(x=x, y=y, z=z)                
+            elif case == 3:
+                read.update(x=x, y=y, z=z)
+        self.profiler.count("multiple_merges")
+        self.profiler.count("multiple_merge_reads_touched", len(reads))
+        self.profiler.maximum("multiple_merge_reads_touched_max", len(reads))
             
         return z
     
     
-    def clean(self) -> None:
-        """Loại bỏ các cạnh và đỉnh trống từ đồ thị
+    def is_unitig_inner(self, vertex: Vertex) -> bool:
+        """Đỉnh nằm giữa một đường không phân nhánh: đúng một cạnh vào, một cạnh ra (khác nhau) và cùng bội,
+        mọi lần đi qua cạnh vào đều phải đi tiếp bằng cạnh ra
+
+        Args:
+            vertex (Vertex): Đỉnh cần kiểm tra
+
+        Returns:
+            bool: True nếu đỉnh nằm giữa một unitig
         """
         
-        # Loại bỏ các đỉnh rỗng
-        to_remove_vertex: List[Vertex] = []
-        for vertex in self.vertex_list:
-            if len(vertex.in_edges) == 0 and len(vertex.out_edges) == 0:
-                to_remove_vertex.append(vertex)
+        if len(vertex.in_edges) != 1 or len(vertex.out_edges) != 1:
+            return False
+        in_edge: Edge = vertex.in_edges[0]
+        out_edge: Edge = vertex.out_edges[0]
+        
+        return in_edge is not out_edge and in_edge.multiplicities == out_edge.multiplicities
+    
+    
+    def compact_unitigs(self) -> int:
+        """Gộp tất cả các đường không phân nhánh tối đại thành một cạnh (unitig) trong một lần duyệt O(V + E),
+        đường đi của các read được cập nhật một lần cho cả unitig thay vì sau mỗi lần gộp hai cạnh.
+        Các chu trình cô lập không có đỉnh phân nhánh được giữ nguyên
+
+        Returns:
+            int: Số unitig được tạo ra
+        """
+        
+        num_unitigs: int = 0
+        for vertex in self.vertex_list.copy():
+            if self.is_unitig_inner(vertex=vertex):
+                continue
+            for first in vertex.out_edges.copy():
+                # Đi theo các đỉnh giữa cho đến khi gặp đỉnh phân nhánh
+                chain: List[Edge] = [first]
+                while self.is_unitig_inner(vertex=chain[-1].out_vertex):
+                    chain.append(chain[-1].out_vertex.out_edges[0])
+                if len(chain) > 1:
+                    self.collapse_chain(chain=chain)
+                    num_unitigs += 1
+        
+        self.clean()
+        
+        return num_unitigs
+    
+    
+    def collapse_chain(self, chain: List[Edge]) -> Edge:
+        """Thay một đường không phân nhánh bằng một cạnh duy nhất và ánh xạ lại vị trí trong các read
+        
+        Args:
+            chain (List[Edge]): Các cạnh liên tiếp của đường, cùng bội
+        
+        Returns:
+            Edge: Cạnh unitig mới
+        """
+        
+        in_vertex: Vertex = chain[0].in_vertex
+        out_vertex: Vertex = chain[-1].out_vertex
+        multiplicities: int = chain[0].multiplicities
+        key: int = concat_path_keys(keys=[edge.key for edge in chain], overlap=self.k-1)
+        
+        for edge in chain:
+            edge.in_vertex.remove_out_edge(edge)
+            edge.out_vertex.remove_in_edge(edge)
+        z: Edge = self.new_edge(in_vertex=in_vertex, out_vertex=out_vertex, key=key)
+        z.multiplicities = multiplicities
+        
+        # Trong mỗi read các cạnh của đường luôn nằm thành từng đoạn liên tiếp,
+        # mỗi đoạn được thay bằng z tại vị trí của cạnh đầu đoạn (giống như gộp từng cặp bằng merge)
+        # Mỗi lần xuất hiện của các cạnh trên đường chỉ được xét một lần nên tổng công việc tỉ lệ với số lần xuất hiện
+        rank: Dict[Edge, int] = {edge: i for i, edge in enumerate(chain)}
+        reads: Dict[Read, None] = {}
+        starts_of: Dict[Read, List[int]] = {}
+        for edge in chain:
+            reads.update(edge.reads)
+            for read, positions in edge.position_in_read.items():
+                for pos in positions:
+                    slot: int = read.position_to_slot[pos]
+                    before: int = read.previous(slot)
+                    if before == -1 or rank[edge] == 0 or rank.get(read.slot_edge[before]) != rank[edge] - 1:
+                        starts_of.setdefault(read, []).append(slot)
+        self.profiler.count("unitigs")
+        self.profiler.count("unitig_edges", len(chain))
+        self.profiler.count("unitig_reads_touched", len(reads))
+        for read in reads:
+            for slot in starts_of.get(read, ()):
+                after: int = read.next_slot[slot]
+                last: int = rank[read.slot_edge[slot]]
+                while after != -1 and after not in read.breaks and rank.get(read.slot_edge[after]) == last + 1:
+                    last += 1
+                    read.remove_slot(slot=after)
+                    after = read.next_slot[slot]
+                read.replace_edge(slot=slot, z=z)
                 
-        # Xóa các đỉnh rỗng
-        for vertex in to_remove_vertex:
-            self.vertex_list.remove(vertex)
+        return z
+    
+    
+    def remove_edge(self, edge: Edge) -> None:
+        """Gỡ một cạnh khỏi hai đỉnh đầu mút và bỏ các vị trí của cạnh khỏi đường đi của các read chứa nó,
+        đường đi của read bị cắt tại đó nên hai cạnh hai bên không trở thành một cặp liền kề giả trong pair_index
+
+        Args:
+            edge (Edge): Cạnh cần gỡ
+        """
+        
+        edge.in_vertex.remove_out_edge(edge)
+        edge.out_vertex.remove_in_edge(edge)
+        self.profiler.count("edges_removed")
+        for read in list(edge.reads):
+            for pos in list(edge.position_in_read[read]):
+                read.remove_slot(slot=read.position_to_slot[pos], split=True)
+    
+    
+    def walk_chain(self, edge: Edge, max_length: int, forward: bool = True) -> Tuple[List[Edge], int]:
+        """Đi theo đường không phân nhánh bắt đầu từ cạnh edge (tiến hoặc lùi), dừng tại đỉnh phân nhánh
+        hoặc khi độ dài chuỗi của đường vượt quá max_length
+
+        Args:
+            edge (Edge): Cạnh bắt đầu
+            max_length (int): Độ dài lớn nhất cần đi
+            forward (bool, optional): Đi theo chiều cạnh hay ngược lại. Defaults to True.
+
+        Returns:
+            Tuple[List[Edge], int]: Các cạnh theo thứ tự đã đi và độ dài chuỗi của đường
+        """
+        
+        chain: List[Edge] = [edge]
+        length: int = len(edge)
+        while length <= max_length:
+            vertex: Vertex = chain[-1].out_vertex if forward else chain[-1].in_vertex
+            if len(vertex.in_edges) != 1 or len(vertex.out_edges) != 1 or vertex.in_edges[0] is vertex.out_edges[0]:
+                break
+            chain.append(vertex.out_edges[0] if forward else vertex.in_edges[0])
+            length += len(chain[-1]) - (self.k - 1)
             
-        # Loại bỏ các cạnh rỗng
-        to_remove_edge: List[Edge] = []
-        for edge in self.edge_list:
-            if len(edge.reads) == 0:
-                to_remove_edge.append(edge)
-            elif edge.in_vertex not in self.vertex_list:
-                to_remove_edge.append(edge)
-            elif edge.out_vertex not in self.vertex_list:
-                to_remove_edge.append(edge)
+        return chain, length
+    
+    
+    @staticmethod
+    def path_coverage(chain: List[Edge]) -> float:
+        """Độ phủ trung bình của các cạnh trên một đường
+        """
+        
+        return sum(edge.coverage for edge in chain) / len(chain)
+    
+    
+    def clip_tips(self, max_length: Optional[int] = None, min_ratio: float = 2.0) -> int:
+        """Cắt các nhánh cụt (tip) ngắn hơn max_length nối vào một đỉnh phân nhánh,
+        chỉ cắt khi độ phủ của nhánh còn lại tại đỉnh đó gấp ít nhất min_ratio lần độ phủ của tip. Đầu và cuối của hệ gen cũng là tip
+        nên luôn giữ lại ít nhất một đỉnh không có cạnh vào và một đỉnh không có cạnh ra (các tip có độ phủ thấp bị cắt trước)
+
+        Args:
+            max_length (int, optional): Độ dài lớn nhất của tip. Defaults to 2k.
+            min_ratio (float, optional): Tỉ lệ độ phủ nhỏ nhất giữa nhánh còn lại và tip. Defaults to 2.0.
+
+        Returns:
+            int: Số tip bị cắt
+        """
+        
+        max_length = max_length or 2 * self.k
+        # Số đỉnh không có cạnh vào và không có cạnh ra
+        num_dead_ends: Dict[bool, int] = {True: 0, False: 0}
+        candidates: List[Tuple[int, bool, List[Edge]]] = []
+        for vertex in self.vertex_list:
+            for forward in (True, False):
+                # Tip bắt đầu từ đỉnh không có cạnh vào, hoặc kết thúc tại đỉnh không có cạnh ra
+                ends: List[Edge] = vertex.out_edges if forward else vertex.in_edges
+                starts: List[Edge] = vertex.in_edges if forward else vertex.out_edges
+                if len(starts) != 0 or len(ends) == 0:
+                    continue
+                num_dead_ends[forward] += 1
+                if len(ends) != 1:
+                    continue
+                chain, length = self.walk_chain(edge=ends[0], max_length=max_length, forward=forward)
+                if length >= max_length:
+                    continue
+                junction: Vertex = chain[-1].out_vertex if forward else chain[-1].in_vertex
+                others: List[Edge] = [edge for edge in (junction.in_edges if forward else junction.out_edges) if edge is not chain[-1]]
+                if len(others) == 0:
+                    continue
+                coverage: int = max(edge.coverage for edge in chain)
+                if coverage * min_ratio <= max(edge.coverage for edge in others):
+                    candidates.append((coverage, forward, chain))
+        
+        num_tips: int = 0
+        for _, forward, chain in sorted(candidates, key=lambda candidate: candidate[0]):
+            if num_dead_ends[forward] <= 1 or any(edge.removed for edge in chain):
+                continue
+            for edge in chain:
+                self.remove_edge(edge=edge)
+            num_dead_ends[forward] -= 1
+            num_tips += 1
+                    
+        return num_tips
+    
+    
+    def find_path(self, source: Vertex, target: Vertex, max_length: int, avoid: Edge) -> Optional[List[Edge]]:
+        """Tìm đường ngắn nhất (theo số nucleotide) từ source đến target không đi qua cạnh avoid bằng Dijkstra,
+        chỉ duyệt các đỉnh cách source không quá max_length
+
+        Args:
+            source (Vertex): Đỉnh bắt đầu
+            target (Vertex): Đỉnh kết thúc
+            max_length (int): Khoảng cách lớn nhất được duyệt
+            avoid (Edge): Cạnh không được dùng
+
+        Returns:
+            Optional[List[Edge]]: Các cạnh của đường đi, None nếu không tìm thấy
+        """
+        
+        distance: Dict[Vertex, int] = {source: 0}
+        previous: Dict[Vertex, Edge] = {}
+        heap: List[Tuple[int, int, Vertex]] = [(0, 0, source)]
+        counter: int = 1
+        while len(heap) > 0:
+            dist, _, vertex = heapq.heappop(heap)
+            if dist > distance[vertex]:
+                continue
+            if vertex is target and vertex is not source:
+                path: List[Edge] = []
+                while vertex is not source or len(path) == 0:
+                    path.append(previous[vertex])
+                    vertex = previous[vertex].in_vertex
+                path.reverse()
+                return path
+            for edge in vertex.out_edges:
+                if edge is avoid:
+                    continue
+                new_dist: int = dist + len(edge) - (self.k - 1)
+                if new_dist <= max_length and new_dist < distance.get(edge.out_vertex, max_length + 1):
+                    distance[edge.out_vertex] = new_dist
+                    previous[edge.out_vertex] = edge
+                    heapq.heappush(heap, (new_dist, counter, edge.out_vertex))
+                    counter += 1
+                    
+        return None
+    
+    
+    def pop_bubbles(self, max_length: Optional[int] = None, min_ratio: float = 2.0) -> int:
+        """Gỡ các bong bóng: từ mỗi đỉnh phân nhánh, đi theo từng cạnh ra dọc đường không phân nhánh (không quá max_length)
+        đến đỉnh hợp nhánh, rồi tìm một đường khác giữa hai đỉnh đó bằng Dijkstra giới hạn độ dài.
+        Nhánh không phân nhánh bị gỡ nếu độ phủ của đường còn lại gấp ít nhất min_ratio lần độ phủ của nó
+
+        Args:
+            max_length (int, optional): Độ dài lớn nhất của một nhánh. Defaults to 3k.
+            min_ratio (float, optional): Tỉ lệ độ phủ nhỏ nhất giữa đường còn lại và nhánh bị gỡ. Defaults to 2.0.
+
+        Returns:
+            int: Số nhánh bị gỡ
+        """
+        
+        max_length = max_length or 3 * self.k
+        num_popped: int = 0
+        for vertex in self.vertex_list.copy():
+            if len(vertex.out_edges) < 2:
+                continue
+            for first in vertex.out_edges.copy():
+                if first.removed:
+                    continue
+                chain, length = self.walk_chain(edge=first, max_length=max_length)
+                end: Vertex = chain[-1].out_vertex
+                if length > max_length or end is vertex or len(end.in_edges) < 2:
+                    continue
+                other: Optional[List[Edge]] = self.find_path(source=vertex, target=end, max_length=max_length, avoid=first)
+                if other is not None and self.path_coverage(chain) * min_ratio <= self.path_coverage(other):
+                    for edge in chain:
+                        self.remove_edge(edge=edge)
+                    num_popped += 1
+                        
+        return num_popped
+    
+    
+    def simplify(self, max_tip_length: Optional[int] = None, max_bubble_length: Optional[int] = None, min_ratio: float = 2.0) -> Tuple[int, int]:
+        """Làm gọn đồ thị trước khi gộp cạnh: cắt tip và gỡ bong bóng cho đến khi không còn thay đổi,
+        mỗi bước chỉ tìm kiếm cục bộ trong giới hạn độ dài nên tổng thời gian gần tuyến tính
+
+        Args:
+            max_tip_length (int, optional): Độ dài lớn nhất của tip. Defaults to 2k.
+            max_bubble_length (int, optional): Độ dài lớn nhất của một nhánh bong bóng. Defaults to 3k.
+            min_ratio (float, optional): Tỉ lệ độ phủ nhỏ nhất giữa nhánh được giữ và nhánh bị gỡ. Defaults to 2.0.
+
+        Returns:
+            Tuple[int, int]: Số tip bị cắt và số nhánh bong bóng bị gỡ
+        """
+        
+        num_tips: int = 0
+        num_popped: int = 0
+        # Gỡ một nhánh có thể làm đường chính trở thành không phân nhánh, lặp lại cho đến khi không còn thay đổi
+        while True:
+            tips: int = self.clip_tips(max_length=max_tip_length, min_ratio=min_ratio)
+            popped: int = self.pop_bubbles(max_length=max_bubble_length, min_ratio=min_ratio)
+            num_tips += tips
+            num_popped += popped
+            if tips == 0 and popped == 0:
+                break
+        self.clean()
+        
+        return num_tips, num_popped
+    
+    
+    def update_balance(self, vertex: Vertex, diff: int) -> None:
+        """Ghi nhận độ chênh lệch bậc ra và bậc vào mới của một đỉnh (được gọi bởi Vertex.change_degree)
+
+        Args:
+            vertex (Vertex): Đỉnh thay đổi
+            diff (int): Độ chênh lệch mới
+        """
+        
+        if diff == 0:
+            self.unbalanced.pop(vertex, None)
+        else:
+            self.unbalanced[vertex] = diff
+    
+    
+    def is_eulerian(self) -> bool:
+        """Kiểm tra đồ thị có đường đi Euler hay không: điều kiện bậc được kiểm tra trong O(1) nhờ các đỉnh không cân bằng
+        được cập nhật dần, chỉ khi điều kiện bậc thỏa mãn mới duyệt đồ thị để kiểm tra tính liên thông yếu
+
+        Returns:
+            bool: True nếu có đúng một đỉnh có bậc ra lớn hơn bậc vào 1, một đỉnh có bậc vào lớn hơn bậc ra 1
+                và đồ thị chỉ có một thành phần liên thông yếu
+        """
+        
+        if len(self.unbalanced) != 2 or sorted(self.unbalanced.values()) != [-1, 1]:
+            return False
+        
+        return len(self.weak_components()) == 1
+    
+    
+    def get_start_end_vertices(self) -> Tuple[Optional[Vertex], Optional[Vertex]]:
+        """Đỉnh bắt đầu (bậc ra lớn hơn bậc vào 1) và đỉnh kết thúc (bậc vào lớn hơn bậc ra 1) của đường đi Euler
+
+        Returns:
+            Tuple[Optional[Vertex], Optional[Vertex]]: Đỉnh bắt đầu và đỉnh kết thúc
+        """
+        
+        start_vertex: Optional[Vertex] = None
+        end_vertex: Optional[Vertex] = None
+        for vertex, diff in self.unbalanced.items():
+            if diff == 1:
+                start_vertex = vertex
+            if diff == -1:
+                end_vertex = vertex
                 
-        # Xóa các cạnh rỗng
-        for edge in to_remove_edge:
-            self.edge_list.remove(edge)
+        return start_vertex, end_vertex
+    
+    
+    def clean(self) -> None:
+        """Loại bỏ các cạnh và đỉnh trống từ đồ thị trong một lần duyệt (các đỉnh, cạnh bị gỡ trong lúc gộp chỉ bị xóa ở đây)
+        """
+        
+        self.profiler.count("clean_calls")
+        # Loại bỏ các đỉnh rỗng
+        self.vertex_list[:] = [vertex for vertex in self.vertex_list if len(vertex.in_edges) != 0 or len(vertex.out_edges) != 0]
+        alive: Set[Vertex] = set(self.vertex_list)
+            
+        # Loại bỏ các cạnh rỗng và các cạnh có đỉnh đầu mút đã bị xóa
+        self.edge_list[:] = [edge for edge in self.edge_list
+                             if len(edge.reads) != 0 and edge.in_vertex in alive and edge.out_vertex in alive]
             
             
     def check_all_visited(self) -> bool:
@@ -836,46 +1565,27 @@ class Graph(object):
     
     
     def get_actual_merged_multiplicities(self, x: Edge, y: Edge) -> int:
+        """Số lần x, y liền kề nhau trong các read, lần liền kề nằm trong đoạn trùng với một read đã được tính trước đó
+        (theo thứ tự read_list) thì không được tính lại
+
+        Args:
+            x (Edge): Cạnh trước
+            y (Edge): Cạnh sau
+
+        Returns:
+            int: Số bội của cạnh gộp
+        """
+        
         min_multiplicities: int = 0
-        read_to_consecutive_positions: Dict[Read, List[int]] = {}
-        for read in self.read_list:
-            consecutive_pos: List[int] = read.get_consecutive_positions(x=x, y=y)
-            if len(consecutive_pos) > 0:
-                read_to_consecutive_positions[read] = consecutive_pos
-        read_to_considered: Dict[Read, bool] = dict(zip(read_to_consecutive_positions.keys(), [False]*len(list(read_to_consecutive_positions.keys()))))
-        for read in read_to_consecutive_positions:
-            considered_reads = list(filter(lambda x: read_to_considered[x] is True, list(read_to_considered.keys())))
-            if len(considered_reads) == 0:
-                min_multiplicities += len(read_to_consecutive_positions[read])
-            else:
-                front_of: List[Read] = []
-                for fread in read.front_of:
-                    if fread in considered_reads:
-                        front_of.append(fread)
-                behind_of: List[Read] = []
-                for bread in read.behind_of:
-                    if bread in considered_reads:
-                        behind_of.append(bread)
-                positions: List[int] = read_to_consecutive_positions[read]
-                for pos in positions:
-                    coincide: bool = False
-                    for fread in front_of:
-                        over_pos = read.front_of[fread]
-                        if pos >= over_pos[0]:
-                            for fpos in read_to_consecutive_positions[fread]:
-                                if fpos < over_pos[1]:
-                                    coincide = True
-                    for bread in behind_of:
-                        over_pos = read.behind_of[bread]
-                        if pos < over_pos[1]:
-                            for bpos in read_to_consecutive_positions[bread]:
-                                if bpos >= over_pos[0]:
-                                    coincide = True
-                                    
-                    if not coincide:
-                        min_multiplicities += 1
-                    
-            read_to_considered[read] = True
+        # Lấy các read có x, y liền kề từ pair_index, theo thứ tự trong read_list
+        pair_reads: Dict[Read, List[int]] = self.pair_reads(x=x, y=y)
+        considered: Dict[Read, List[int]] = {}
+        for read in sorted(pair_reads, key=lambda read: read.read_id):
+            positions: List[int] = pair_reads[read]
+            for pos in positions:
+                if not self.overlap_intervals.is_covered(read=read, i=pos, length=1, positions=considered):
+                    min_multiplicities += 1
+            considered[read] = sorted(positions)
             
         return min_multiplicities
     
@@ -890,62 +1600,188 @@ class Graph(object):
             int: Giai thừa n!
         """
         assert n >= 0
-        if n == 0:
-            return 1
+        return math.factorial(n)
+    
+    
+    def weak_components(self) -> List[List[Vertex]]:
+        """Các thành phần liên thông yếu có ít nhất một cạnh, các đỉnh trong mỗi thành phần theo thứ tự duyệt BFS
+        bắt đầu từ đỉnh xuất hiện trước nhất trong vertex_list
+
+        Returns:
+            List[List[Vertex]]: Các thành phần
+        """
         
-        result: int = 1
-        for i in range(1, n + 1):
-            result *= i
-        return result
+        seen: Set[Vertex] = set()
+        components: List[List[Vertex]] = []
+        for vertex in self.vertex_list:
+            if vertex in seen or (len(vertex.in_edges) == 0 and len(vertex.out_edges) == 0):
+                continue
+            seen.add(vertex)
+            component: List[Vertex] = [vertex]
+            i: int = 0
+            while i < len(component):
+                current: Vertex = component[i]
+                i += 1
+                for edge in current.out_edges:
+                    if edge.out_vertex not in seen:
+                        seen.add(edge.out_vertex)
+                        component.append(edge.out_vertex)
+                for edge in current.in_edges:
+                    if edge.in_vertex not in seen:
+                        seen.add(edge.in_vertex)
+                        component.append(edge.in_vertex)
+            components.append(component)
+        
+        return components
     
     
-    def get_numbers_eulerian_path(self) -> int:
-        """Tính số đường đi Euler có thể có sử dụng định lý BEST
+    def reduced_laplacian(self, vertices: Optional[List[Vertex]] = None) -> Optional[Tuple[List[Dict[int, int]], int, List[int]]]:
+        """Ma trận Laplacian (bậc vào - ma trận kề) dạng thưa của một thành phần liên thông sau khi thêm cạnh từ đỉnh kết thúc
+        về đỉnh bắt đầu, bỏ hàng và cột của đỉnh đầu tiên. Theo định lý ma trận - cây, định thức là số cây khung có hướng
+
+        Args:
+            vertices (List[Vertex], optional): Các đỉnh của thành phần (Graph.weak_components), None thì lấy cả đồ thị. Defaults to None.
 
         Returns:
-            int: Số đường đi Euler có thể có của đồ thị
-        """       
-        vertex_list: List[Vertex] = self.vertex_list.copy()
-       
-        vertex_to_index: Dict[Vertex, int] = dict(zip(vertex_list, range(len(vertex_list))))
-       
-        adjacent_matrix: np.ndarray = np.zeros(shape=(len(vertex_list), len(vertex_list)), dtype=np.int32)
-       
-        diagonal_matrix: np.ndarray = np.zeros(shape=(len(vertex_list), len(vertex_list)), dtype=np.int32)
-        
-        start_vertex: Vertex = None
-        end_vertex: Vertex = None
-        for vertex in vertex_list:
-            if vertex.compute_degree() == 1:
-                start_vertex = vertex
-                
-            if vertex.compute_degree() == -1:
-                end_vertex = vertex
-            
-            out_edges = vertex.out_edges.copy()
-            for edge in out_edges:
+            Optional[Tuple[List[Dict[int, int]], int, List[int]]]: Các hàng của ma trận, cận trên của định thức
+            (tích các phần tử trên đường chéo) và số mũ giai thừa (deg_out - 1) của từng đỉnh trong định lý BEST;
+            None nếu thành phần không có đường đi Euler (độ chênh lệch bậc không phải 0 ở mọi đỉnh hoặc đúng một cặp +1, -1)
+        """
+        
+        if vertices is None:
+            vertices = self.vertex_list
+        vertex_to_index: Dict[Vertex, int] = {vertex: i for i, vertex in enumerate(vertices)}
+        diffs: Dict[Vertex, int] = {vertex: self.unbalanced[vertex] for vertex in vertices if vertex in self.unbalanced}
+        if sorted(diffs.values()) not in ([], [-1, 1]):
+            return None
+        start_vertex: Optional[Vertex] = next((vertex for vertex, diff in diffs.items() if diff == 1), None)
+        end_vertex: Optional[Vertex] = next((vertex for vertex, diff in diffs.items() if diff == -1), None)
+        
+        laplacian: List[Dict[int, int]] = [{} for _ in vertices]
+        for i, vertex in enumerate(vertices):
+            for edge in vertex.out_edges:
                 assert vertex == edge.in_vertex
-                out_vertex = edge.out_vertex
-                adjacent_matrix[vertex_to_index[vertex], vertex_to_index[out_vertex]] += edge.multiplicities
-                
-            in_edges = vertex.in_edges.copy()
-            for edge in in_edges:
-                assert vertex == edge.out_vertex
-                diagonal_matrix[vertex_to_index[vertex], vertex_to_index[vertex]] += edge.multiplicities
+                j: int = vertex_to_index[edge.out_vertex]
+                laplacian[i][j] = laplacian[i].get(j, 0) - edge.multiplicities
+            laplacian[i][i] = laplacian[i].get(i, 0) + vertex.in_degree
+        # Đồ thị có đường đi Euler (không phải chu trình) được nối thêm cạnh kết thúc -> bắt đầu
+        if start_vertex is not None and end_vertex is not None:
+            s: int = vertex_to_index[start_vertex]
+            e: int = vertex_to_index[end_vertex]
+            laplacian[e][s] = laplacian[e].get(s, 0) - 1
+            laplacian[s][s] += 1
+        
+        rows: List[Dict[int, int]] = [{c - 1: v for c, v in row.items() if c > 0 and v != 0} for row in laplacian[1:]]
+        bound: int = 1
+        for row in laplacian[1:]:
+            bound *= max(0, sum(v for v in row.values() if v > 0))
+        
+        factorials: List[int] = []
+        for vertex in vertices:
+            if vertex == end_vertex:
+                factorials.append(vertex.compute_out_degree())
+            else:
+                factorials.append(vertex.compute_out_degree() - 1)
+        
+        return rows, bound, factorials
+    
+    
+    def count_component_paths(self, components: List[List[Vertex]]) -> int:
+        """Tích số đường đi Euler (theo định lý BEST) của các thành phần liên thông yếu đã cho, định thức của ma trận
+        Laplacian thưa được tính chính xác bằng số nguyên lớn trên từng thành phần
+
+        Args:
+            components (List[List[Vertex]]): Các thành phần (Graph.weak_components)
+
+        Returns:
+            int: Tích số đường đi, 0 nếu có thành phần không có đường đi Euler
+        """
+        
+        with self.profiler.stage("count_paths"):
+            total: int = 1
+            for vertices in components:
+                reduced: Optional[Tuple[List[Dict[int, int]], int, List[int]]] = self.reduced_laplacian(vertices=vertices)
+                if reduced is None:
+                    return 0
+                rows, bound, factorials = reduced
+                # Số cây khung có hướng không vượt quá tích bậc vào của các đỉnh
+                total *= exact_determinant(rows=rows, bound=bound)
+                for n in factorials:
+                    total *= self.factorial(n=n)
+                if total == 0:
+                    return 0
             
-        adjacent_matrix[vertex_to_index[end_vertex], vertex_to_index[start_vertex]] += 1
-        diagonal_matrix[vertex_to_index[start_vertex], vertex_to_index[start_vertex]] += 1
+        return total
+    
+    
+    def log_count_component_paths(self, components: List[List[Vertex]]) -> float:
+        """Logarit tự nhiên của count_component_paths, dùng log định thức từ phân tích LU thưa và lgamma thay cho giai thừa
+        nên không tạo ra số nguyên lớn
+
+        Args:
+            components (List[List[Vertex]]): Các thành phần (Graph.weak_components)
+
+        Returns:
+            float: log của tích số đường đi, -inf nếu có thành phần không có đường đi Euler
+        """
         
-        laplacian_matrix: np.ndarray = diagonal_matrix - adjacent_matrix
+        total: float = 0.0
+        for vertices in components:
+            reduced: Optional[Tuple[List[Dict[int, int]], int, List[int]]] = self.reduced_laplacian(vertices=vertices)
+            if reduced is None:
+                return -math.inf
+            rows, _, factorials = reduced
+            total += log_abs_determinant(rows=rows) + sum(math.lgamma(n + 1) for n in factorials)
         
-        t_i = np.linalg.det(laplacian_matrix[1:, 1:])
+        return total
+    
+    
+    def get_numbers_eulerian_path(self) -> int:
+        """Tính chính xác số đường đi Euler có thể có sử dụng định lý BEST (số chu trình Euler nếu đồ thị cân bằng).
+        Đồ thị có nhiều thành phần liên thông yếu không có đường đi Euler nào (như is_eulerian), số cách chọn đường đi
+        cho từng thành phần được tính bởi get_numbers_component_paths
+
+        Returns:
+            int: Số đường đi Euler có thể có của đồ thị
+        """
         
-        cumulative_out_degree: int = 1
-        for vertex in vertex_list:
-            if vertex == end_vertex:
-                cumulative_out_degree *= self.factorial(n=vertex.compute_out_degree())
-                continue
-                
-            cumulative_out_degree *= self.factorial(n=(vertex.compute_out_degree() - 1))
+        components: List[List[Vertex]] = self.weak_components()
+        if len(components) != 1:
+            return 0
             
-        return int(np.abs(t_i) * cumulative_out_degree)
\ No newline at end of file
+        return self.count_component_paths(components=components)
+    
+    
+    def get_log_numbers_eulerian_path(self) -> float:
+        """Ước lượng nhanh logarit tự nhiên của số đường đi Euler như get_numbers_eulerian_path
+
+        Returns:
+            float: log của số đường đi Euler, -inf nếu không có đường đi nào
+        """
+        
+        components: List[List[Vertex]] = self.weak_components()
+        if len(components) != 1:
+            return -math.inf
+        
+        return self.log_count_component_paths(components=components)
+    
+    
+    def get_numbers_component_paths(self) -> int:
+        """Số cách chọn cho mỗi thành phần liên thông yếu một đường đi (hoặc chu trình) Euler, tức tích số đường đi Euler
+        của các thành phần. Bằng get_numbers_eulerian_path khi đồ thị chỉ có một thành phần
+
+        Returns:
+            int: Tích số đường đi Euler của các thành phần
+        """
+        
+        return self.count_component_paths(components=self.weak_components())
+    
+    
+    def get_log_numbers_component_paths(self) -> float:
+        """Ước lượng nhanh logarit tự nhiên của get_numbers_component_paths
+
+        Returns:
+            float: log của tích số đường đi của các thành phần, -inf nếu có thành phần không có đường đi nào
+        """
+        
+        return self.log_count_component_paths(components=self.weak_components())
@@ -0,0 +1,135 @@
+import sys
+import json
+import time
+import tracemalloc
+import contextlib
+from typing import List, Dict, Any, Iterator, Optional
+
+try:
+    import resource
+except ImportError:
+    # Không có trên Windows, khi đó không đo được bộ nhớ đỉnh của tiến trình
+    resource = None
+
+
+def peak_rss() -> Optional[int]:
+    """Bộ nhớ RSS đỉnh của tiến trình từ lúc bắt đầu (byte), None nếu không đo được
+    """
+
+    if resource is None:
+        return None
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux trả về KiB, macOS trả về byte
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Profiler(object):
+    """
+    Đo thời gian và bộ nhớ đỉnh của từng giai đoạn, đếm các sự kiện (số lần gộp, số read bị ảnh hưởng, số lần clean...)
+    và xuất báo cáo JSON. Profiler(enabled=False) không đo gì nên có thể truyền vào mọi nơi thay cho None
+    """
+
+    def __init__(self, enabled: bool=True, trace_memory: bool=False) -> None:
+        """
+
+        Args:
+            enabled (bool, optional): Có đo hay không. Defaults to True.
+            trace_memory (bool, optional): Đo thêm bộ nhớ đỉnh được cấp phát trong từng giai đoạn bằng tracemalloc
+                (chính xác theo giai đoạn nhưng làm chương trình chậm hơn). Defaults to False.
+        """
+
+        self.enabled: bool = enabled
+        self.trace_memory: bool = trace_memory and enabled
+        self.stages: List[Dict[str, Any]] = [] # Các giai đoạn theo thứ tự kết thúc
+        self.counters: Dict[str, int] = {}
+        self.started: float = time.perf_counter()
+        self._stack: List[Dict[str, Any]] = [] # Các giai đoạn đang chạy (lồng nhau)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Đo một giai đoạn, dùng với câu lệnh with. Các giai đoạn có thể lồng nhau
+
+        Args:
+            name (str): Tên giai đoạn
+        """
+
+        if not self.enabled:
+            yield
+            return
+
+        entry: Dict[str, Any] = {"name": name, "depth": len(self._stack)}
+        rss_before: Optional[int] = peak_rss()
+        if self.trace_memory:
+            entry["child_peak"] = 0
+            tracemalloc.reset_peak()
+        self._stack.append(entry)
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry["seconds"] = time.perf_counter() - start
+            self._stack.pop()
+            rss_after: Optional[int] = peak_rss()
+            entry["peak_rss_bytes"] = rss_after
+            entry["rss_growth_bytes"] = rss_after - rss_before if rss_after is not None else None
+            if self.trace_memory:
+                # reset_peak của giai đoạn con làm mất đỉnh trước đó nên lấy thêm đỉnh lớn nhất của các giai đoạn con
+                entry["peak_traced_bytes"] = max(tracemalloc.get_traced_memory()[1], entry.pop("child_peak"))
+                if len(self._stack) > 0:
+                    parent: Dict[str, Any] = self._stack[-1]
+                    parent["child_peak"] = max(parent["child_peak"], entry["peak_traced_bytes"])
+            self.stages.append(entry)
+
+
+    def count(self, name: str, n: int=1) -> None:
+        """Cộng n vào bộ đếm name
+        """
+
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+
+    def maximum(self, name: str, value: int) -> None:
+        """Giữ giá trị lớn nhất của name
+        """
+
+        if self.enabled and value > self.counters.get(name, value - 1):
+            self.counters[name] = value
+
+
+    def record(self, name: str, value: int) -> None:
+        """Ghi đè giá trị của name (ví dụ số đỉnh, số cạnh sau một giai đoạn)
+        """
+
+        if self.enabled:
+            self.counters[name] = value
+
+
+    def report(self) -> Dict[str, Any]:
+        """Báo cáo gồm các giai đoạn, các bộ đếm, tổng thời gian và bộ nhớ đỉnh của tiến trình
+
+        Returns:
+            Dict[str, Any]: Báo cáo có thể ghi ra JSON
+        """
+
+        return {"total_seconds": time.perf_counter() - self.started, "peak_rss_bytes": peak_rss(),
+                "stages": self.stages, "counters": dict(sorted(self.counters.items()))}
+
+
+    def write_json(self, filename: str) -> None:
+        """Ghi báo cáo ra file JSON
+
+        Args:
+            filename (str): File cần ghi
+        """
+
+        with open(file=filename, mode="w") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+# Profiler không đo gì, dùng làm mặc định
+NULL_PROFILER: Profiler = Profiler(enabled=False)
@@ -0,0 +1,252 @@
+from typing import List, Iterator, Tuple, Union
+import numpy as np
+from store import BASES, INVALID_CODE, encode
+
+
+# Với k <= MAX_VECTOR_K, mã của k-mer (kèm bit đánh dấu độ dài) vừa trong một số uint64 nên được tính bằng numpy
+MAX_VECTOR_K: int = 31
+
+# Bảng giải mã một byte (4 nucleotide) thành chuỗi
+_BYTE_TO_BASES: List[str] = ["".join(chr(BASES[(b >> shift) & 3]) for shift in (6, 4, 2, 0)) for b in range(256)]
+
+
+# Khóa của một chuỗi độ dài L là mã 2 bit của chuỗi cộng thêm một bit 1 ở vị trí 2L,
+# nhờ đó các chuỗi có độ dài khác nhau (ví dụ cạnh đã gộp) không bao giờ trùng khóa
+
+
+def sequence_to_key(sequence: Union[str, bytes]) -> int:
+    """Mã hóa một chuỗi ACGT thành khóa số nguyên
+
+    Args:
+        sequence (Union[str, bytes]): Chuỗi cần mã hóa
+
+    Returns:
+        int: Khóa của chuỗi
+    """
+
+    key: int = 1
+    for code in encode(sequence).tolist():
+        assert code != INVALID_CODE, "Chuỗi {} chứa ký tự không phải ACGT".format(sequence)
+        key = (key << 2) | code
+
+    return key
+
+
+def key_length(key: int) -> int:
+    """Độ dài của chuỗi được mã hóa bởi khóa
+
+    Args:
+        key (int): Khóa của chuỗi
+
+    Returns:
+        int: Độ dài chuỗi
+    """
+
+    return (key.bit_length() - 1) >> 1
+
+
+def key_to_sequence(key: int) -> str:
+    """Giải mã khóa thành chuỗi ACGT
+
+    Args:
+        key (int): Khóa của chuỗi
+
+    Returns:
+        str: Chuỗi tương ứng
+    """
+
+    length: int = key_length(key)
+    if length == 0:
+        return ""
+    nbytes: int = (length + 3) >> 2
+    code: int = key ^ (1 << (2 * length))
+    seq: str = "".join([_BYTE_TO_BASES[b] for b in code.to_bytes(nbytes, "big")])
+
+    return seq[len(seq) - length:]
+
+
+def concat_keys(x_key: int, y_key: int, overlap: int) -> int:
+    """Khóa của chuỗi x + y[overlap:] (gộp hai chuỗi chồng lên nhau overlap ký tự)
+
+    Args:
+        x_key (int): Khóa của chuỗi trước
+        y_key (int): Khóa của chuỗi sau
+        overlap (int): Số ký tự chồng lên nhau
+
+    Returns:
+        int: Khóa của chuỗi được gộp
+    """
+
+    rest: int = key_length(y_key) - overlap
+
+    return (x_key << (2 * rest)) | (y_key & ((1 << (2 * rest)) - 1))
+
+
+def reverse_complement_key(key: int) -> int:
+    """Khóa của chuỗi bổ sung ngược (reverse complement) của chuỗi được mã hóa bởi key
+
+    Args:
+        key (int): Khóa của chuỗi
+
+    Returns:
+        int: Khóa của chuỗi bổ sung ngược
+    """
+
+    length: int = key_length(key)
+    code: int = key ^ (1 << (2 * length))
+    # Với mã 2 bit A=0, C=1, G=2, T=3, nucleotide bổ sung có mã 3 - c
+    result: int = 1
+    for _ in range(length):
+        result = (result << 2) | (3 - (code & 3))
+        code >>= 2
+
+    return result
+
+
+def canonical_key(key: int) -> int:
+    """Khóa nhỏ hơn giữa một chuỗi và chuỗi bổ sung ngược của nó (cùng độ dài nên so sánh khóa cũng là so sánh từ điển)
+
+    Args:
+        key (int): Khóa của chuỗi
+
+    Returns:
+        int: Khóa chính tắc
+    """
+
+    return min(key, reverse_complement_key(key))
+
+
+def concat_path_keys(keys: List[int], overlap: int) -> int:
+    """Khóa của chuỗi ghép từ một dãy chuỗi, hai chuỗi liền nhau chồng lên nhau overlap ký tự.
+    Phép ghép có tính kết hợp nên được ghép theo từng cặp như cây nhị phân, tổng chi phí O(L log n) thay vì O(L n)
+
+    Args:
+        keys (List[int]): Khóa của các chuỗi theo thứ tự
+        overlap (int): Số ký tự chồng lên nhau giữa hai chuỗi liền nhau
+
+    Returns:
+        int: Khóa của chuỗi được ghép
+    """
+
+    keys = list(keys)
+    assert len(keys) > 0, "Cần ít nhất một khóa"
+    while len(keys) > 1:
+        merged: List[int] = [concat_keys(x_key=keys[i], y_key=keys[i + 1], overlap=overlap) for i in range(0, len(keys) - 1, 2)]
+        if len(keys) % 2 == 1:
+            merged.append(keys[-1])
+        keys = merged
+
+    return keys[0]
+
+
+def _vector_kmers(codes: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Tính mã 2 bit (chưa có bit đánh dấu) của tất cả k-mer hợp lệ bằng numpy (chỉ dùng khi k <= MAX_VECTOR_K)
+    """
+
+    n: int = len(codes) - k + 1
+    kmers: np.ndarray = np.zeros(shape=n, dtype=np.uint64)
+    for j in range(k):
+        kmers = (kmers << np.uint64(2)) | codes[j:j + n].astype(np.uint64)
+
+    # Bỏ các k-mer chứa ký tự không phải ACGT
+    invalid: np.ndarray = np.concatenate(([0], np.cumsum(codes == INVALID_CODE)))
+    valid: np.ndarray = (invalid[k:] - invalid[:n]) == 0
+
+    return np.flatnonzero(valid), kmers[valid]
+
+
+def _vector_kmer_keys(codes: np.ndarray, k: int) -> Tuple[List[int], List[int], List[int], List[int]]:
+    """Tính khóa của tất cả k-mer và các (k-1)-mer tiền tố, hậu tố bằng numpy
+    """
+
+    positions, kmers = _vector_kmers(codes=codes, k=k)
+
+    edge_keys: np.ndarray = kmers | np.uint64(1 << (2 * k))
+    prefix_keys: np.ndarray = (kmers >> np.uint64(2)) | np.uint64(1 << (2 * (k - 1)))
+    suffix_keys: np.ndarray = (kmers & np.uint64((1 << (2 * (k - 1))) - 1)) | np.uint64(1 << (2 * (k - 1)))
+
+    return positions.tolist(), edge_keys.tolist(), prefix_keys.tolist(), suffix_keys.tolist()
+
+
+def kmer_key_array(codes: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Vị trí và khóa của tất cả k-mer của một read dưới dạng mảng numpy
+
+    Args:
+        codes (np.ndarray): Các mã 2 bit của read (ReadStore.codes)
+        k (int): Độ dài k-mer
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Mảng vị trí (int64) và mảng khóa (uint64 nếu k <= MAX_VECTOR_K, ngược lại object)
+    """
+
+    if len(codes) < k:
+        return np.empty(shape=0, dtype=np.int64), np.empty(shape=0, dtype=np.uint64 if k <= MAX_VECTOR_K else object)
+
+    if k <= MAX_VECTOR_K:
+        positions, kmers = _vector_kmers(codes=codes, k=k)
+        return positions.astype(np.int64), kmers | np.uint64(1 << (2 * k))
+
+    found: List[Tuple[int, int, int, int]] = list(kmer_keys(codes=codes, k=k))
+    keys: np.ndarray = np.empty(shape=len(found), dtype=object)
+    keys[:] = [key for _, key, _, _ in found]
+
+    return np.array([i for i, _, _, _ in found], dtype=np.int64), keys
+
+
+def canonical_kmer_array(codes: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Vị trí, khóa chính tắc và chiều của tất cả k-mer của một read
+
+    Args:
+        codes (np.ndarray): Các mã 2 bit của read (ReadStore.codes)
+        k (int): Độ dài k-mer
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Mảng vị trí, mảng khóa chính tắc, mảng bool (True nếu k-mer
+            trong read đã là dạng chính tắc) và mảng bool đánh dấu k-mer đối xứng (bằng chuỗi bổ sung ngược của nó, chỉ có khi k chẵn)
+    """
+
+    positions, keys = kmer_key_array(codes=codes, k=k)
+    # Mã bổ sung ngược của read, ký tự không phải ACGT giữ nguyên mã 4 nên các k-mer hợp lệ của hai chiều tương ứng một một
+    reverse: np.ndarray = np.where(codes == INVALID_CODE, INVALID_CODE, 3 - codes.astype(np.int16)).astype(np.uint8)[::-1]
+    _, reverse_keys = kmer_key_array(codes=np.ascontiguousarray(reverse), k=k)
+    # k-mer tại vị trí i của read ứng với k-mer tại vị trí len - k - i của chuỗi bổ sung ngược
+    reverse_keys = reverse_keys[::-1]
+    forward: np.ndarray = keys <= reverse_keys
+
+    return positions, np.where(forward, keys, reverse_keys), np.asarray(forward, dtype=bool), np.asarray(keys == reverse_keys, dtype=bool)
+
+
+def kmer_keys(codes: np.ndarray, k: int) -> Iterator[Tuple[int, int, int, int]]:
+    """Duyệt tất cả các k-mer của một read theo dạng khóa số nguyên, không tạo chuỗi con nào
+
+    Args:
+        codes (np.ndarray): Các mã 2 bit của read (ReadStore.codes)
+        k (int): Độ dài k-mer
+
+    Yields:
+        Tuple[int, int, int, int]: Vị trí i, khóa của k-mer, khóa của (k-1)-mer tiền tố và (k-1)-mer hậu tố
+    """
+
+    if len(codes) < k:
+        return
+
+    if k <= MAX_VECTOR_K:
+        yield from zip(*_vector_kmer_keys(codes=codes, k=k))
+        return
+
+    # Với k lớn dùng số nguyên Python (không giới hạn số bit), cập nhật cuộn O(1) mỗi nucleotide
+    edge_top: int = 1 << (2 * k)
+    vertex_top: int = 1 << (2 * (k - 1))
+    mask: int = edge_top - 1
+    vertex_mask: int = vertex_top - 1
+    code: int = 0
+    valid: int = 0
+    for j, c in enumerate(codes.tolist()):
+        if c == INVALID_CODE:
+            valid = 0
+            code = 0
+            continue
+        code = ((code << 2) | c) & mask
+        valid += 1
+        if valid >= k:
+            yield j - k + 1, code | edge_top, (code >> 2) | vertex_top, (code & vertex_mask) | vertex_top
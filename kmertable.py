@@ -0,0 +1,335 @@
+import os
+import json
+import math
+import shutil
+import tempfile
+from typing import List, Dict, Tuple, Optional, Iterator
+import numpy as np
+from store import ReadStore
+from kmer import kmer_key_array
+from overlap import OverlapIntervals, find_overlaps
+from counting import count_occurrences, mix64
+
+
+# Một lần xuất hiện được ghi vào bucket trên đĩa: (khóa, id read, vị trí)
+OCCURRENCE_DTYPE = np.dtype([("key", np.uint64), ("read_id", np.int64), ("position", np.int64)])
+
+# Ước lượng số byte bộ nhớ cần cho mỗi lần xuất hiện khi đếm một bucket
+# (bản ghi, mảng sắp xếp và các list Python trong count_occurrences)
+BYTES_PER_OCCURRENCE: int = 128
+
+# Hằng số nhân của hàm băm minimizer (số lẻ 64 bit)
+_HASH_MULTIPLIER: np.uint64 = np.uint64(0x9E3779B97F4A7C15)
+
+_COLUMNS: Tuple[str, ...] = ("keys", "multiplicities", "first_read", "first_position")
+
+
+def minimizer_hashes(keys: np.ndarray, k: int, m: int) -> np.ndarray:
+    """Giá trị băm nhỏ nhất trong các m-mer của mỗi k-mer (minimizer), các k-mer liền nhau trong một read
+    thường có chung minimizer nên rơi vào cùng một bucket
+
+    Args:
+        keys (np.ndarray): Các khóa k-mer (uint64)
+        k (int): Độ dài k-mer
+        m (int): Độ dài minimizer
+
+    Returns:
+        np.ndarray: Giá trị băm của minimizer
+    """
+
+    mask: np.uint64 = np.uint64((1 << (2 * m)) - 1)
+    best: np.ndarray = np.full(shape=len(keys), fill_value=np.iinfo(np.uint64).max, dtype=np.uint64)
+    for j in range(k - m + 1):
+        # Bit đánh dấu độ dài của khóa nằm ở vị trí 2k nên không lọt vào m-mer nào
+        mmers: np.ndarray = (keys >> np.uint64(2 * j)) & mask
+        hashes: np.ndarray = mmers * _HASH_MULTIPLIER
+        hashes ^= hashes >> np.uint64(29)
+        np.minimum(best, hashes, out=best)
+
+    return best
+
+
+def _scatter(records: np.ndarray, targets: np.ndarray, paths: List[str]) -> None:
+    """Ghi nối các bản ghi vào file paths[targets[i]], giữ nguyên thứ tự của các bản ghi trong mỗi file
+    """
+
+    order: np.ndarray = np.argsort(targets, kind="stable")
+    records = records[order]
+    bounds: np.ndarray = np.searchsorted(targets[order], np.arange(len(paths) + 1))
+    for b in np.flatnonzero(bounds[1:] > bounds[:-1]).tolist():
+        with open(paths[b], mode="ab") as f:
+            records[bounds[b]:bounds[b + 1]].tofile(f)
+
+
+def _count_bucket(path: str, k: int, intervals: OverlapIntervals, limit: int, batch_size: int) -> Tuple[np.ndarray, ...]:
+    """Đếm một file bucket, kết quả sắp xếp theo khóa. Minimizer không phân bố đều (vùng lặp, vùng ít phức tạp) nên một bucket
+    có thể lớn hơn limit lần xuất hiện; khi đó bucket được chia tiếp theo khóa đã trộn (counting.mix64) thành các phần
+    khoảng limit lần xuất hiện, mỗi phần được đếm riêng. Mọi lần xuất hiện của một k-mer nằm trong cùng một phần nên
+    một k-mer đơn lẻ xuất hiện nhiều hơn limit lần vẫn được đếm trong một lần
+
+    Args:
+        path (str): File bucket
+        k (int): Độ dài k-mer
+        intervals (OverlapIntervals): Các đoạn trùng giữa các read
+        limit (int): Số lần xuất hiện tối đa được đếm một lần
+        batch_size (int): Số bản ghi được đọc mỗi lần khi chia bucket
+
+    Returns:
+        Tuple[np.ndarray, ...]: Khóa, bội, id read và vị trí của lần xuất hiện đầu tiên
+    """
+
+    n_records: int = os.path.getsize(path) // OCCURRENCE_DTYPE.itemsize
+    n_parts: int = math.ceil(n_records / limit)
+    if n_parts <= 1:
+        records: np.ndarray = np.fromfile(path, dtype=OCCURRENCE_DTYPE)
+        return count_occurrences(keys=records["key"], read_ids=records["read_id"], positions=records["position"], k=k,
+                                 intervals=intervals)
+
+    part_paths: List[str] = ["{}.part_{}".format(path, p) for p in range(n_parts)]
+    for part_path in part_paths:
+        open(part_path, mode="wb").close()
+    for start in range(0, n_records, batch_size):
+        records = np.fromfile(path, dtype=OCCURRENCE_DTYPE, count=batch_size, offset=start * OCCURRENCE_DTYPE.itemsize)
+        _scatter(records=records, targets=(mix64(keys=records["key"]) % np.uint64(n_parts)).astype(np.int64), paths=part_paths)
+
+    parts: List[Tuple[np.ndarray, ...]] = []
+    for part_path in part_paths:
+        records = np.fromfile(part_path, dtype=OCCURRENCE_DTYPE)
+        parts.append(count_occurrences(keys=records["key"], read_ids=records["read_id"], positions=records["position"], k=k,
+                                       intervals=intervals))
+        del records
+        os.remove(part_path)
+    columns: List[np.ndarray] = [np.concatenate([part[j] for part in parts]) for j in range(len(_COLUMNS))]
+    order: np.ndarray = np.argsort(columns[0], kind="stable")
+
+    return tuple(column[order] for column in columns)
+
+
+class KmerTable(object):
+    """
+    Bảng k-mer (khóa, bội, lần xuất hiện đầu tiên) nằm trên đĩa và được memory-map. Các k-mer được chia vào các bucket
+    theo minimizer, mỗi bucket được đếm riêng nên bộ nhớ khi dựng bị chặn bởi kích thước một bucket thay vì kích thước dữ liệu.
+    Trong mỗi bucket các khóa được sắp xếp tăng dần, bucket_offsets[b]:bucket_offsets[b+1] là đoạn của bucket b.
+    Bảng được dựng trong thư mục tạm bị xóa khi gọi close() hoặc khi ra khỏi câu lệnh with
+    """
+
+    def __init__(self, dirname: str, k: int, m: int, bucket_offsets: np.ndarray, keys: np.ndarray,
+                 multiplicities: np.ndarray, first_read: np.ndarray, first_position: np.ndarray, temporary: bool=False) -> None:
+        self.dirname: str = dirname
+        self.temporary: bool = temporary # Thư mục do build tạo ra, bị xóa khi close
+        self.k: int = k
+        self.m: int = m
+        self.bucket_offsets: np.ndarray = bucket_offsets
+        self.keys: np.ndarray = keys
+        self.multiplicities: np.ndarray = multiplicities
+        self.first_read: np.ndarray = first_read
+        self.first_position: np.ndarray = first_position
+
+
+    @property
+    def n_buckets(self) -> int:
+        return len(self.bucket_offsets) - 1
+
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+    def __enter__(self) -> "KmerTable":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+    def close(self) -> None:
+        """Bỏ các mảng được memory-map và xóa thư mục nếu đó là thư mục tạm do build tạo ra
+        """
+
+        for name in _COLUMNS:
+            setattr(self, name, np.empty(shape=0, dtype=np.uint64 if name == "keys" else np.int64))
+        if self.temporary:
+            shutil.rmtree(self.dirname, ignore_errors=True)
+            self.temporary = False
+
+
+    def bucket_of(self, keys: np.ndarray) -> np.ndarray:
+        """Bucket của mỗi khóa
+        """
+
+        return (minimizer_hashes(keys=keys, k=self.k, m=self.m) % np.uint64(self.n_buckets)).astype(np.int64)
+
+
+    @staticmethod
+    def build(store: ReadStore, k: int, dirname: Optional[str]=None, memory_budget: int=1 << 30,
+              front_of: Optional[Dict[int, List[Tuple[int, int, int]]]]=None,
+              behind_of: Optional[Dict[int, List[Tuple[int, int, int]]]]=None) -> "KmerTable":
+        """Đếm k-mer ngoài bộ nhớ: các lần xuất hiện được ghi nối tiếp vào các file bucket theo minimizer,
+        sau đó từng bucket được đọc, khử trùng và tính bội rồi ghi nối vào bảng trên đĩa
+
+        Args:
+            store (ReadStore): Kho chứa các read
+            k (int): Độ dài k-mer, tối đa 31 để khóa vừa 64 bit
+            dirname (str, optional): Thư mục chứa bảng, None thì tạo thư mục tạm (bị xóa khi gọi close). Defaults to None.
+            memory_budget (int, optional): Số byte bộ nhớ tối đa dành cho việc đếm. Defaults to 1 GiB.
+            front_of (Dict, optional): Read.front_of của mỗi read theo id, None thì tự tìm các đoạn trùng. Defaults to None.
+            behind_of (Dict, optional): Read.behind_of của mỗi read theo id. Defaults to None.
+
+        Returns:
+            KmerTable: Bảng đã được memory-map
+        """
+
+        if k > 31:
+            raise ValueError("Bảng k-mer trên đĩa chỉ hỗ trợ k <= 31")
+        if memory_budget < BYTES_PER_OCCURRENCE:
+            raise ValueError("memory_budget quá nhỏ")
+        temporary: bool = dirname is None
+        if dirname is None:
+            dirname = tempfile.mkdtemp(prefix="kmertable-")
+        os.makedirs(dirname, exist_ok=True)
+        try:
+            KmerTable._build_files(store=store, k=k, dirname=dirname, memory_budget=memory_budget, front_of=front_of, behind_of=behind_of)
+        except BaseException:
+            if temporary:
+                shutil.rmtree(dirname, ignore_errors=True)
+            raise
+
+        return KmerTable.open(dirname=dirname, temporary=temporary)
+
+
+    @staticmethod
+    def _build_files(store: ReadStore, k: int, dirname: str, memory_budget: int,
+                     front_of: Optional[Dict[int, List[Tuple[int, int, int]]]],
+                     behind_of: Optional[Dict[int, List[Tuple[int, int, int]]]]) -> None:
+        """Ghi các file của bảng vào dirname (xem KmerTable.build)
+        """
+
+        if front_of is None or behind_of is None:
+            front_of, behind_of = find_overlaps(store=store, min_length=k)
+        intervals: OverlapIntervals = OverlapIntervals(front_of=front_of, behind_of=behind_of)
+
+        # Số bucket đủ để mỗi bucket (nếu các minimizer phân bố đều) vừa với memory_budget, bucket lớn hơn bị chia tiếp khi đếm
+        lengths: np.ndarray = np.asarray(store.lengths, dtype=np.int64)
+        n_occurrences: int = int(np.maximum(lengths - k + 1, 0).sum())
+        n_buckets: int = max(1, math.ceil(n_occurrences * BYTES_PER_OCCURRENCE / memory_budget))
+        m: int = max(1, min(k - 1, 12))
+        table: KmerTable = KmerTable(dirname=dirname, k=k, m=m, bucket_offsets=np.zeros(shape=n_buckets + 1, dtype=np.int64),
+                                     keys=np.empty(shape=0, dtype=np.uint64), multiplicities=np.empty(shape=0, dtype=np.int64),
+                                     first_read=np.empty(shape=0, dtype=np.int64), first_position=np.empty(shape=0, dtype=np.int64))
+
+        bucket_paths: List[str] = [os.path.join(dirname, "bucket_{}.bin".format(b)) for b in range(n_buckets)]
+        batch_size: int = max(1, memory_budget // (4 * OCCURRENCE_DTYPE.itemsize))
+        for path in bucket_paths:
+            open(path, mode="wb").close()
+        for records in table.occurrence_batches(store=store, batch_size=batch_size):
+            _scatter(records=records, targets=table.bucket_of(keys=records["key"]), paths=bucket_paths)
+
+        # Đếm từng bucket, các bản ghi trong một bucket đã theo thứ tự (id read, vị trí)
+        outputs: Dict[str, object] = {name: open(os.path.join(dirname, name + ".bin"), mode="wb") for name in _COLUMNS}
+        offsets: List[int] = [0]
+        limit: int = max(1, memory_budget // BYTES_PER_OCCURRENCE)
+        for path in bucket_paths:
+            counted: Tuple[np.ndarray, ...] = _count_bucket(path=path, k=k, intervals=intervals, limit=limit, batch_size=batch_size)
+            os.remove(path)
+            for name, column in zip(_COLUMNS, counted):
+                column.astype(np.uint64 if name == "keys" else np.int64).tofile(outputs[name])
+            offsets.append(offsets[-1] + len(counted[0]))
+        for f in outputs.values():
+            f.close()
+
+        with open(os.path.join(dirname, "table.json"), mode="w") as f:
+            json.dump({"k": k, "m": m, "bucket_offsets": offsets}, f)
+
+
+    @staticmethod
+    def open(dirname: str, temporary: bool=False) -> "KmerTable":
+        """Memory-map bảng đã dựng bằng KmerTable.build
+
+        Args:
+            dirname (str): Thư mục chứa bảng
+            temporary (bool, optional): Xóa thư mục khi gọi close. Defaults to False.
+
+        Returns:
+            KmerTable: Bảng k-mer
+        """
+
+        with open(os.path.join(dirname, "table.json"), mode="r") as f:
+            meta: Dict = json.load(f)
+        n: int = meta["bucket_offsets"][-1]
+
+        def column(name: str, dtype: type) -> np.ndarray:
+            # np.memmap không nhận file rỗng
+            if n == 0:
+                return np.empty(shape=0, dtype=dtype)
+            return np.memmap(os.path.join(dirname, name + ".bin"), dtype=dtype, mode="r", shape=(n,))
+
+        return KmerTable(dirname=dirname, k=meta["k"], m=meta["m"], bucket_offsets=np.array(meta["bucket_offsets"], dtype=np.int64),
+                         keys=column("keys", np.uint64), multiplicities=column("multiplicities", np.int64),
+                         first_read=column("first_read", np.int64), first_position=column("first_position", np.int64),
+                         temporary=temporary)
+
+
+    def occurrence_batches(self, store: ReadStore, batch_size: int, start: int=0) -> Iterator[np.ndarray]:
+        """Duyệt các lần xuất hiện k-mer của các read theo thứ tự (id read, vị trí), mỗi lô khoảng batch_size bản ghi
+
+        Args:
+            store (ReadStore): Kho chứa các read
+            batch_size (int): Số bản ghi mỗi lô
+            start (int, optional): Id read bắt đầu. Defaults to 0.
+
+        Yields:
+            np.ndarray: Các bản ghi OCCURRENCE_DTYPE
+        """
+
+        parts: List[np.ndarray] = []
+        size: int = 0
+        for read_id in range(start, len(store)):
+            positions, keys = kmer_key_array(codes=store.codes(read_id), k=self.k)
+            records: np.ndarray = np.empty(shape=len(keys), dtype=OCCURRENCE_DTYPE)
+            records["key"] = keys
+            records["read_id"] = read_id
+            records["position"] = positions
+            parts.append(records)
+            size += len(records)
+            if size >= batch_size:
+                yield np.concatenate(parts)
+                parts, size = [], 0
+        if size > 0:
+            yield np.concatenate(parts)
+
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Dòng của mỗi khóa trong bảng, chỉ đọc các trang của những bucket được hỏi tới
+
+        Args:
+            keys (np.ndarray): Các khóa k-mer
+
+        Returns:
+            np.ndarray: Chỉ số dòng, -1 nếu khóa không có trong bảng
+        """
+
+        keys = np.asarray(keys, dtype=np.uint64)
+        rows: np.ndarray = np.full(shape=len(keys), fill_value=-1, dtype=np.int64)
+        if len(keys) == 0 or len(self.keys) == 0:
+            return rows
+        buckets: np.ndarray = self.bucket_of(keys=keys)
+        order: np.ndarray = np.argsort(buckets, kind="stable")
+        bounds: np.ndarray = np.searchsorted(buckets[order], np.arange(self.n_buckets + 1))
+        for b in np.flatnonzero(bounds[1:] > bounds[:-1]).tolist():
+            low: int = int(self.bucket_offsets[b])
+            high: int = int(self.bucket_offsets[b + 1])
+            if low == high:
+                continue
+            index: np.ndarray = order[bounds[b]:bounds[b + 1]]
+            found: np.ndarray = np.minimum(np.searchsorted(self.keys[low:high], keys[index]), high - low - 1) + low
+            rows[index] = np.where(self.keys[found] == keys[index], found, -1)
+
+        return rows
+
+
+    def first_occurrence_order(self) -> np.ndarray:
+        """Các dòng sắp xếp theo lần xuất hiện đầu tiên (id read, vị trí), đúng thứ tự các cạnh được tạo khi dựng đồ thị tuần tự
+        """
+
+        return np.lexsort((self.first_position, self.first_read))
@@ -1,5 +1,99 @@
 import os
-from typing import List, Dict
+import bz2
+import gzip
+from typing import List, Dict, Iterator, Iterable, Tuple, BinaryIO, Union
+from store import ReadStore
+
+
+# Kích thước mỗi khối đọc từ file (byte)
+BLOCK_SIZE: int = 1 << 22
+
+# Các đuôi file được hỗ trợ
+FASTQ_EXTENSIONS: Tuple[str, ...] = (".fq", ".fastq")
+COMPRESSED_EXTENSIONS: Tuple[str, ...] = (".gz", ".bz2")
+
+
+def open_fastq(filename: str) -> BinaryIO:
+    """Mở file fastq ở chế độ nhị phân, tự giải nén nếu file được nén bằng gzip hoặc bz2
+
+    Args:
+        filename (str): Đường dẫn tới file
+
+    Returns:
+        BinaryIO: File đã được mở
+    """
+    
+    # Nhận biết kiểu nén dựa vào magic bytes thay vì đuôi file
+    with open(file=filename, mode="rb") as f:
+        magic: bytes = f.read(3)
+    
+    if magic[:2] == b"\x1f\x8b":
+        return gzip.open(filename=filename, mode="rb")
+    if magic == b"BZh":
+        return bz2.open(filename=filename, mode="rb")
+    
+    return open(file=filename, mode="rb")
+
+
+def iter_lines(f: BinaryIO, block_size: int=BLOCK_SIZE) -> Iterator[bytes]:
+    """Đọc file theo từng khối lớn và trả về từng dòng (đã bỏ ký tự xuống dòng)
+
+    Args:
+        f (BinaryIO): File đã mở ở chế độ nhị phân
+        block_size (int, optional): Kích thước một khối. Defaults to BLOCK_SIZE.
+
+    Yields:
+        bytes: Từng dòng của file
+    """
+    
+    remainder: bytes = b""
+    while True:
+        block: bytes = f.read(block_size)
+        if not block:
+            break
+        lines: List[bytes] = (remainder + block).split(b"\n")
+        # Dòng cuối có thể chưa đọc hết, giữ lại để ghép với khối sau
+        remainder = lines.pop()
+        for line in lines:
+            yield line.rstrip(b"\r")
+    
+    if remainder:
+        yield remainder.rstrip(b"\r")
+
+
+def iter_records(filename: str, block_size: int=BLOCK_SIZE) -> Iterator[Tuple[bytes, bytes]]:
+    """Đọc lần lượt các bản ghi (tên, chuỗi) trong file fastq, bỏ qua các read chứa N
+
+    Args:
+        filename (str): Đường dẫn tới file
+        block_size (int, optional): Kích thước một khối. Defaults to BLOCK_SIZE.
+
+    Yields:
+        Tuple[bytes, bytes]: Tên và chuỗi của read
+    """
+    
+    with open_fastq(filename=filename) as f:
+        # Mỗi bản ghi gồm 4 dòng: @tên, chuỗi, +, chất lượng. Dòng trống vẫn được tính (chuỗi và chất lượng của read rỗng),
+        # chỉ các dòng trống ở cuối file bị bỏ qua
+        line_no: int = 0
+        name: bytes = b""
+        blank: int = 0
+        for line in iter_lines(f=f, block_size=block_size):
+            if line_no == 0 and not line:
+                blank += 1
+                continue
+            if blank > 0:
+                raise ValueError("File {} có dòng trống ở giữa các bản ghi".format(filename))
+            if line_no == 0:
+                if line[:1] != b"@":
+                    raise ValueError("File {} không đúng định dạng fastq".format(filename))
+                name = line[1:]
+            elif line_no == 1:
+                if b"N" not in line:
+                    yield name, line
+            line_no = (line_no + 1) % 4
+        if line_no != 0:
+            raise ValueError("Bản ghi cuối của file {} không đủ 4 dòng".format(filename))
 
 
 class Loader(object):
@@ -7,54 +101,83 @@ class Loader(object):
     Lưu thông tin về gen
     """
     
-    def __init__(self, reads: List[str]) -> None:
+    def __init__(self, reads: Union[ReadStore, Iterable[str]]) -> None:
         """
         Sử dụng phương thức tĩnh Loader.load("filename.fq") để khởi tạo đối tượng lưu các reads
         """
-        self.reads = reads
+        # Các read được nén 2 bit trong ReadStore
+        self.reads: ReadStore = reads if isinstance(reads, ReadStore) else ReadStore.from_sequences(seqs=reads)
     
     
     @staticmethod
-    def load(filename: str):
+    def check_file(filename: str) -> None:
+        """Kiểm tra file có được hỗ trợ và đọc được hay không
+
+        Args:
+            filename (str): Đường dẫn tới file
+        """
         
         # Kiểm tra loại file
-        if not (filename.endswith(".fq") or filename.endswith(".fastq")):
-            raise ValueError("Kiểu file không được hỗ trợ, hãy sử dụng file định dạng .fq hoặc .fastq")
+        name: str = filename
+        for ext in COMPRESSED_EXTENSIONS:
+            if name.endswith(ext):
+                name = name[:-len(ext)]
+                break
+        if not name.endswith(FASTQ_EXTENSIONS):
+            raise ValueError("Kiểu file không được hỗ trợ, hãy sử dụng file định dạng .fq hoặc .fastq (có thể nén .gz, .bz2)")
         
         # Kiểm tra file có tồn tại không
         if not os.path.isfile(path=filename):
             raise Exception("File {} không tồn tại".format(filename))
         
         # Kiểm tra file có đọc được không
-        if not os.access(path=filename, mode=os.F_OK):
+        if not os.access(path=filename, mode=os.R_OK):
             raise Exception("File {} không đọc được".format(filename))
+    
+    
+    @staticmethod
+    def stream(filename: str, block_size: int=BLOCK_SIZE) -> Iterator[str]:
+        """Đọc lần lượt từng read trong file mà không giữ toàn bộ file trong bộ nhớ
+
+        Args:
+            filename (str): Đường dẫn tới file .fq, .fastq, .fq.gz, .fastq.bz2, ...
+            block_size (int, optional): Kích thước một khối đọc. Defaults to BLOCK_SIZE.
+
+        Yields:
+            str: Chuỗi của từng read (các read chứa N bị bỏ qua)
+        """
         
-        # Tạo một list các string để lưu các read
-        reads: List[str] = []
+        Loader.check_file(filename=filename)
         
-        # Đọc từng dòng của file
-        for line in open(file=filename, mode="r"):
-            line = line.strip()
-            if line[:1] == "@":
-                name = line[1:]
-                is_seq_next: bool = True
-            elif is_seq_next:
-                if "N" in line:
-                    is_seq_next = False
-                    continue
-                
-                reads.append(line)
-                is_seq_next = False
+        for _, seq in iter_records(filename=filename, block_size=block_size):
+            yield seq.decode("ascii")
+    
+    
+    @staticmethod
+    def load(filename: str, block_size: int=BLOCK_SIZE):
+        
+        Loader.check_file(filename=filename)
+        
+        # Nén dần các read vào ReadStore, không tạo string cho từng read
+        reads: ReadStore = ReadStore.from_sequences(seqs=(seq for _, seq in iter_records(filename=filename, block_size=block_size)))
                 
         return Loader(reads=reads)
     
     
     def __getitem__(self, n: int) -> str:
         """
-        Đọc một read tại vị trí n
+        Đọc một read tại vị trí n (giải mã từ ReadStore khi cần)
+        """
+        
+        return self.reads.sequence(n)
+    
+    
+    def __iter__(self) -> Iterator[str]:
+        """
+        Duyệt lần lượt các reads
         """
         
-        return self.reads[n]
+        return iter(self.reads)
     
     
     def __len__(self) -> int:
@@ -70,7 +193,7 @@ class Loader(object):
         Trả về list các string là các reads đã đọc được
         """
         
-        return "".join(str(self.reads))
+        return str(list(self.reads))
     
     
 #reads = Loader.load(filename="data/hemoglobin.fastq")
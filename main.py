@@ -1,18 +1,46 @@
+import logging
+import argparse
+from loader import Loader
 from assembly import Assembler
+from components import assemble_components
+from instrument import Profiler
 
 
-if __name__ == "__main__":   
-    assembly: Assembler = Assembler(filename=r"data/paper_example_8.fastq", k=8)
-    print(assembly.is_eulerian())
-    #print(assembly.graph)
-    assembly.make_superpath()
-    print(assembly.is_eulerian())
-    print("===================================================")
-    print(assembly.graph)
-    print("===================================================")
-    if assembly.is_eulerian():
-        print("Số đường đi Euler có thể là: {}".format(assembly.graph.get_numbers_eulerian_path()))
-        origin_string = assembly.find_eulerian_path()
-        print("Dãy ban đầu là: {}".format(origin_string))
+if __name__ == "__main__":
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Ghép chuỗi bằng đường đi Euler trên đồ thị de Bruijn")
+    parser.add_argument("filename", nargs="?", default=r"data/paper_example_8.fastq", help="File chứa các read")
+    parser.add_argument("-k", type=int, default=8, help="Độ dài k-mer")
+    parser.add_argument("--workers", type=int, default=1, help="Số tiến trình")
+    parser.add_argument("--profile", default=None, metavar="PATH", help="Đo thời gian, bộ nhớ từng giai đoạn và ghi báo cáo JSON vào PATH")
+    parser.add_argument("--components", action="store_true",
+                        help="Ghép từng thành phần liên thông yếu độc lập trên một pool --workers tiến trình")
+    args: argparse.Namespace = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    profiler: Profiler = Profiler(enabled=args.profile is not None)
+    if args.components:
+        with profiler.stage("load"):
+            loader: Loader = Loader.load(filename=args.filename)
+        for i, result in enumerate(assemble_components(store=loader.reads, k=args.k, workers=args.workers, profiler=profiler)):
+            print("Thành phần {} ({} read, Euler: {}, số đường đi: {})".format(i, len(result.read_ids), result.is_eulerian, result.n_paths))
+            for j, contig in enumerate(result.contigs):
+                print("Contig {}.{}: {}".format(i, j, contig))
     else:
-        print("Đồ thị không phải là đồ thị Euler")
\ No newline at end of file
+        assembly: Assembler = Assembler(filename=args.filename, k=args.k, workers=args.workers, profiler=profiler)
+        print(assembly.is_eulerian())
+        #print(assembly.graph)
+        assembly.make_superpath()
+        print(assembly.is_eulerian())
+        print("===================================================")
+        print(assembly.graph)
+        print("===================================================")
+        if assembly.is_eulerian():
+            print("Số đường đi Euler có thể là: {}".format(assembly.graph.get_numbers_eulerian_path()))
+            origin_string = assembly.find_eulerian_path()
+            print("Dãy ban đầu là: {}".format(origin_string))
+        else:
+            print("Đồ thị không phải là đồ thị Euler, ghép các contig")
+            for i, contig in enumerate(assembly.find_contigs()):
+                print("Contig {}: {}".format(i, contig))
+    if args.profile is not None:
+        profiler.write_json(filename=args.profile)
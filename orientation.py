@@ -0,0 +1,212 @@
+from typing import List, Dict, Tuple
+import numpy as np
+from store import ReadStore
+from kmer import canonical_kmer_array
+
+
+# Bảng tra nucleotide bổ sung, ký tự khác ACGT giữ nguyên
+_COMPLEMENT = str.maketrans("ACGTacgt", "TGCAtgca")
+
+
+def reverse_complement(seq: str) -> str:
+    """Chuỗi bổ sung ngược của một read
+
+    Args:
+        seq (str): Read
+
+    Returns:
+        str: Chuỗi bổ sung ngược
+    """
+
+    return seq.translate(_COMPLEMENT)[::-1]
+
+
+class StrandUnion(object):
+    """
+    Union-find có thêm bit chiều: parity[r] là chiều của read r so với read cha, 1 nếu ngược chiều
+    """
+
+    def __init__(self, n: int) -> None:
+        self.parent: List[int] = list(range(n))
+        self.parity: List[int] = [0] * n
+        self.size: List[int] = [1] * n
+
+
+    def find(self, r: int) -> Tuple[int, int]:
+        """Gốc của tập chứa r và chiều của r so với gốc
+        """
+
+        path: List[int] = []
+        while self.parent[r] != r:
+            path.append(r)
+            r = self.parent[r]
+        root: int = r
+        # Nén đường đi, cộng dồn chiều từ gần gốc ra ngoài
+        parity: int = 0
+        for node in reversed(path):
+            parity ^= self.parity[node]
+            self.parity[node] = parity
+            self.parent[node] = root
+
+        return root, (self.parity[path[0]] if len(path) > 0 else 0)
+
+
+    def union(self, a: int, b: int, relation: int) -> bool:
+        """Ghép tập của a và b với ràng buộc chiều(b) = chiều(a) xor relation
+
+        Returns:
+            bool: False nếu a, b đã cùng tập (ràng buộc không được thêm)
+        """
+
+        root_a, parity_a = self.find(a)
+        root_b, parity_b = self.find(b)
+        if root_a == root_b:
+            return False
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.parity[root_b] = parity_a ^ relation ^ parity_b
+        self.size[root_a] += self.size[root_b]
+
+        return True
+
+
+# Số lượt bỏ phiếu tối đa sau khi dựng rừng khung
+MAX_VOTE_PASSES: int = 10
+
+
+def strand_evidence(store: ReadStore, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Bằng chứng về chiều tương đối giữa các cặp read: hai read có chung một k-mer chính tắc thì cùng chiều
+    nếu k-mer đó cùng chiều trong hai read, ngược lại thì ngược chiều. Các k-mer đối xứng (k chẵn) và các k-mer xuất hiện
+    theo cả hai chiều trong cùng một read không cho biết chiều nên bị bỏ qua. Với mỗi k-mer chính tắc chỉ các read liền nhau
+    (theo id) trong nhóm được nối với nhau nên số cặp tỉ lệ với số lần xuất hiện
+
+    Args:
+        store (ReadStore): Kho chứa các read
+        k (int): Độ dài k-mer
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Read a, read b (a < b), số k-mer cho thấy cùng chiều
+            và số k-mer cho thấy ngược chiều của từng cặp
+    """
+
+    keys: List[np.ndarray] = []
+    read_ids: List[np.ndarray] = []
+    forwards: List[np.ndarray] = []
+    for read_id in range(len(store)):
+        _, canonical, forward, palindromic = canonical_kmer_array(codes=store.codes(read_id), k=k)
+        keep: np.ndarray = ~palindromic
+        keys.append(canonical[keep])
+        read_ids.append(np.full(shape=int(keep.sum()), fill_value=read_id, dtype=np.int64))
+        forwards.append(forward[keep])
+
+    empty: np.ndarray = np.empty(shape=0, dtype=np.int64)
+    if len(keys) == 0:
+        return empty, empty, empty, empty
+    all_keys: np.ndarray = np.concatenate(keys)
+    all_read_ids: np.ndarray = np.concatenate(read_ids)
+    all_forwards: np.ndarray = np.concatenate(forwards).astype(np.int8)
+    order: np.ndarray = np.lexsort((all_forwards, all_read_ids, all_keys))
+    all_keys, all_read_ids, all_forwards = all_keys[order], all_read_ids[order], all_forwards[order]
+
+    # Gộp các lần xuất hiện của cùng (k-mer, read), bỏ những k-mer xuất hiện theo cả hai chiều trong read
+    first: np.ndarray = np.ones(shape=len(all_keys), dtype=bool)
+    first[1:] = (all_keys[1:] != all_keys[:-1]) | (all_read_ids[1:] != all_read_ids[:-1])
+    starts: np.ndarray = np.flatnonzero(first)
+    ends: np.ndarray = np.append(starts[1:], len(all_keys)) - 1
+    consistent: np.ndarray = all_forwards[starts] == all_forwards[ends]
+    starts = starts[consistent]
+    all_keys, all_read_ids, all_forwards = all_keys[starts], all_read_ids[starts], all_forwards[starts]
+
+    # Nối các read liền nhau trong nhóm của mỗi k-mer
+    linked: np.ndarray = np.flatnonzero(all_keys[1:] == all_keys[:-1])
+    a: np.ndarray = all_read_ids[linked]
+    b: np.ndarray = all_read_ids[linked + 1]
+    opposite: np.ndarray = (all_forwards[linked] != all_forwards[linked + 1]).astype(np.int64)
+    n: int = len(store)
+    pairs, inverse = np.unique(a * n + b, return_inverse=True)
+    support_opposite: np.ndarray = np.bincount(inverse, weights=opposite, minlength=len(pairs)).astype(np.int64)
+    support_same: np.ndarray = np.bincount(inverse, minlength=len(pairs)).astype(np.int64) - support_opposite
+
+    return pairs // n, pairs % n, support_same, support_opposite
+
+
+def orient_reads(store: ReadStore, k: int) -> Tuple[ReadStore, np.ndarray, List[Tuple[int, int, int, int]]]:
+    """Đưa tất cả các read về cùng một mạch dựa trên k-mer chính tắc. Mỗi cặp read có chung k-mer nhận một quan hệ
+    (cùng hoặc ngược chiều) theo đa số các k-mer chung, trọng số là độ chênh lệch số k-mer ủng hộ. Chiều của các read được
+    dựng từ rừng khung trọng số lớn nhất (các đoạn trùng dài quyết định trước, một k-mer lặp đảo ngược không ghi đè được)
+    rồi mỗi read được bỏ phiếu lại theo tổng trọng số các cặp của nó cho đến khi ổn định.
+    Read có id nhỏ nhất của mỗi nhóm liên thông giữ nguyên chiều, các read ngược chiều với nó được thay bằng chuỗi bổ sung ngược
+    Đây là một heuristic trên các read chứ không phải đồ thị hai chiều (bidirected) trên k-mer chính tắc: các read mà
+    bằng chứng mâu thuẫn nhau (read ghép từ hai mạch, lặp đảo ngược) chỉ được báo trong danh sách mâu thuẫn, không được tách ra
+
+    Args:
+        store (ReadStore): Kho chứa các read
+        k (int): Độ dài k-mer
+
+    Returns:
+        Tuple[ReadStore, np.ndarray, List[Tuple[int, int, int, int]]]: Kho read đã cùng chiều, chiều của từng read so với
+            read gốc (1 hoặc -1) và các cặp có bằng chứng mâu thuẫn với chiều được chọn (read a, read b, số k-mer cùng chiều,
+            số k-mer ngược chiều)
+    """
+
+    n: int = len(store)
+    strands: np.ndarray = np.ones(shape=n, dtype=np.int8)
+    if n == 0:
+        return store, strands, []
+
+    a, b, same, opposite = strand_evidence(store=store, k=k)
+    relation: List[int] = (opposite > same).astype(np.int64).tolist()
+    weight: List[int] = np.abs(same - opposite).tolist()
+    a_list: List[int] = a.tolist()
+    b_list: List[int] = b.tolist()
+
+    # Rừng khung trọng số lớn nhất, cặp hòa (trọng số 0) không quyết định chiều
+    union: StrandUnion = StrandUnion(n=n)
+    for p in np.argsort(-np.abs(same - opposite), kind="stable").tolist():
+        if weight[p] > 0:
+            union.union(a=a_list[p], b=b_list[p], relation=relation[p])
+    flip: List[int] = [union.find(r)[1] for r in range(n)]
+
+    # Bỏ phiếu: đổi chiều một read nếu tổng trọng số các cặp phản đối lớn hơn các cặp ủng hộ,
+    # mỗi lần đổi làm tăng tổng trọng số được thỏa mãn nên vòng lặp dừng
+    incident: List[List[int]] = [[] for _ in range(n)]
+    for p in range(len(a_list)):
+        if weight[p] > 0:
+            incident[a_list[p]].append(p)
+            incident[b_list[p]].append(p)
+    for _ in range(MAX_VOTE_PASSES):
+        changed: bool = False
+        for r in range(n):
+            score: int = 0
+            for p in incident[r]:
+                other: int = b_list[p] if a_list[p] == r else a_list[p]
+                score += weight[p] if flip[r] ^ flip[other] == relation[p] else -weight[p]
+            if score < 0:
+                flip[r] ^= 1
+                changed = True
+        if not changed:
+            break
+
+    # Read nhỏ nhất của mỗi nhóm liên thông giữ nguyên chiều
+    root_flip: Dict[int, int] = {}
+    for r in range(n):
+        root_flip.setdefault(union.find(r)[0], flip[r])
+    flipped: List[bool] = [flip[r] != root_flip[union.find(r)[0]] for r in range(n)]
+
+    conflicts: List[Tuple[int, int, int, int]] = []
+    same_list: List[int] = same.tolist()
+    opposite_list: List[int] = opposite.tolist()
+    for p in range(len(a_list)):
+        against: int = same_list[p] if flipped[a_list[p]] != flipped[b_list[p]] else opposite_list[p]
+        if against > 0:
+            conflicts.append((a_list[p], b_list[p], same_list[p], opposite_list[p]))
+
+    if not any(flipped):
+        return store, strands, conflicts
+
+    strands[np.array(flipped)] = -1
+    oriented: ReadStore = ReadStore.from_sequences(
+        seqs=(reverse_complement(store.sequence(r)) if flipped[r] else store.sequence(r) for r in range(n)))
+
+    return oriented, strands, conflicts
@@ -0,0 +1,244 @@
+from bisect import bisect_left
+from typing import List, Dict, Iterator, Tuple, Sequence, Hashable, Optional
+from store import ReadStore
+from kmer import kmer_keys
+
+
+def z_function(s: Sequence) -> List[int]:
+    """Thuật toán Z: z[i] là độ dài tiền tố chung dài nhất của s và s[i:]
+
+    Args:
+        s (Sequence): Chuỗi hoặc dãy cần tính
+
+    Returns:
+        List[int]: Mảng Z (z[0] = len(s))
+    """
+
+    n: int = len(s)
+    z: List[int] = [0] * n
+    if n == 0:
+        return z
+    z[0] = n
+    left: int = 0
+    right: int = 0
+    for i in range(1, n):
+        if i < right:
+            z[i] = min(right - i, z[i - left])
+        while i + z[i] < n and s[z[i]] == s[i + z[i]]:
+            z[i] += 1
+        if i + z[i] > right:
+            left = i
+            right = i + z[i]
+
+    return z
+
+
+def suffix_prefix_overlap(first_str: str, second_str: str, min_length: int) -> int:
+    """Độ dài lớn nhất i >= min_length sao cho hậu tố độ dài i của first_str trùng tiền tố độ dài i của second_str
+
+    Args:
+        first_str (str): Chuỗi đứng trước
+        second_str (str): Chuỗi đứng sau
+        min_length (int): Độ dài trùng nhỏ nhất
+
+    Returns:
+        int: Độ dài đoạn trùng, -1 nếu không có
+    """
+
+    len_first: int = len(first_str)
+    len_second: int = len(second_str)
+    # Ký tự ngăn cách không xuất hiện trong read nên giá trị Z không vượt qua được second_str
+    z: List[int] = z_function(second_str + "\0" + first_str)
+    start: int = len_second + 1
+    # Vị trí p càng nhỏ thì đoạn trùng len_first - p càng dài
+    for p in range(max(0, len_first - len_second), len_first - min_length + 1):
+        if z[start + p] >= len_first - p:
+            return len_first - p
+
+    return -1
+
+
+class OverlapIndex(object):
+    """
+    Chỉ mục các read theo k-mer đầu tiên (seed) độ dài min_length.
+    Một read B chỉ có thể nối sau read A nếu seed của B xuất hiện trong A, nên chỉ các cặp có chung seed mới cần được kiểm tra.
+    """
+
+    def __init__(self, store: ReadStore, min_length: int) -> None:
+        """
+
+        Args:
+            store (ReadStore): Kho chứa các read
+            min_length (int): Độ dài đoạn trùng nhỏ nhất, cũng là độ dài seed
+        """
+
+        self.store: ReadStore = store
+        self.min_length: int = min_length
+        self.prefix_index: Dict[int, List[int]] = {}
+
+        for read_id in range(len(store)):
+            self.add(read_id=read_id)
+
+
+    def add(self, read_id: int) -> None:
+        """Thêm seed của một read vào chỉ mục
+
+        Args:
+            read_id (int): id của read trong store
+        """
+
+        codes = self.store.codes(read_id)
+        # Read có ký tự khác ACGT ngay trong seed thì không có khóa nên không được đánh chỉ mục
+        for _, seed, _, _ in kmer_keys(codes=codes[:self.min_length], k=self.min_length):
+            self.prefix_index.setdefault(seed, []).append(read_id)
+
+
+    def candidates(self, read_id: int) -> List[int]:
+        """Các read có seed xuất hiện trong read hiện tại (ứng viên nối sau read hiện tại)
+
+        Args:
+            read_id (int): id của read
+
+        Returns:
+            List[int]: id của các read ứng viên, theo thứ tự tăng dần
+        """
+
+        found: Dict[int, None] = {}
+        for _, k_mer, _, _ in kmer_keys(codes=self.store.codes(read_id), k=self.min_length):
+            for other in self.prefix_index.get(k_mer, ()):
+                if other != read_id:
+                    found[other] = None
+
+        return sorted(found)
+
+
+    def overlaps(self, read_id: int) -> Iterator[Tuple[int, int]]:
+        """Tìm tất cả các read có tiền tố trùng với hậu tố của read hiện tại
+
+        Args:
+            read_id (int): id của read
+
+        Yields:
+            Tuple[int, int]: id của read nối sau và độ dài đoạn trùng lớn nhất
+        """
+
+        first_str: str = self.store.sequence(read_id)
+        for other in self.candidates(read_id=read_id):
+            pos: int = suffix_prefix_overlap(first_str=first_str, second_str=self.store.sequence(other), min_length=self.min_length)
+            if pos != -1:
+                yield other, pos
+
+
+def find_overlaps(store: ReadStore, min_length: int) -> Tuple[Dict[int, List[Tuple[int, int, int]]], Dict[int, List[Tuple[int, int, int]]]]:
+    """Tìm quan hệ chồng lên nhau của tất cả các read theo id, không cần tạo object Read
+
+    Args:
+        store (ReadStore): Kho chứa các read
+        min_length (int): Độ dài đoạn trùng nhỏ nhất
+
+    Returns:
+        Tuple[Dict, Dict]: front_of và behind_of của mỗi read dạng (id read kia, vị trí bắt đầu, vị trí kết thúc)
+    """
+
+    index: OverlapIndex = OverlapIndex(store=store, min_length=min_length)
+    front_of: Dict[int, List[Tuple[int, int, int]]] = {}
+    behind_of: Dict[int, List[Tuple[int, int, int]]] = {}
+    for first in range(len(store)):
+        length: int = store.length(first)
+        for second, pos in index.overlaps(read_id=first):
+            front_of.setdefault(first, []).append((second, length - pos, pos))
+            behind_of.setdefault(second, []).append((first, length - pos, pos))
+
+    return front_of, behind_of
+
+
+class OverlapIntervals(object):
+    """
+    Các đoạn trùng của mỗi read được đánh chỉ mục theo read kia (read -> read kia -> độ lệch tọa độ).
+    Hậu tố của read từ vị trí start trùng với tiền tố của read nằm sau nên vị trí i của read là vị trí i - start của read nằm sau,
+    tiền tố của read trùng với hậu tố của read nằm trước từ vị trí start nên vị trí i của read là vị trí start + i của read nằm trước.
+    Một lần xuất hiện đã được tính nếu vị trí tương ứng của nó trong một read kia nằm trong các vị trí đã biết của read đó,
+    việc kiểm tra một read kia chỉ là một lần tra dict và một lần tìm kiếm nhị phân trên các vị trí của nó.
+    Khóa của read có thể là id hoặc object Read, miễn là thống nhất với khóa trong positions khi truy vấn.
+    """
+
+    def __init__(self, front_of: Dict[Hashable, List[Tuple[Hashable, int, int]]],
+                 behind_of: Dict[Hashable, List[Tuple[Hashable, int, int]]]) -> None:
+        """
+
+        Args:
+            front_of (Dict): Read -> các (read nằm sau, vị trí bắt đầu, vị trí kết thúc) như find_overlaps
+            behind_of (Dict): Read -> các (read nằm trước, vị trí bắt đầu, vị trí kết thúc) như find_overlaps
+        """
+
+        # read -> read nằm sau -> (start, end)
+        self.front: Dict[Hashable, Dict[Hashable, Tuple[int, int]]] = {}
+        # read -> read nằm trước -> (start, end)
+        self.behind: Dict[Hashable, Dict[Hashable, Tuple[int, int]]] = {}
+
+        for read, overlaps in front_of.items():
+            if len(overlaps) > 0:
+                self.front[read] = {other: (start, end) for other, start, end in overlaps}
+        for read, overlaps in behind_of.items():
+            if len(overlaps) > 0:
+                self.behind[read] = {other: (start, end) for other, start, end in overlaps}
+
+
+    def add(self, first: Hashable, second: Hashable, start: int, end: int) -> None:
+        """Thêm một đoạn trùng mới: hậu tố của first từ vị trí start trùng với tiền tố độ dài end của second
+
+        Args:
+            first (Hashable): Read nằm trước
+            second (Hashable): Read nằm sau
+            start (int): Vị trí bắt đầu như trong front_of
+            end (int): Vị trí kết thúc như trong front_of
+        """
+
+        self.front.setdefault(first, {})[second] = (start, end)
+        self.behind.setdefault(second, {})[first] = (start, end)
+
+
+    @staticmethod
+    def contains(positions: List[int], p: int) -> bool:
+        """Kiểm tra p có nằm trong danh sách vị trí đã sắp xếp tăng dần hay không bằng tìm kiếm nhị phân
+        """
+
+        j: int = bisect_left(positions, p)
+
+        return j < len(positions) and positions[j] == p
+
+
+    def is_covered(self, read: Hashable, i: int, length: int, positions: Dict[Hashable, List[int]]) -> bool:
+        """Kiểm tra đoạn [i, i + length) của read có nằm trong đoạn trùng với một read khác mà tại vị trí tương ứng
+        read kia cũng có cùng k-mer (vị trí trong positions) hay không
+
+        Args:
+            read (Hashable): Read đang xét
+            i (int): Vị trí trong read
+            length (int): Độ dài đoạn cần kiểm tra
+            positions (Dict[Hashable, List[int]]): Vị trí (tăng dần) của cùng k-mer trong các read đã được tính
+
+        Returns:
+            bool: True nếu lần xuất hiện này đã được tính
+        """
+
+        front: Dict[Hashable, Tuple[int, int]] = self.front.get(read, {})
+        behind: Dict[Hashable, Tuple[int, int]] = self.behind.get(read, {})
+        # Duyệt bên nhỏ hơn: các read đã chứa k-mer, hoặc các read chồng lên read hiện tại
+        if len(positions) <= len(front) + len(behind):
+            for other, other_positions in positions.items():
+                pos: Optional[Tuple[int, int]] = front.get(other)
+                if pos is not None and i >= pos[0] and i - pos[0] + length <= pos[1] and self.contains(other_positions, i - pos[0]):
+                    return True
+                pos = behind.get(other)
+                if pos is not None and i + length <= pos[1] and self.contains(other_positions, pos[0] + i):
+                    return True
+        else:
+            for other, pos in front.items():
+                if i >= pos[0] and i - pos[0] + length <= pos[1] and other in positions and self.contains(positions[other], i - pos[0]):
+                    return True
+            for other, pos in behind.items():
+                if i + length <= pos[1] and other in positions and self.contains(positions[other], pos[0] + i):
+                    return True
+
+        return False
@@ -0,0 +1,286 @@
+import os
+import json
+from typing import List, Dict, Iterable, Iterator, Optional, Union
+import numpy as np
+
+
+# Bảng mã hóa 2 bit cho các nucleotide, các ký tự khác được mã hóa là 4
+BASES: bytes = b"ACGT"
+INVALID_CODE: int = 4
+ENCODE_TABLE: np.ndarray = np.full(shape=256, fill_value=INVALID_CODE, dtype=np.uint8)
+for _code, _base in enumerate(BASES):
+    ENCODE_TABLE[_base] = _code
+DECODE_TABLE: np.ndarray = np.frombuffer(BASES, dtype=np.uint8)
+
+# Số read được mã hóa trong một lần gọi numpy
+BATCH_SIZE: int = 4096
+
+
+def encode(seq: Union[str, bytes]) -> np.ndarray:
+    """Mã hóa một chuỗi thành mảng các mã 0..3 (ký tự không phải ACGT có mã 4)
+
+    Args:
+        seq (Union[str, bytes]): Chuỗi cần mã hóa
+
+    Returns:
+        np.ndarray: Mảng uint8 các mã
+    """
+
+    if isinstance(seq, str):
+        seq = seq.encode("ascii")
+
+    return ENCODE_TABLE[np.frombuffer(seq, dtype=np.uint8)]
+
+
+def decode(codes: np.ndarray) -> str:
+    """Giải mã một mảng các mã 0..3 thành chuỗi
+
+    Args:
+        codes (np.ndarray): Mảng các mã
+
+    Returns:
+        str: Chuỗi tương ứng
+    """
+
+    return DECODE_TABLE[codes].tobytes().decode("ascii")
+
+
+class ReadStore(object):
+    """
+    Lưu tất cả các read trong một vùng nhớ liên tục, mỗi nucleotide chiếm 2 bit.
+    Mỗi read bắt đầu tại một byte mới, vị trí byte đầu và độ dài của read được lưu trong hai mảng offsets và lengths.
+    Các read hiếm hoi chứa ký tự khác ACGT được lưu nguyên dạng chuỗi trong extras.
+    """
+
+    def __init__(self, packed: Optional[np.ndarray]=None, offsets: Optional[np.ndarray]=None,
+                 lengths: Optional[np.ndarray]=None, extras: Optional[Dict[int, str]]=None) -> None:
+        """
+
+        Args:
+            packed (np.ndarray, optional): Vùng nhớ chứa các nucleotide đã nén. Defaults to None.
+            offsets (np.ndarray, optional): Vị trí byte đầu tiên của mỗi read. Defaults to None.
+            lengths (np.ndarray, optional): Độ dài (số nucleotide) của mỗi read. Defaults to None.
+            extras (Dict[int, str], optional): Các read chứa ký tự khác ACGT. Defaults to None.
+        """
+
+        self._packed: np.ndarray = packed if packed is not None else np.empty(shape=0, dtype=np.uint8)
+        self._offsets: np.ndarray = offsets if offsets is not None else np.empty(shape=0, dtype=np.int64)
+        self._lengths: np.ndarray = lengths if lengths is not None else np.empty(shape=0, dtype=np.int64)
+        self._nbytes: int = int(self._offsets[-1] + (self._lengths[-1] + 3) // 4) if len(self._offsets) > 0 else 0
+        self._nreads: int = len(self._offsets)
+        self.extras: Dict[int, str] = extras if extras is not None else {}
+
+
+    @property
+    def packed(self) -> np.ndarray:
+        return self._packed[:self._nbytes]
+
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self._offsets[:self._nreads]
+
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self._lengths[:self._nreads]
+
+
+    @staticmethod
+    def from_sequences(seqs: Iterable[Union[str, bytes]]) -> "ReadStore":
+        """Tạo ReadStore từ một iterable (có thể là generator) các chuỗi
+
+        Args:
+            seqs (Iterable[Union[str, bytes]]): Các read
+
+        Returns:
+            ReadStore: Kho chứa các read
+        """
+
+        store: ReadStore = ReadStore()
+        store.extend(seqs=seqs)
+
+        return store
+
+
+    def _reserve(self, nbytes: int, nreads: int) -> None:
+        """Mở rộng các mảng (gấp đôi) để có thể thêm nbytes byte và nreads read
+        """
+
+        if self._nbytes + nbytes > len(self._packed):
+            packed: np.ndarray = np.empty(shape=max(2 * len(self._packed), self._nbytes + nbytes), dtype=np.uint8)
+            packed[:self._nbytes] = self._packed[:self._nbytes]
+            self._packed = packed
+        if self._nreads + nreads > len(self._offsets):
+            capacity: int = max(2 * len(self._offsets), self._nreads + nreads)
+            offsets: np.ndarray = np.empty(shape=capacity, dtype=np.int64)
+            offsets[:self._nreads] = self._offsets[:self._nreads]
+            lengths: np.ndarray = np.empty(shape=capacity, dtype=np.int64)
+            lengths[:self._nreads] = self._lengths[:self._nreads]
+            self._offsets = offsets
+            self._lengths = lengths
+
+
+    def _append_batch(self, batch: List[bytes]) -> None:
+        """Nén và thêm một nhóm các read vào cuối kho
+        """
+
+        lengths: np.ndarray = np.fromiter((len(seq) for seq in batch), dtype=np.int64, count=len(batch))
+        # Mỗi read được đệm thêm cho đủ bội của 4 nucleotide để bắt đầu tại một byte mới
+        padded: np.ndarray = (lengths + 3) // 4 * 4
+        codes: np.ndarray = encode(b"".join(seq + b"A" * (-len(seq) % 4) for seq in batch))
+
+        # Các read chứa ký tự khác ACGT được lưu riêng
+        invalid: np.ndarray = np.flatnonzero(codes == INVALID_CODE)
+        if len(invalid) > 0:
+            starts: np.ndarray = np.cumsum(padded) - padded
+            for i in np.unique(np.searchsorted(starts, invalid, side="right") - 1):
+                self.extras[self._nreads + int(i)] = batch[i].decode("ascii")
+            codes[invalid] = 0
+
+        codes = codes.reshape(-1, 4)
+        packed: np.ndarray = (codes[:, 0] << 6) | (codes[:, 1] << 4) | (codes[:, 2] << 2) | codes[:, 3]
+
+        self._reserve(nbytes=len(packed), nreads=len(batch))
+        self._packed[self._nbytes:self._nbytes + len(packed)] = packed
+        self._offsets[self._nreads:self._nreads + len(batch)] = self._nbytes + (np.cumsum(padded) - padded) // 4
+        self._lengths[self._nreads:self._nreads + len(batch)] = lengths
+        self._nbytes += len(packed)
+        self._nreads += len(batch)
+
+
+    def extend(self, seqs: Iterable[Union[str, bytes]]) -> None:
+        """Thêm các read vào cuối kho
+
+        Args:
+            seqs (Iterable[Union[str, bytes]]): Các read cần thêm
+        """
+
+        batch: List[bytes] = []
+        for seq in seqs:
+            batch.append(seq.encode("ascii") if isinstance(seq, str) else bytes(seq))
+            if len(batch) == BATCH_SIZE:
+                self._append_batch(batch=batch)
+                batch = []
+        if len(batch) > 0:
+            self._append_batch(batch=batch)
+
+
+    def append(self, seq: Union[str, bytes]) -> int:
+        """Thêm một read vào cuối kho
+
+        Args:
+            seq (Union[str, bytes]): Read cần thêm
+
+        Returns:
+            int: id của read vừa thêm
+        """
+
+        self.extend(seqs=[seq])
+
+        return self._nreads - 1
+
+
+    def length(self, n: int) -> int:
+        """Độ dài của read thứ n
+        """
+
+        return int(self._lengths[n])
+
+
+    def codes(self, n: int) -> np.ndarray:
+        """Lấy các mã 2 bit của read thứ n (ký tự khác ACGT có mã 4)
+
+        Args:
+            n (int): id của read
+
+        Returns:
+            np.ndarray: Mảng uint8 các mã
+        """
+
+        if n in self.extras:
+            return encode(self.extras[n])
+
+        length: int = int(self._lengths[n])
+        offset: int = int(self._offsets[n])
+        packed: np.ndarray = self._packed[offset:offset + (length + 3) // 4]
+        codes: np.ndarray = np.empty(shape=(len(packed), 4), dtype=np.uint8)
+        codes[:, 0] = packed >> 6
+        codes[:, 1] = (packed >> 4) & 3
+        codes[:, 2] = (packed >> 2) & 3
+        codes[:, 3] = packed & 3
+
+        return codes.reshape(-1)[:length]
+
+
+    def sequence(self, n: int) -> str:
+        """Giải mã read thứ n thành chuỗi
+
+        Args:
+            n (int): id của read
+
+        Returns:
+            str: Chuỗi của read
+        """
+
+        if n in self.extras:
+            return self.extras[n]
+
+        return decode(self.codes(n))
+
+
+    def __getitem__(self, n: int) -> str:
+        return self.sequence(n)
+
+
+    def __iter__(self) -> Iterator[str]:
+        for n in range(self._nreads):
+            yield self.sequence(n)
+
+
+    def __len__(self) -> int:
+        return self._nreads
+
+
+    def nbytes(self) -> int:
+        """Tổng số byte bộ nhớ của kho
+        """
+
+        return self.packed.nbytes + self.offsets.nbytes + self.lengths.nbytes + sum(len(seq) for seq in self.extras.values())
+
+
+    def save(self, dirname: str) -> None:
+        """Lưu kho vào một thư mục dưới dạng các file .npy có thể memory-map
+
+        Args:
+            dirname (str): Thư mục lưu
+        """
+
+        os.makedirs(dirname, exist_ok=True)
+        np.save(os.path.join(dirname, "packed.npy"), self.packed)
+        np.save(os.path.join(dirname, "offsets.npy"), self.offsets)
+        np.save(os.path.join(dirname, "lengths.npy"), self.lengths)
+        with open(os.path.join(dirname, "extras.json"), mode="w") as f:
+            json.dump({str(n): seq for n, seq in self.extras.items()}, f)
+
+
+    @staticmethod
+    def open(dirname: str, mmap: bool=True) -> "ReadStore":
+        """Đọc kho đã lưu bằng ReadStore.save, mặc định memory-map các mảng mà không đọc vào bộ nhớ
+
+        Args:
+            dirname (str): Thư mục đã lưu
+            mmap (bool, optional): Có memory-map hay không. Defaults to True.
+
+        Returns:
+            ReadStore: Kho chứa các read
+        """
+
+        mmap_mode: Optional[str] = "r" if mmap else None
+        packed: np.ndarray = np.load(os.path.join(dirname, "packed.npy"), mmap_mode=mmap_mode)
+        offsets: np.ndarray = np.load(os.path.join(dirname, "offsets.npy"), mmap_mode=mmap_mode)
+        lengths: np.ndarray = np.load(os.path.join(dirname, "lengths.npy"), mmap_mode=mmap_mode)
+        with open(os.path.join(dirname, "extras.json"), mode="r") as f:
+            extras: Dict[int, str] = {int(n): seq for n, seq in json.load(f).items()}
+
+        return ReadStore(packed=packed, offsets=offsets, lengths=lengths, extras=extras)
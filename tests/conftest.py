@@ -0,0 +1,33 @@
+import os
+import sys
+
+
+# Các module nằm phẳng ở thư mục gốc của repo
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+from typing import Any, Callable, Dict
+
+import pytest
+
+
+def describe_graph(graph: Any) -> Dict[str, Any]:
+    """Toàn bộ trạng thái quan sát được của một Graph (thứ tự đỉnh, cạnh, bội, đường đi, chỗ cắt và đoạn trùng của các read)
+    để so sánh hai đồ thị được dựng theo hai cách khác nhau
+    """
+
+    return {"k": graph.k,
+            "vertices": [vertex.key for vertex in graph.vertex_list],
+            "edges": [(edge.key, edge.in_vertex.key, edge.out_vertex.key, edge.multiplicities) for edge in graph.edge_list],
+            "reads": [read.sequence for read in graph.read_list],
+            "paths": [[(position, edge.key) for position, edge in read.path()] for read in graph.read_list],
+            "breaks": [sorted(read.slot_position[slot] for slot in read.breaks) for read in graph.read_list],
+            "overlaps": graph.overlaps_by_id(),
+            "unbalanced": sorted((vertex.key, diff) for vertex, diff in graph.unbalanced.items())}
+
+
+@pytest.fixture
+def graph_state() -> Callable[[Any], Dict[str, Any]]:
+    return describe_graph
@@ -0,0 +1,47 @@
+"""Thêm read vào đồ thị đã dựng phải cho đúng đồ thị như dựng lại từ đầu với các read mới ở cuối
+"""
+import os
+from typing import List
+
+import pytest
+
+from assembly import Assembler
+from benchmark import random_genome, simulate_reads
+from checkpoint import load_graph, save_graph
+from graph import Graph
+from loader import Loader
+
+
+DATA_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SIMULATED: List[str] = simulate_reads(genome=random_genome(length=1000, seed=10), coverage=8, read_length=50, seed=10)
+
+
+@pytest.mark.parametrize("name, k", [("c5", 6), ("rep1", 8), ("simulated", 9)])
+@pytest.mark.parametrize("batches", [2, 3])
+def test_add_reads_matches_rebuild(graph_state, name: str, k: int, batches: int) -> None:
+    reads: List[str] = SIMULATED if name == "simulated" else list(Loader.load(filename=os.path.join(DATA_DIR, name + ".fastq")))
+    # Xáo thứ tự để các read mới chồng lên cả read đứng trước và đứng sau chúng trên bộ gen
+    reads = reads[1::2] + reads[0::2]
+    bounds: List[int] = [len(reads) * b // batches for b in range(batches + 1)]
+    graph: Graph = Graph(seqs=reads[:bounds[1]], k=k, threshold=0)
+    for b in range(1, batches):
+        graph.add_reads(seqs=reads[bounds[b]:bounds[b + 1]])
+
+    assert graph_state(graph) == graph_state(Graph(seqs=reads, k=k, threshold=0))
+
+
+def test_add_reads_after_checkpoint(graph_state, tmp_path) -> None:
+    half: int = len(SIMULATED) // 2
+    save_graph(graph=Graph(seqs=SIMULATED[:half], k=9, threshold=0), dirname=str(tmp_path))
+    graph: Graph = load_graph(dirname=str(tmp_path), mmap=False)
+    graph.add_reads(seqs=SIMULATED[half:])
+
+    assert graph_state(graph) == graph_state(Graph(seqs=SIMULATED, k=9, threshold=0))
+
+
+def test_add_reads_rejected_after_superpath(tmp_path) -> None:
+    assembly: Assembler = Assembler(filename=os.path.join(DATA_DIR, "c1.fastq"), k=6)
+    assembly.make_superpath()
+
+    with pytest.raises(ValueError):
+        assembly.add_reads(filename=os.path.join(DATA_DIR, "c4.fastq"))
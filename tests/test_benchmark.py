@@ -0,0 +1,87 @@
+"""Bộ đo hiệu năng: compare phải báo đúng các giai đoạn chậm đi và main chạy được trên một trường hợp nhỏ
+"""
+import copy
+import json
+import os
+from typing import Any, Dict, List
+
+import pytest
+
+from benchmark import BENCHMARK_STAGES, compare, main, random_genome, run_case, simulate_reads
+
+
+def report(seconds: float, matches: bool=True) -> Dict[str, Any]:
+    case: Dict[str, Any] = {"length": 1000, "repeat_fraction": 0.0, "repeat_length": 0, "coverage": 20.0, "read_length": 100,
+                            "error_rate": 0.0, "k": 21, "seed": 0, "matches": matches,
+                            "seconds": {stage: seconds for stage in BENCHMARK_STAGES}}
+    return {"cases": [case]}
+
+
+def test_compare_flags_only_regressions_above_tolerance() -> None:
+    baseline: Dict[str, Any] = report(seconds=1.0)
+
+    assert compare(baseline=baseline, current=report(seconds=1.19), tolerance=1.2) == []
+    assert compare(baseline=baseline, current=report(seconds=0.5), tolerance=1.2) == []
+    regressions: List[str] = compare(baseline=baseline, current=report(seconds=1.5), tolerance=1.2)
+    assert len(regressions) == len(BENCHMARK_STAGES)
+    assert all("1.50" in line for line in regressions)
+
+    # Chỉ một giai đoạn chậm đi
+    current: Dict[str, Any] = copy.deepcopy(baseline)
+    current["cases"][0]["seconds"][BENCHMARK_STAGES[0]] = 3.0
+    assert [BENCHMARK_STAGES[0] in line for line in compare(baseline=baseline, current=current)] == [True]
+
+
+def test_compare_flags_lost_matches_and_skips_new_cases() -> None:
+    baseline: Dict[str, Any] = report(seconds=1.0)
+
+    assert len(compare(baseline=baseline, current=report(seconds=1.0, matches=False))) == 1
+    for name, value in [("length", 2000), ("workers", 4)]:
+        other: Dict[str, Any] = report(seconds=10.0, matches=False)
+        other["cases"][0][name] = value
+        assert compare(baseline=baseline, current=other) == []
+
+
+def test_simulated_reads_cover_the_genome() -> None:
+    genome: str = random_genome(length=500, repeat_fraction=0.2, repeat_length=30, seed=3)
+    reads: List[str] = simulate_reads(genome=genome, coverage=5, read_length=50, seed=3)
+
+    assert len(genome) == 500
+    assert reads[0] == genome[:50] and reads[-1] == genome[-50:]
+    assert all(read in genome for read in reads)
+    noisy: List[str] = simulate_reads(genome=genome, coverage=5, read_length=50, error_rate=0.1, seed=3)
+    assert sum(read not in genome for read in noisy) > 0
+
+
+def test_run_case_assembles_a_small_genome(tmp_path) -> None:
+    result: Dict[str, Any] = run_case({"length": 600, "repeat_fraction": 0.0, "repeat_length": 0, "coverage": 15.0, "read_length": 60,
+                                       "error_rate": 0.0, "k": 15, "seed": 1, "workdir": str(tmp_path)})
+
+    assert result["error"] is None and result["matches"]
+    assert "make_superpath" in result["seconds"]
+    # File FASTQ tạm bị xóa sau khi chạy
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_main_smoke(tmp_path, capsys) -> None:
+    output: str = os.path.join(str(tmp_path), "benchmark.json")
+    args: List[str] = ["--sizes", "400", "--coverage", "15", "--read-length", "50", "-k", "13", "--workers", "1", "2",
+                       "--no-isolate", "--output", output]
+
+    assert main(args) == 0
+    with open(output) as f:
+        written: Dict[str, Any] = json.load(f)
+    assert [(case["length"], case["workers"]) for case in written["cases"]] == [(400, 1), (400, 2)]
+    # Chỉ bước đếm k-mer chạy song song và được đo riêng
+    assert ["count_kmers" in case["seconds"] for case in written["cases"]] == [False, True]
+    assert "400" in capsys.readouterr().out
+
+    # So sánh với chính nó không có gì chậm đi quá nhiều lần, với một lần chạy nhanh hơn nhiều thì bị báo
+    assert main(args + ["--baseline", output, "--tolerance", "1000"]) == 0
+    fast: Dict[str, Any] = copy.deepcopy(written)
+    for case in fast["cases"]:
+        case["seconds"] = {stage: seconds / 1e6 for stage, seconds in case["seconds"].items()}
+    baseline: str = os.path.join(str(tmp_path), "fast.json")
+    with open(baseline, "w") as f:
+        json.dump(fast, f)
+    assert main(args + ["--baseline", baseline]) == 1
@@ -0,0 +1,83 @@
+"""Số đường đi Euler tính chính xác theo định lý BEST phải bằng số đường đi đếm vét cạn trên các đồ thị nhỏ
+"""
+import math
+from typing import Dict, List, Optional
+
+import pytest
+
+from graph import Edge, Graph, Vertex
+
+
+def count_from(vertex: Vertex, end: Optional[Vertex], remaining: Dict[Edge, int], left: int) -> int:
+    # Các bản sao của một cạnh bội được coi là phân biệt như trong ma trận Laplacian
+    if left == 0:
+        return 1 if end is None or vertex == end else 0
+    total: int = 0
+    for edge in vertex.out_edges:
+        copies: int = remaining[edge]
+        if copies > 0:
+            remaining[edge] = copies - 1
+            total += copies * count_from(vertex=edge.out_vertex, end=end, remaining=remaining, left=left - 1)
+            remaining[edge] = copies
+    return total
+
+
+def brute_force_component_count(graph: Graph) -> int:
+    total: int = 1
+    for vertices in graph.weak_components():
+        edges: List[Edge] = [edge for vertex in vertices for edge in vertex.out_edges]
+        remaining: Dict[Edge, int] = {edge: edge.multiplicities for edge in edges}
+        left: int = sum(remaining.values())
+        diffs: Dict[Vertex, int] = {vertex: graph.unbalanced[vertex] for vertex in vertices if vertex in graph.unbalanced}
+        if len(diffs) == 0:
+            # Chu trình Euler được đếm một lần bằng cách cố định bản sao đầu tiên của một cạnh
+            first: Edge = edges[0]
+            remaining[first] -= 1
+            total *= count_from(vertex=first.out_vertex, end=first.in_vertex, remaining=remaining, left=left - 1)
+        elif sorted(diffs.values()) == [-1, 1]:
+            start: Vertex = next(vertex for vertex, diff in diffs.items() if diff == 1)
+            end: Vertex = next(vertex for vertex, diff in diffs.items() if diff == -1)
+            total *= count_from(vertex=start, end=end, remaining=remaining, left=left)
+        else:
+            return 0
+    return total
+
+
+CASES: List[List[str]] = [
+    ["ACGTACGTAC"],
+    ["AATAATAATCCGATCCGATCC"],
+    ["TTACTTACGGACGGACGTTACTT"],
+    ["GCAGCAGCATGCATGCAGTGCAG"],
+    ["AACCAACCAA", "GTGTGTG"],
+    # Hai thành phần: một đường đi và một chu trình cân bằng
+    ["GATTACAGCTTG", "AACCCGGTTTAACC"],
+    ["ACGACGTTACGACG", "CCATCCATGG", "TGTGTGTGT"],
+]
+
+
+@pytest.mark.parametrize("reads", CASES)
+@pytest.mark.parametrize("k", [3, 4, 5])
+def test_best_count_matches_brute_force(reads: List[str], k: int) -> None:
+    graph: Graph = Graph(seqs=reads, k=k, threshold=0)
+    product: int = brute_force_component_count(graph=graph)
+    # Đồ thị nhiều thành phần không có đường đi Euler, tích theo thành phần có API riêng
+    expected: int = product if len(graph.weak_components()) == 1 else 0
+
+    assert graph.get_numbers_eulerian_path() == expected
+    assert graph.get_numbers_component_paths() == product
+    if expected == 0:
+        assert not graph.is_eulerian()
+    for count, log_count in [(expected, graph.get_log_numbers_eulerian_path()), (product, graph.get_log_numbers_component_paths())]:
+        if count > 0:
+            assert log_count == pytest.approx(math.log(count), abs=1e-6)
+        else:
+            assert log_count == -math.inf
+
+
+def test_cases_cover_multiple_counts() -> None:
+    graphs: List[Graph] = [Graph(seqs=reads, k=3, threshold=0) for reads in CASES]
+    counts: List[int] = [brute_force_component_count(graph=graph) for graph in graphs]
+
+    assert max(counts) > 1 and 0 in counts
+    # Có trường hợp nhiều thành phần mà mỗi thành phần đều có đường đi Euler
+    assert any(count > 0 and len(graph.weak_components()) > 1 for count, graph in zip(counts, graphs))
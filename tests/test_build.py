@@ -0,0 +1,30 @@
+"""Dựng đồ thị song song theo shard phải cho đúng đồ thị như dựng tuần tự
+"""
+import os
+from typing import List
+
+import pytest
+
+from benchmark import random_genome, simulate_reads
+from graph import Graph
+from loader import Loader
+
+
+DATA_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def sample_reads(name: str) -> List[str]:
+    if name == "simulated":
+        return simulate_reads(genome=random_genome(length=1500, seed=5), coverage=8, read_length=60, seed=5)
+
+    return list(Loader.load(filename=os.path.join(DATA_DIR, name + ".fastq")))
+
+
+@pytest.mark.parametrize("name, k", [("c1", 6), ("c6", 8), ("rep2", 8), ("simulated", 11)])
+@pytest.mark.parametrize("workers", [2, 3])
+def test_sharded_build_matches_serial(graph_state, name: str, k: int, workers: int) -> None:
+    reads: List[str] = sample_reads(name=name)
+    serial: Graph = Graph(seqs=reads, k=k, threshold=0)
+    sharded: Graph = Graph(seqs=reads, k=k, threshold=0, workers=workers)
+
+    assert graph_state(sharded) == graph_state(serial)
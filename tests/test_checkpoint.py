@@ -0,0 +1,72 @@
+"""Đồ thị đọc lại từ checkpoint phải giống hệt đồ thị đã lưu, trước và sau make_superpath
+"""
+import json
+import os
+from typing import List
+
+import pytest
+
+from assembly import Assembler
+from benchmark import random_genome, simulate_reads
+from checkpoint import load_graph, read_meta, save_graph
+from graph import Graph
+
+
+DATA_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+@pytest.mark.parametrize("name, k", [("c1", 6), ("c6", 8), ("rep2", 8)])
+@pytest.mark.parametrize("mmap", [True, False])
+def test_graph_round_trip(graph_state, tmp_path, name: str, k: int, mmap: bool) -> None:
+    assembly: Assembler = Assembler(filename=os.path.join(DATA_DIR, name + ".fastq"), k=k)
+    save_graph(graph=assembly.graph, dirname=str(tmp_path))
+    loaded: Graph = load_graph(dirname=str(tmp_path), mmap=mmap)
+
+    assert graph_state(loaded) == graph_state(assembly.graph)
+    # Đồ thị đọc lại vẫn gộp cạnh được và cho cùng kết quả
+    restored: Assembler = Assembler.from_graph(graph=loaded)
+    restored.make_superpath()
+    assembly.make_superpath()
+    assert graph_state(restored.graph) == graph_state(assembly.graph)
+
+
+def test_assembler_round_trip_after_superpath(graph_state, tmp_path) -> None:
+    assembly: Assembler = Assembler(filename=os.path.join(DATA_DIR, "c4.fastq"), k=6)
+    assembly.make_superpath()
+    assembly.save(dirname=str(tmp_path))
+    loaded: Assembler = Assembler.load(dirname=str(tmp_path))
+
+    assert loaded.merged and read_meta(dirname=str(tmp_path))["extra"]["merged"]
+    assert graph_state(loaded.graph) == graph_state(assembly.graph)
+    assert loaded.is_eulerian() == assembly.is_eulerian()
+    if assembly.is_eulerian():
+        assert loaded.find_eulerian_path() == assembly.find_eulerian_path()
+        assert loaded.graph.get_numbers_eulerian_path() == assembly.graph.get_numbers_eulerian_path()
+
+
+def test_rejects_other_versions(tmp_path) -> None:
+    assembly: Assembler = Assembler(filename=os.path.join(DATA_DIR, "c1.fastq"), k=6)
+    save_graph(graph=assembly.graph, dirname=str(tmp_path))
+    meta_file: str = os.path.join(str(tmp_path), "graph.json")
+    with open(meta_file) as f:
+        meta = json.load(f)
+    meta["version"] += 1
+    with open(meta_file, "w") as f:
+        json.dump(meta, f)
+
+    with pytest.raises(ValueError):
+        load_graph(dirname=str(tmp_path))
+
+
+def test_round_trip_keeps_read_breaks(graph_state, tmp_path) -> None:
+    # Read có ký tự N và cạnh bị gỡ khi làm gọn đồ thị đều cắt đường đi của read
+    genome: str = random_genome(length=600, seed=9)
+    reads: List[str] = simulate_reads(genome=genome, coverage=20, read_length=60, seed=9)
+    reads[20] = reads[20][:30] + {"A": "C", "C": "G", "G": "T", "T": "A"}[reads[20][30]] + reads[20][31:]
+    reads[40] = reads[40][:25] + "N" + reads[40][26:]
+    graph: Graph = Graph(seqs=reads, k=11, threshold=0)
+    graph.simplify()
+    assert all(len(graph.read_list[r].breaks) == 1 for r in (20, 40))
+
+    save_graph(graph=graph, dirname=str(tmp_path))
+    assert graph_state(load_graph(dirname=str(tmp_path))) == graph_state(graph)
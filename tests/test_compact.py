@@ -0,0 +1,85 @@
+"""Đồ thị dạng mảng CompactGraph phải cho cùng kết luận Euler và cùng đường đi như đồ thị object
+"""
+import os
+import tempfile
+from typing import List
+
+import numpy as np
+import pytest
+
+from assembly import Assembler
+from benchmark import random_genome, simulate_reads
+from compact import CompactGraph
+from counting import count_kmers, shard_of
+from overlap import find_overlaps
+from store import ReadStore
+
+
+DATA_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def write_fastq(dirname: str, reads: List[str]) -> str:
+    filename: str = os.path.join(dirname, "reads.fastq")
+    with open(filename, "w") as f:
+        for i, read in enumerate(reads):
+            f.write("@r{}\n{}\n+\n{}\n".format(i, read, "I" * len(read)))
+
+    return filename
+
+
+def inputs(tmp_path) -> List[str]:
+    genome: str = random_genome(length=300, seed=4)
+    # Các read chồng lên nhau phủ toàn bộ một bộ gen không lặp nên đồ thị là đồ thị Euler
+    tiled: List[str] = [genome[i:i + 40] for i in range(0, len(genome) - 40 + 1, 20)]
+    files: List[str] = [os.path.join(DATA_DIR, name + ".fastq") for name in ("c1", "c4", "c5", "c6", "rep1")]
+
+    return files + [write_fastq(dirname=str(tmp_path), reads=tiled)]
+
+
+@pytest.mark.parametrize("k", [6, 8])
+def test_compact_engine_agrees_with_assembler(tmp_path, k: int) -> None:
+    n_eulerian: int = 0
+    for filename in inputs(tmp_path=tmp_path):
+        assembly: Assembler = Assembler(filename=filename, k=k)
+        compact: Assembler = Assembler(filename=filename, k=k, engine="compact")
+        converted: CompactGraph = CompactGraph.from_graph(graph=assembly.graph)
+
+        assert compact.graph.n_edges == len(assembly.graph.edge_list)
+        assert int(compact.graph.multiplicities.sum()) == sum(edge.multiplicities for edge in assembly.graph.edge_list)
+        assert compact.is_eulerian() == assembly.is_eulerian() == converted.is_eulerian()
+        if assembly.is_eulerian():
+            n_eulerian += 1
+            path: str = assembly.find_eulerian_path()
+            assert compact.find_eulerian_path() == path
+            assert converted.find_eulerian_path() == path
+        else:
+            assert sorted(compact.find_contigs()) == sorted(assembly.find_contigs())
+    assert n_eulerian > 0
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("k", [9, 33])
+def test_count_without_occurrences(monkeypatch, tmp_path, workers: int, k: int) -> None:
+    store: ReadStore = ReadStore.from_sequences(seqs=simulate_reads(genome=random_genome(length=1000, seed=6),
+                                                                    coverage=6, read_length=50, seed=6))
+    front_of, behind_of = find_overlaps(store=store, min_length=k)
+    table, occurrences = count_kmers(store=store, k=k, workers=workers, front_of=front_of, behind_of=behind_of)
+    # Các lần xuất hiện được ghi tạm ra đĩa và bị xóa sau khi đếm
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    light, none = count_kmers(store=store, k=k, workers=workers, front_of=front_of, behind_of=behind_of, keep_occurrences=False)
+
+    assert none is None
+    assert os.listdir(str(tmp_path)) == []
+    assert len(occurrences[0]) == sum(max(0, store.length(n) - k + 1) for n in range(len(store)))
+    for column, light_column in zip(table, light):
+        assert np.array_equal(column, light_column)
+
+
+def test_shards_are_balanced_for_keys_sharing_low_bits() -> None:
+    # Các k-mer kết thúc bằng cùng một nucleotide có cùng 2 bit thấp, khóa % 4 đưa tất cả vào một shard
+    keys: np.ndarray = (np.arange(4000, dtype=np.uint64) << np.uint64(2)) | np.uint64(1 << 20)
+    for n_shards in (2, 4, 8):
+        sizes: np.ndarray = np.bincount(shard_of(keys=keys, n_shards=n_shards), minlength=n_shards)
+        assert sizes.min() > 0.8 * len(keys) / n_shards
+    wide: np.ndarray = np.array([(int(key) << 40) | 3 for key in keys.tolist()], dtype=object)
+    assert np.bincount(shard_of(keys=wide, n_shards=4), minlength=4).min() > 800
@@ -0,0 +1,55 @@
+"""split_store phải chia các read đúng theo thành phần liên thông yếu của đồ thị de Bruijn dựng từ tất cả các read
+"""
+from typing import Dict, List, Set
+
+import pytest
+
+from benchmark import random_genome, simulate_reads
+from components import assemble_components, split_store
+from graph import Graph, Vertex
+from store import ReadStore
+
+
+def graph_partition(reads: List[str], k: int) -> Set[frozenset]:
+    graph: Graph = Graph(seqs=reads, k=k, threshold=0)
+    component_of: Dict[Vertex, int] = {vertex: c for c, vertices in enumerate(graph.weak_components()) for vertex in vertices}
+    groups: Dict[int, Set[int]] = {}
+    for read in graph.read_list:
+        for _, edge in read.path():
+            groups.setdefault(component_of[edge.in_vertex], set()).add(read.read_id)
+
+    return {frozenset(group) for group in groups.values()}
+
+
+def genomes_reads(n_genomes: int, seed: int) -> List[str]:
+    # Các bộ gen ngẫu nhiên khác nhau cho các thành phần riêng biệt, read của chúng được trộn lẫn
+    reads: List[str] = []
+    for g in range(n_genomes):
+        reads += simulate_reads(genome=random_genome(length=150 + 50 * g, seed=seed + g), coverage=4, read_length=30, seed=seed + g)
+
+    return reads[0::3] + reads[1::3] + reads[2::3]
+
+
+@pytest.mark.parametrize("reads, k", [(genomes_reads(n_genomes=4, seed=11), 9),
+                                      (genomes_reads(n_genomes=3, seed=20), 5),
+                                      (["GATTACAGCTTG", "AACCCGGTTTAACC", "ACG", "TTGAACCC", "GGGGGGG"], 5)])
+def test_split_store_is_the_weak_component_partition(reads: List[str], k: int) -> None:
+    parts: List[List[int]] = split_store(store=ReadStore.from_sequences(seqs=reads), k=k)
+    ids: List[int] = [read_id for part in parts for read_id in part]
+
+    # Mỗi read có ít nhất một k-mer nằm trong đúng một phần, các phần theo thứ tự read nhỏ nhất
+    assert sorted(ids) == [n for n, read in enumerate(reads) if len(read) >= k]
+    assert [part[0] for part in parts] == sorted(part[0] for part in parts)
+    assert all(part == sorted(part) for part in parts)
+    assert {frozenset(part) for part in parts} == graph_partition(reads=reads, k=k)
+
+
+def test_components_assemble_the_same_with_a_pool() -> None:
+    reads: List[str] = genomes_reads(n_genomes=4, seed=11)
+    store: ReadStore = ReadStore.from_sequences(seqs=reads)
+    serial = assemble_components(store=store, k=9)
+    pooled = assemble_components(store=store, k=9, workers=2)
+
+    assert len(serial) == 4
+    assert [(r.read_ids, r.is_eulerian, r.contigs, r.n_paths) for r in pooled] == \
+        [(r.read_ids, r.is_eulerian, r.contigs, r.n_paths) for r in serial]
@@ -0,0 +1,35 @@
+"""Đồ thị có nhiều thành phần liên thông yếu không được đi theo nhánh đường đi Euler dù cân bằng bậc
+"""
+import os
+from typing import List
+
+import pytest
+
+from assembly import Assembler
+
+
+# Một thành phần là đường đi, thành phần kia là chu trình cân bằng: chỉ có đúng hai đỉnh không cân bằng
+READS: List[str] = ["GATTACAGCTTG", "AACCCGGTTTAACC"]
+
+
+@pytest.fixture
+def two_components(tmp_path) -> str:
+    filename: str = os.path.join(str(tmp_path), "disc.fastq")
+    with open(filename, "w") as f:
+        for i, read in enumerate(READS):
+            f.write("@r{}\n{}\n+\n{}\n".format(i, read, "I" * len(read)))
+
+    return filename
+
+
+@pytest.mark.parametrize("engine", ["object", "compact"])
+def test_balanced_multi_component_graph_is_not_eulerian(two_components: str, engine: str) -> None:
+    assembly: Assembler = Assembler(filename=two_components, k=5, engine=engine)
+    if engine == "object":
+        assembly.make_superpath()
+        assert len(assembly.graph.weak_components()) == 2
+
+    assert not assembly.is_eulerian()
+    with pytest.raises(ValueError):
+        assembly.find_eulerian_path()
+    assert sorted(assembly.find_contigs()) == sorted(READS)
@@ -0,0 +1,65 @@
+"""Sửa lỗi theo phổ k-mer phải đưa một read có một lỗi thay thế về đúng read gốc
+"""
+from typing import List
+
+import numpy as np
+
+from benchmark import random_genome, simulate_reads
+from correction import KmerSpectrum, abundance_histogram, correct_store, solid_cutoff
+from graph import Graph
+from store import ReadStore
+
+
+K: int = 11
+READS: List[str] = simulate_reads(genome=random_genome(length=1200, seed=8), coverage=20, read_length=60, seed=8)
+
+
+def substitute(read: str, j: int) -> str:
+    return read[:j] + {"A": "C", "C": "G", "G": "T", "T": "A"}[read[j]] + read[j + 1:]
+
+
+def test_single_substitution_is_corrected() -> None:
+    noisy: List[str] = READS.copy()
+    noisy[len(READS) // 2] = substitute(read=noisy[len(READS) // 2], j=30)
+    corrected, cutoff, num_corrected, num_uncorrectable = correct_store(store=ReadStore.from_sequences(seqs=noisy), k=K)
+
+    assert cutoff > 1
+    assert num_corrected == 1
+    # Các read ở hai đầu bộ gen có k-mer yếu nhưng được giữ nguyên
+    assert list(corrected) == READS
+
+
+def test_uncorrectable_reads_are_kept_unless_dropped() -> None:
+    store: ReadStore = ReadStore.from_sequences(seqs=READS)
+    kept, cutoff, _, num_kept = correct_store(store=store, k=K)
+    dropped, _, _, num_dropped = correct_store(store=store, k=K, threshold=cutoff, drop=True)
+
+    assert num_kept == num_dropped > 0
+    assert len(kept) == len(READS)
+    assert len(dropped) == len(READS) - num_dropped
+    assert set(dropped) <= set(READS)
+
+
+def test_clean_reads_are_untouched_and_graph_matches(graph_state) -> None:
+    noisy: List[str] = READS.copy()
+    noisy[len(READS) // 3] = substitute(read=noisy[len(READS) // 3], j=5)
+    store: ReadStore = ReadStore.from_sequences(seqs=READS)
+    corrected, _, num_corrected, _ = correct_store(store=store, k=K)
+    assert num_corrected == 0
+    assert list(corrected) == READS
+
+    # threshold của Graph được truyền tới bước sửa lỗi
+    graph: Graph = Graph(seqs=noisy, k=K, threshold=3, error_correct=True)
+    assert graph.threshold == 3
+    assert graph_state(graph) == graph_state(Graph(seqs=READS, k=K, threshold=0))
+
+
+def test_spectrum_cutoff_and_lookup() -> None:
+    # Đỉnh k-mer lỗi ở 1, điểm trũng ở 3, đỉnh độ phủ ở 6
+    assert solid_cutoff(histogram=np.array([0, 50, 10, 2, 5, 9, 12, 4])) == 3
+    assert solid_cutoff(histogram=abundance_histogram(counts=np.array([1, 1, 1]))) == 1
+
+    spectrum: KmerSpectrum = KmerSpectrum(store=ReadStore.from_sequences(seqs=["ACGTACG", "ACGTTTT"]), k=4, threshold=2)
+    assert spectrum.cutoff == 2
+    assert spectrum.lookup(keys=spectrum.keys).tolist() == spectrum.counts.tolist()
+    assert spectrum.is_solid(keys=spectrum.keys).sum() == 1
@@ -0,0 +1,70 @@
+"""Đồ thị ghi ra GFA rồi đọc lại phải giữ nguyên các cạnh, bội và kết quả ghép
+"""
+import os
+from typing import Any, List, Tuple
+
+import pytest
+
+from assembly import Assembler
+from formats import read_gfa, write_fasta, write_gfa
+from graph import Graph
+
+
+DATA_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def edges_of(graph: Graph) -> List[Tuple[Any, ...]]:
+    return [(edge.key, edge.in_vertex.key, edge.out_vertex.key, edge.multiplicities) for edge in graph.edge_list]
+
+
+@pytest.mark.parametrize("name, k", [("c1", 6), ("c4", 6), ("c6", 8), ("rep2", 8)])
+@pytest.mark.parametrize("merged", [False, True])
+def test_gfa_round_trip(tmp_path, name: str, k: int, merged: bool) -> None:
+    assembly: Assembler = Assembler(filename=os.path.join(DATA_DIR, name + ".fastq"), k=k)
+    if merged:
+        assembly.make_superpath()
+    filename: str = os.path.join(str(tmp_path), "graph.gfa")
+    write_gfa(graph=assembly.graph, filename=filename)
+    loaded: Graph = read_gfa(filename=filename)
+
+    assert loaded.k == k
+    assert edges_of(loaded) == edges_of(assembly.graph)
+    assert {vertex.key for vertex in loaded.vertex_list} == {vertex.key for vertex in assembly.graph.vertex_list}
+    assert sorted((v.key, d) for v, d in loaded.unbalanced.items()) == sorted((v.key, d) for v, d in assembly.graph.unbalanced.items())
+    assert loaded.is_eulerian() == assembly.is_eulerian()
+    assert loaded.get_numbers_eulerian_path() == assembly.graph.get_numbers_eulerian_path()
+    if assembly.is_eulerian():
+        assert Assembler.from_graph(graph=loaded).find_eulerian_path() == assembly.find_eulerian_path()
+
+
+def test_gfa_links_and_explicit_k(tmp_path) -> None:
+    graph: Graph = Graph(seqs=["ACGTTGCA"], k=4, threshold=0)
+    filename: str = os.path.join(str(tmp_path), "graph.gfa")
+    write_gfa(graph=graph, filename=filename)
+    with open(filename) as f:
+        lines: List[List[str]] = [line.rstrip("\n").split("\t") for line in f]
+
+    assert lines[0] == ["H", "VN:Z:1.0", "KM:i:4"]
+    assert [line[2] for line in lines if line[0] == "S"] == ["ACGT", "CGTT", "GTTG", "TTGC", "TGCA"]
+    assert [(line[1], line[3], line[5]) for line in lines if line[0] == "L"] == [("e{}".format(i), "e{}".format(i + 1), "3M") for i in range(4)]
+
+    # Không có KM:i trong header thì phải truyền k
+    with open(filename, "w") as f:
+        f.write("".join("\t".join(line) + "\n" for line in lines[1:]))
+    with pytest.raises(ValueError):
+        read_gfa(filename=filename)
+    assert edges_of(read_gfa(filename=filename, k=4)) == edges_of(graph)
+
+
+@pytest.mark.parametrize("line_width", [0, 3, 80])
+def test_write_fasta(tmp_path, line_width: int) -> None:
+    contigs: List[str] = ["ACGTACGTAC", "", "GATTACA"]
+    filename: str = os.path.join(str(tmp_path), "contigs.fa")
+
+    assert write_fasta(contigs=(contig for contig in contigs), filename=filename, line_width=line_width) == 3
+    with open(filename) as f:
+        records: List[str] = f.read().split(">")[1:]
+    assert [record.split("\n", 1)[0] for record in records] == ["contig_{} length={}".format(i, len(c)) for i, c in enumerate(contigs)]
+    assert ["".join(record.split("\n")[1:]) for record in records] == contigs
+    if line_width > 0:
+        assert all(len(line) <= line_width for record in records for line in record.split("\n")[1:])
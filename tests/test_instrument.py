@@ -0,0 +1,93 @@
+"""Profiler ghi đúng các giai đoạn lồng nhau và bộ đếm vào báo cáo JSON, NULL_PROFILER không ghi gì
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from instrument import NULL_PROFILER, Profiler
+
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_nested_stages_and_counters_in_report(tmp_path) -> None:
+    profiler: Profiler = Profiler()
+    with profiler.stage("outer"):
+        with profiler.stage("inner"):
+            time.sleep(0.01)
+        profiler.count("merges")
+        profiler.count("merges", 4)
+        profiler.maximum("largest", 3)
+        profiler.maximum("largest", 2)
+        profiler.record("edges", 7)
+    filename: str = os.path.join(str(tmp_path), "profile.json")
+    profiler.write_json(filename=filename)
+    with open(filename) as f:
+        report: Dict[str, Any] = json.load(f)
+
+    # Giai đoạn được ghi theo thứ tự kết thúc nên giai đoạn con đứng trước
+    stages: List[Dict[str, Any]] = report["stages"]
+    assert [(stage["name"], stage["depth"]) for stage in stages] == [("inner", 1), ("outer", 0)]
+    assert stages[0]["seconds"] >= 0.01 and stages[1]["seconds"] >= stages[0]["seconds"]
+    assert report["counters"] == {"edges": 7, "largest": 3, "merges": 5}
+    assert report["total_seconds"] >= stages[1]["seconds"]
+
+
+def test_stage_recorded_when_body_raises() -> None:
+    profiler: Profiler = Profiler()
+    try:
+        with profiler.stage("failing"):
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    assert [stage["name"] for stage in profiler.stages] == ["failing"]
+
+
+def test_trace_memory_reports_stage_peak() -> None:
+    profiler: Profiler = Profiler(trace_memory=True)
+    try:
+        with profiler.stage("outer"):
+            with profiler.stage("alloc"):
+                data: bytes = bytes(1 << 20)
+            del data
+    finally:
+        tracemalloc.stop()
+
+    peaks: Dict[str, int] = {stage["name"]: stage["peak_traced_bytes"] for stage in profiler.stages}
+    assert peaks["alloc"] >= 1 << 20 and peaks["outer"] >= peaks["alloc"]
+
+
+def test_null_profiler_records_nothing() -> None:
+    was_tracing: bool = tracemalloc.is_tracing()
+    start: float = time.perf_counter()
+    for _ in range(10000):
+        with NULL_PROFILER.stage("stage"):
+            NULL_PROFILER.count("counter")
+            NULL_PROFILER.maximum("maximum", 1)
+            NULL_PROFILER.record("record", 1)
+    elapsed: float = time.perf_counter() - start
+
+    assert NULL_PROFILER.stages == [] and NULL_PROFILER.counters == {}
+    assert tracemalloc.is_tracing() == was_tracing
+    # Chỉ là một generator rỗng mỗi lần, rộng rãi để không phụ thuộc máy
+    assert elapsed < 1.0
+
+
+def test_main_writes_profile(tmp_path) -> None:
+    filename: str = os.path.join(str(tmp_path), "profile.json")
+    for extra in ([], ["--components"]):
+        subprocess.run([sys.executable, os.path.join(ROOT, "main.py"), os.path.join(ROOT, "tests", "data", "c1.fastq"),
+                        "-k", "6", "--profile", filename] + extra, check=True, capture_output=True, cwd=str(tmp_path))
+        with open(filename) as f:
+            report: Dict[str, Any] = json.load(f)
+        assert "load" in [stage["name"] for stage in report["stages"]]
+        os.remove(filename)
+    # Không có --profile thì không ghi file nào
+    subprocess.run([sys.executable, os.path.join(ROOT, "main.py"), os.path.join(ROOT, "tests", "data", "c1.fastq"), "-k", "6"],
+                   check=True, capture_output=True, cwd=str(tmp_path))
+    assert os.listdir(str(tmp_path)) == []
@@ -0,0 +1,73 @@
+"""Khóa số nguyên của k-mer phải khớp với cách mã hóa trực tiếp bằng Python, cả nhánh numpy (k <= 31) và nhánh số lớn
+"""
+import random
+from typing import List, Tuple
+
+import pytest
+
+from kmer import (MAX_VECTOR_K, canonical_key, concat_keys, concat_path_keys, key_length, key_to_sequence, kmer_key_array,
+                  kmer_keys, reverse_complement_key, sequence_to_key)
+from store import encode
+
+
+def reference_key(sequence: str) -> int:
+    key: int = 1
+    for base in sequence:
+        key = key * 4 + "ACGT".index(base)
+
+    return key
+
+
+def reference_kmers(read: str, k: int) -> List[Tuple[int, int, int, int]]:
+    return [(i, reference_key(read[i:i + k]), reference_key(read[i:i + k - 1]), reference_key(read[i + 1:i + k]))
+            for i in range(len(read) - k + 1) if all(base in "ACGT" for base in read[i:i + k])]
+
+
+def random_read(length: int, seed: int) -> str:
+    rng: random.Random = random.Random(seed)
+    return "".join(rng.choice("ACGT") for _ in range(length))
+
+
+READS: List[str] = [random_read(length=120, seed=1),
+                    # Ký tự không phải ACGT làm các k-mer chứa nó bị bỏ qua
+                    random_read(length=50, seed=2) + "N" + random_read(length=60, seed=3) + "n" + random_read(length=45, seed=4),
+                    "A" * 70, "T" * 64, random_read(length=31, seed=5), random_read(length=20, seed=6)]
+
+
+@pytest.mark.parametrize("k", [5, MAX_VECTOR_K, MAX_VECTOR_K + 1, 40])
+@pytest.mark.parametrize("read", READS)
+def test_kmer_keys_match_reference(read: str, k: int) -> None:
+    expected: List[Tuple[int, int, int, int]] = reference_kmers(read=read, k=k)
+    positions, keys = kmer_key_array(codes=encode(read), k=k)
+
+    assert list(kmer_keys(codes=encode(read), k=k)) == expected
+    assert positions.tolist() == [i for i, _, _, _ in expected]
+    assert [int(key) for key in keys] == [key for _, key, _, _ in expected]
+    assert keys.dtype == (object if k > MAX_VECTOR_K else "uint64")
+
+
+@pytest.mark.parametrize("length", [0, 1, 4, 31, 32, 40, 100])
+def test_sequence_key_round_trip(length: int) -> None:
+    sequence: str = random_read(length=length, seed=length)
+    key: int = sequence_to_key(sequence)
+
+    assert key == reference_key(sequence)
+    assert key_length(key) == length
+    assert key_to_sequence(key) == sequence
+    # Chuỗi toàn A khác độ dài không trùng khóa nhờ bit đánh dấu độ dài
+    assert sequence_to_key("A" * length) != sequence_to_key("A" * (length + 1))
+
+
+@pytest.mark.parametrize("k", [5, 31, 32, 40])
+def test_concat_and_reverse_complement(k: int) -> None:
+    read: str = random_read(length=3 * k, seed=k)
+    pieces: List[str] = [read[i:i + k] for i in range(0, len(read) - k + 1, 3)]
+    spelled: str = pieces[0] + "".join(piece[k - 3:] for piece in pieces[1:])
+
+    assert key_to_sequence(concat_keys(x_key=sequence_to_key(pieces[0]), y_key=sequence_to_key(pieces[1]), overlap=k - 3)) == \
+        pieces[0] + pieces[1][k - 3:]
+    assert key_to_sequence(concat_path_keys(keys=[sequence_to_key(piece) for piece in pieces], overlap=k - 3)) == spelled
+
+    complement: str = read[:k][::-1].translate(str.maketrans("ACGT", "TGCA"))
+    assert key_to_sequence(reverse_complement_key(sequence_to_key(read[:k]))) == complement
+    assert key_to_sequence(canonical_key(sequence_to_key(read[:k]))) == min(read[:k], complement)
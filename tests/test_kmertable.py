@@ -0,0 +1,98 @@
+"""Đồ thị dựng từ bảng k-mer ngoài bộ nhớ (memory_budget) phải giống hệt đồ thị dựng trong bộ nhớ
+"""
+import os
+from typing import List
+
+import numpy as np
+import pytest
+
+import kmertable
+from assembly import Assembler
+from benchmark import random_genome, simulate_reads, write_fastq
+from compact import CompactGraph
+from counting import count_kmers
+from kmertable import KmerTable, BYTES_PER_OCCURRENCE
+from overlap import find_overlaps
+from store import ReadStore
+
+
+READS: List[str] = simulate_reads(genome=random_genome(length=1500, seed=7), coverage=8, read_length=60, seed=7)
+COMPACT_ARRAYS: List[str] = ["vertex_keys", "edge_keys", "src", "dst", "multiplicities", "out_offsets", "out_edges", "in_offsets", "in_edges"]
+
+
+def assert_same_compact(graph: CompactGraph, expected: CompactGraph) -> None:
+    for name in COMPACT_ARRAYS:
+        assert np.array_equal(getattr(graph, name), getattr(expected, name)), name
+
+
+# Ngân sách nhỏ để các lần xuất hiện bị chia ra nhiều bucket, nhiều lô và bảng được đọc theo nhiều đoạn
+@pytest.mark.parametrize("memory_budget", [64 * BYTES_PER_OCCURRENCE, 4096 * BYTES_PER_OCCURRENCE, 1 << 30])
+def test_memory_budget_build_matches_in_memory(tmp_path, memory_budget: int) -> None:
+    filename: str = os.path.join(str(tmp_path), "reads.fastq")
+    write_fastq(reads=READS, filename=filename)
+    workdir: str = os.path.join(str(tmp_path), "table")
+    expected: CompactGraph = CompactGraph.from_reads(store=ReadStore.from_sequences(seqs=READS), k=11)
+    assembly: Assembler = Assembler(filename=filename, k=11, engine="compact", memory_budget=memory_budget, workdir=workdir)
+
+    assert_same_compact(graph=assembly.graph, expected=expected)
+    assert assembly.is_eulerian() == expected.is_eulerian()
+
+
+def test_memory_budget_needs_compact_engine(tmp_path) -> None:
+    filename: str = os.path.join(str(tmp_path), "reads.fastq")
+    write_fastq(reads=READS, filename=filename)
+
+    with pytest.raises(ValueError):
+        Assembler(filename=filename, k=11, memory_budget=1 << 20)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_from_kmer_table_in_chunks(chunk_size: int) -> None:
+    store: ReadStore = ReadStore.from_sequences(seqs=READS)
+    with KmerTable.build(store=store, k=11, memory_budget=256 * BYTES_PER_OCCURRENCE) as table:
+        graph: CompactGraph = CompactGraph.from_kmer_table(table=table, chunk_size=chunk_size)
+
+    assert_same_compact(graph=graph, expected=CompactGraph.from_reads(store=store, k=11))
+
+
+def test_skewed_bucket_is_split(monkeypatch) -> None:
+    # Mọi k-mer rơi vào bucket 0 (minimizer phân bố lệch hẳn), bucket này phải được chia để mỗi lần đếm vừa ngân sách
+    store: ReadStore = ReadStore.from_sequences(seqs=READS)
+    front_of, behind_of = find_overlaps(store=store, min_length=11)
+    counted, _ = count_kmers(store=store, k=11, workers=1, front_of=front_of, behind_of=behind_of)
+    monkeypatch.setattr(KmerTable, "bucket_of", lambda self, keys: np.zeros(shape=len(keys), dtype=np.int64))
+    sizes: List[int] = []
+
+    def count_occurrences(keys: np.ndarray, **kwargs):
+        sizes.append(len(keys))
+        return original(keys=keys, **kwargs)
+
+    original = kmertable.count_occurrences
+    monkeypatch.setattr(kmertable, "count_occurrences", count_occurrences)
+    budget: int = 256 * BYTES_PER_OCCURRENCE
+    with KmerTable.build(store=store, k=11, memory_budget=budget, front_of=front_of, behind_of=behind_of) as table:
+        assert table.n_buckets > 1 and table.bucket_offsets[1] == len(table)
+        order: np.ndarray = table.first_occurrence_order()
+        assert np.array_equal(table.keys[order], counted[0])
+        assert np.array_equal(table.multiplicities[order], counted[1])
+        assert np.array_equal(table.lookup(keys=counted[0]), order)
+
+    limit: int = budget // BYTES_PER_OCCURRENCE
+    assert sum(sizes) == sum(max(0, store.length(n) - 10) for n in range(len(store)))
+    assert len(sizes) >= sum(sizes) // limit and max(sizes) < 2 * limit
+
+
+def test_table_matches_in_memory_count(tmp_path) -> None:
+    store: ReadStore = ReadStore.from_sequences(seqs=READS)
+    front_of, behind_of = find_overlaps(store=store, min_length=11)
+    counted, _ = count_kmers(store=store, k=11, workers=1, front_of=front_of, behind_of=behind_of)
+
+    with KmerTable.build(store=store, k=11, memory_budget=256 * BYTES_PER_OCCURRENCE) as table:
+        assert table.n_buckets > 1
+        dirname: str = table.dirname
+        order: np.ndarray = table.first_occurrence_order()
+        assert np.array_equal(table.keys[order], counted[0])
+        assert np.array_equal(table.multiplicities[order], counted[1])
+        assert np.array_equal(table.lookup(keys=counted[0]), order)
+    # Bảng trong thư mục tạm bị xóa khi đóng
+    assert not os.path.exists(dirname)
@@ -0,0 +1,75 @@
+"""Loader đọc fastq thường, gzip và bz2 theo từng khối, bỏ các read chứa N
+"""
+import os
+import bz2
+import gzip
+from typing import List
+
+import pytest
+
+from loader import Loader, iter_lines
+
+
+READS: List[str] = ["GATTACAGATTACA", "ACGTNACGT", "ttgcaACGTTGCA", "CCCCGGGGAAAATTTT", "NNNN", "AcGt"]
+# Các read chứa N bị bỏ qua
+KEPT: List[str] = ["GATTACAGATTACA", "ttgcaACGTTGCA", "CCCCGGGGAAAATTTT", "AcGt"]
+
+
+def fastq_bytes(reads: List[str], newline: str="\n") -> bytes:
+    return "".join("@read_{}{nl}{}{nl}+{nl}{}{nl}".format(i, read, "I" * len(read), nl=newline)
+                   for i, read in enumerate(reads)).encode("ascii")
+
+
+@pytest.mark.parametrize("name, opener", [("reads.fastq", open), ("reads.fq.gz", gzip.open), ("reads.fastq.bz2", bz2.open),
+                                          # Kiểu nén được nhận biết bằng magic bytes chứ không theo đuôi file
+                                          ("gzip_named_plain.fq", gzip.open)])
+def test_load_plain_and_compressed(tmp_path, name: str, opener) -> None:
+    filename: str = os.path.join(str(tmp_path), name)
+    with opener(filename, "wb") as f:
+        f.write(fastq_bytes(reads=READS))
+
+    assert list(Loader.load(filename=filename)) == KEPT
+    assert list(Loader.stream(filename=filename)) == KEPT
+
+
+def test_small_blocks_and_crlf(tmp_path) -> None:
+    filename: str = os.path.join(str(tmp_path), "reads.fastq")
+    with open(filename, "wb") as f:
+        f.write(fastq_bytes(reads=READS, newline="\r\n"))
+
+    # Khối nhỏ hơn một dòng nên các dòng phải được ghép qua nhiều khối
+    assert list(Loader.load(filename=filename, block_size=3)) == KEPT
+
+
+def test_iter_lines_without_trailing_newline() -> None:
+    import io
+
+    assert list(iter_lines(f=io.BytesIO(b"@a\nACGT\n+\nIIII"), block_size=2)) == [b"@a", b"ACGT", b"+", b"IIII"]
+
+
+def test_rejects_unsupported_and_malformed_files(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        Loader.load(filename=os.path.join(str(tmp_path), "reads.fasta"))
+    filename: str = os.path.join(str(tmp_path), "bad.fastq")
+    with open(filename, "w") as f:
+        f.write(">read\nACGT\n")
+    with pytest.raises(ValueError):
+        Loader.load(filename=filename)
+
+
+def test_empty_sequence_record_keeps_record_boundaries(tmp_path) -> None:
+    filename: str = os.path.join(str(tmp_path), "reads.fastq")
+    with open(filename, "w") as f:
+        f.write("@a\nACGT\n+\nIIII\n@empty\n\n+\n\n@b\nGATTACA\n+\nIIIIIII\n\n\n")
+
+    assert list(Loader.load(filename=filename)) == ["ACGT", "", "GATTACA"]
+
+
+@pytest.mark.parametrize("content", ["@a\nACGT\n\n@b\nACGT\n+\nIIII\n", "@a\nACGT\n+\nIIII\n\n@b\nACGT\n+\nIIII\n", "@a\nACGT\n+\n"])
+def test_blank_lines_inside_the_file_are_rejected(tmp_path, content: str) -> None:
+    filename: str = os.path.join(str(tmp_path), "reads.fastq")
+    with open(filename, "w") as f:
+        f.write(content)
+
+    with pytest.raises(ValueError):
+        Loader.load(filename=filename)
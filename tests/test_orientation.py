@@ -0,0 +1,111 @@
+"""Đưa các read của cả hai mạch về cùng một mạch phải cho đúng đồ thị và contig của các read cùng mạch,
+các read mâu thuẫn về chiều phải được báo
+"""
+import os
+from typing import List
+
+import numpy as np
+import pytest
+
+from assembly import Assembler
+from benchmark import random_genome, simulate_reads, write_fastq
+from graph import Graph
+from instrument import Profiler
+from kmer import canonical_kmer_array
+from orientation import StrandUnion, orient_reads, reverse_complement
+from store import ReadStore
+
+
+# Hai đoạn đối xứng (bằng chuỗi bổ sung ngược của chính nó) được chèn vào bộ gen, tạo các k-mer đối xứng khi k chẵn
+PALINDROMES: List[str] = ["GAATTCGAATTC", "ACGTTAATTAACGT"]
+GENOME: str = random_genome(length=1500, seed=4)
+GENOME = GENOME[:500] + PALINDROMES[0] + GENOME[500:1000] + PALINDROMES[1] + GENOME[1000:]
+READS: List[str] = simulate_reads(genome=GENOME, coverage=15, read_length=60, seed=4)
+
+
+def mix_strands(reads: List[str], seed: int) -> np.ndarray:
+    # Read đầu tiên giữ nguyên chiều nên chiều được chọn trùng với mạch gốc
+    flips: np.ndarray = np.random.default_rng(seed).random(len(reads)) < 0.5
+    flips[0] = False
+    return flips
+
+
+def test_reverse_complement() -> None:
+    assert reverse_complement("AACGTN") == "NACGTT"
+    assert all(reverse_complement(palindrome) == palindrome for palindrome in PALINDROMES)
+
+
+def test_strand_union_tracks_parity() -> None:
+    union: StrandUnion = StrandUnion(n=4)
+    assert union.union(a=0, b=1, relation=1)
+    assert union.union(a=2, b=1, relation=0)
+    assert union.union(a=3, b=2, relation=1)
+    assert not union.union(a=0, b=3, relation=0)
+    assert [union.find(r)[1] ^ union.find(0)[1] for r in range(4)] == [0, 1, 1, 0]
+
+
+@pytest.mark.parametrize("k", [11, 12])
+def test_mixed_strands_match_single_strand(graph_state, k: int) -> None:
+    if k % 2 == 0:
+        _, _, _, palindromic = canonical_kmer_array(codes=ReadStore.from_sequences(seqs=[GENOME]).codes(0), k=k)
+        assert palindromic.sum() >= 2
+    flips: np.ndarray = mix_strands(reads=READS, seed=k)
+    mixed: List[str] = [reverse_complement(read) if flip else read for read, flip in zip(READS, flips)]
+
+    oriented, strands, conflicts = orient_reads(store=ReadStore.from_sequences(seqs=mixed), k=k)
+    assert list(oriented) == READS
+    assert strands.tolist() == np.where(flips, -1, 1).tolist()
+    assert conflicts == []
+
+    # Đồ thị dựng từ các read hai mạch giống hệt đồ thị của các read cùng mạch
+    profiler: Profiler = Profiler()
+    graph: Graph = Graph(seqs=mixed, k=k, threshold=0, canonical=True, profiler=profiler)
+    assert graph_state(graph) == graph_state(Graph(seqs=READS, k=k, threshold=0))
+    assert [read.strand for read in graph.read_list] == strands.tolist()
+    assert profiler.report()["counters"]["orientation_conflicts"] == 0
+
+
+def test_mixed_strands_assemble_the_same_contigs(tmp_path) -> None:
+    flips: np.ndarray = mix_strands(reads=READS, seed=1)
+    mixed: List[str] = [reverse_complement(read) if flip else read for read, flip in zip(READS, flips)]
+    single: str = os.path.join(str(tmp_path), "single.fastq")
+    both: str = os.path.join(str(tmp_path), "both.fastq")
+    write_fastq(reads=READS, filename=single)
+    write_fastq(reads=mixed, filename=both)
+
+    expected: Assembler = Assembler(filename=single, k=15)
+    assembly: Assembler = Assembler(filename=both, k=15, canonical=True)
+    expected.make_superpath()
+    assembly.make_superpath()
+    assert expected.is_eulerian() and assembly.is_eulerian()
+    assert assembly.find_eulerian_path() == expected.find_eulerian_path() == GENOME
+
+    # Engine compact cũng đảo chiều các read trước khi dựng đồ thị
+    compact: Assembler = Assembler(filename=both, k=15, canonical=True, engine="compact")
+    assert compact.find_eulerian_path() == GENOME
+
+
+@pytest.mark.parametrize("k", [11, 12])
+def test_chimeric_read_is_reported(k: int) -> None:
+    # Nửa đầu của read theo mạch gốc, nửa sau theo mạch ngược nên hai nửa đòi hai chiều khác nhau
+    chimera: str = GENOME[300:340] + reverse_complement(GENOME[800:840])
+    reads: List[str] = READS + [chimera]
+    flips: np.ndarray = mix_strands(reads=reads, seed=k)
+    flips[-1] = False
+    mixed: List[str] = [reverse_complement(read) if flip else read for read, flip in zip(reads, flips)]
+
+    oriented, strands, conflicts = orient_reads(store=ReadStore.from_sequences(seqs=mixed), k=k)
+    chimera_id: int = len(reads) - 1
+    assert len(conflicts) > 0
+    assert all(chimera_id in (a, b) for a, b, _, _ in conflicts)
+    # Mỗi cặp mâu thuẫn có bằng chứng cho cả hai chiều hoặc bằng chứng ngược với chiều được chọn
+    for a, b, same, opposite in conflicts:
+        agree: bool = strands[a] == strands[b]
+        assert (opposite if agree else same) > 0
+    # Các read còn lại vẫn được đưa về đúng mạch
+    assert list(oriented)[:-1] == READS
+    assert strands[:-1].tolist() == np.where(flips[:-1], -1, 1).tolist()
+
+    profiler: Profiler = Profiler()
+    Graph(seqs=mixed, k=k, threshold=0, canonical=True, profiler=profiler)
+    assert profiler.report()["counters"]["orientation_conflicts"] == len(conflicts)
@@ -0,0 +1,82 @@
+"""Các đoạn trùng tìm qua chỉ mục seed phải giống hệt cách so sánh mọi cặp read ban đầu
+"""
+import os
+from typing import Dict, List, Set, Tuple
+
+import pytest
+
+from benchmark import random_genome, simulate_reads
+from graph import Graph
+from loader import Loader
+from overlap import find_overlaps, suffix_prefix_overlap
+from store import ReadStore
+
+
+DATA_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+Overlaps = Set[Tuple[int, int, int, int]]
+
+
+def baseline_overlap(first_str: str, second_str: str, min_length: int) -> int:
+    # Graph.overlap ban đầu: thử mọi độ dài, giữ độ dài trùng lớn nhất
+    pos: int = -1
+    for i in range(min_length, min(len(first_str), len(second_str)) + 1):
+        if first_str[-i:] == second_str[:i]:
+            pos = i
+
+    return pos
+
+
+def baseline_overlaps(reads: List[str], min_length: int) -> Tuple[Overlaps, Overlaps]:
+    # Graph.align_read ban đầu: so sánh cả hai chiều của mọi cặp read
+    front_of: Overlaps = set()
+    behind_of: Overlaps = set()
+    for a in range(len(reads)):
+        for b in range(a + 1, len(reads)):
+            for first, second in ((a, b), (b, a)):
+                pos: int = baseline_overlap(first_str=reads[first], second_str=reads[second], min_length=min_length)
+                if pos != -1:
+                    front_of.add((first, second, len(reads[first]) - pos, pos))
+                    behind_of.add((second, first, len(reads[first]) - pos, pos))
+
+    return front_of, behind_of
+
+
+def flatten(overlaps: Dict[int, List[Tuple[int, int, int]]]) -> Overlaps:
+    return {(read, other, start, end) for read, entries in overlaps.items() for other, start, end in entries}
+
+
+def datasets() -> List[Tuple[str, List[str], int]]:
+    cases: List[Tuple[str, List[str], int]] = []
+    for name, k in (("c1", 6), ("c5", 6), ("rep1", 8), ("rep3", 10)):
+        cases.append((name, list(Loader.load(filename=os.path.join(DATA_DIR, name + ".fastq"))), k))
+    # Bộ gen có lặp ngắn và các read trùng nhau hoàn toàn
+    genome: str = random_genome(length=400, seed=2)
+    genome = genome[:150] + genome[40:90] + genome[150:]
+    reads: List[str] = simulate_reads(genome=genome, coverage=8, read_length=40, seed=2)
+    cases.append(("simulated", reads + reads[:5], 7))
+
+    return cases
+
+
+@pytest.mark.parametrize("name, reads, min_length", datasets())
+def test_seed_index_matches_all_pairs(name: str, reads: List[str], min_length: int) -> None:
+    expected_front, expected_behind = baseline_overlaps(reads=reads, min_length=min_length)
+    front_of, behind_of = find_overlaps(store=ReadStore.from_sequences(seqs=reads), min_length=min_length)
+
+    assert flatten(front_of) == expected_front
+    assert flatten(behind_of) == expected_behind
+
+    # Graph.align_read dùng cùng chỉ mục và phải cho cùng front_of, behind_of trên các object Read
+    graph: Graph = Graph(seqs=reads, k=min_length, threshold=0)
+    graph_front, graph_behind = graph.overlaps_by_id()
+    assert flatten(graph_front) == expected_front
+    assert flatten(graph_behind) == expected_behind
+
+
+@pytest.mark.parametrize("first_str, second_str", [("GATTACA", "TACAGG"), ("AAAAAA", "AAAAAAAA"), ("ACGTAC", "GTACGT"),
+                                                   ("ACGT", "TTTT"), ("ACACAC", "ACACAC")])
+def test_suffix_prefix_overlap_matches_baseline(first_str: str, second_str: str) -> None:
+    for min_length in (1, 2, 4):
+        assert suffix_prefix_overlap(first_str=first_str, second_str=second_str, min_length=min_length) == \
+            baseline_overlap(first_str=first_str, second_str=second_str, min_length=min_length)
@@ -0,0 +1,94 @@
+"""Cắt tip và gỡ bong bóng phải loại bỏ đúng nhánh do lỗi tạo ra và giữ nguyên phần còn lại của đồ thị
+"""
+from typing import Dict, List, Set, Tuple
+
+import pytest
+
+from assembly import Assembler
+from benchmark import random_genome, simulate_reads
+from graph import Graph
+
+
+K: int = 11
+READS: List[str] = simulate_reads(genome=random_genome(length=600, seed=9), coverage=20, read_length=60, seed=9)
+
+
+def substitute(read: str, j: int) -> str:
+    return read[:j] + {"A": "C", "C": "G", "G": "T", "T": "A"}[read[j]] + read[j + 1:]
+
+
+def edge_keys(graph: Graph) -> Set[int]:
+    return {edge.key for edge in graph.edge_list}
+
+
+# Lỗi gần cuối read tạo một tip, lỗi ở giữa read tạo một bong bóng
+@pytest.mark.parametrize("j, expected", [(57, (1, 0)), (2, (1, 0)), (30, (0, 1))])
+def test_error_branch_is_removed(j: int, expected: Tuple[int, int]) -> None:
+    clean: Graph = Graph(seqs=READS, k=K, threshold=0)
+    noisy_reads: List[str] = READS.copy()
+    noisy_reads[20] = substitute(read=noisy_reads[20], j=j)
+    noisy: Graph = Graph(seqs=noisy_reads, k=K, threshold=0)
+    assert edge_keys(noisy) != edge_keys(clean)
+
+    assert noisy.simplify() == expected
+    assert edge_keys(noisy) == edge_keys(clean)
+    assert {vertex.key for vertex in noisy.vertex_list} == {vertex.key for vertex in clean.vertex_list}
+
+
+def test_clean_graph_is_unchanged(graph_state) -> None:
+    graph: Graph = Graph(seqs=READS, k=K, threshold=0)
+    before = graph_state(graph)
+
+    assert graph.simplify() == (0, 0)
+    assert graph_state(graph) == before
+
+
+def test_high_coverage_branch_is_kept() -> None:
+    # Hai biến thể thật có độ phủ gần bằng nhau nên không nhánh nào của bong bóng bị gỡ
+    genome: str = random_genome(length=600, seed=9)
+    reads: List[str] = simulate_reads(genome=genome, coverage=10, read_length=60, seed=1) + \
+        simulate_reads(genome=substitute(read=genome, j=300), coverage=10, read_length=60, seed=2)
+    graph: Graph = Graph(seqs=reads, k=K, threshold=0)
+    num_edges: int = len(graph.edge_list)
+
+    assert graph.simplify()[1] == 0
+    assert len(graph.edge_list) == num_edges
+
+
+def contiguous_pairs(graph: Graph) -> Dict[Tuple[int, int], Dict[int, List[int]]]:
+    # Trước khi gộp cạnh, hai cạnh liên tiếp trên đường đi chỉ liền kề khi cạnh sau bắt đầu ngay sau k - 1 ký tự cuối của cạnh trước
+    pairs: Dict[Tuple[int, int], Dict[int, List[int]]] = {}
+    for read in graph.read_list:
+        path = list(read.path())
+        for (before, x), (pos, y) in zip(path, path[1:]):
+            if pos == before + len(x) - (graph.k - 1):
+                pairs.setdefault((x.key, y.key), {}).setdefault(read.read_id, []).append(pos)
+    return pairs
+
+
+def indexed_pairs(graph: Graph) -> Dict[Tuple[int, int], Dict[int, List[int]]]:
+    return {(x.key, y.key): {read.read_id: sorted(positions) for read, positions in reads.items()}
+            for (x, y), reads in graph.pair_index.items()}
+
+
+@pytest.mark.parametrize("j", [57, 2, 30])
+def test_pair_index_matches_read_paths_after_simplify(j: int) -> None:
+    noisy_reads: List[str] = READS.copy()
+    noisy_reads[20] = substitute(read=noisy_reads[20], j=j)
+    noisy_reads[40] = noisy_reads[40][:25] + "N" + noisy_reads[40][26:]
+    graph: Graph = Graph(seqs=noisy_reads, k=K, threshold=0)
+    assert indexed_pairs(graph) == contiguous_pairs(graph)
+
+    assert sum(graph.simplify()) == 1
+    # Read có lỗi bị cắt tại cạnh bị gỡ, hai cạnh hai bên không được coi là liền kề
+    assert len(graph.read_list[20].breaks) == (1 if j == 30 else 0)
+    assert indexed_pairs(graph) == contiguous_pairs(graph)
+
+    # Sau khi gộp cạnh, cạnh gộp có thể dài hơn phần được phủ bởi read nên chỉ so với các cặp liền kề của Read.pairs
+    assembly: Assembler = Assembler.from_graph(graph=graph)
+    assembly.make_superpath()
+    pairs: Dict[Tuple[int, int], Dict[int, List[int]]] = {}
+    for read in assembly.graph.read_list:
+        for x, y, pos in read.pairs():
+            pairs.setdefault((x.key, y.key), {}).setdefault(read.read_id, []).append(pos)
+    assert indexed_pairs(assembly.graph) == {pair: {r: sorted(positions) for r, positions in reads.items()} for pair, reads in pairs.items()}
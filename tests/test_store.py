@@ -0,0 +1,47 @@
+"""ReadStore nén 2 bit phải giải mã lại đúng mọi read, kể cả read có ký tự khác ACGT và sau khi lưu, memory-map
+"""
+from typing import List
+
+import numpy as np
+import pytest
+
+from store import ReadStore, encode, decode, INVALID_CODE
+
+
+# Có read độ dài không chia hết cho 4, read rỗng, read chữ thường và read chứa N
+READS: List[str] = ["ACGT", "GATTACA", "", "T", "ACGTACGTACGTA", "acgtACGT", "ACGNNT", "CCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCCG"]
+
+
+def test_pack_unpack_round_trip() -> None:
+    store: ReadStore = ReadStore.from_sequences(seqs=READS)
+
+    assert len(store) == len(READS)
+    assert list(store) == READS
+    assert [store.length(n) for n in range(len(store))] == [len(read) for read in READS]
+    # Chỉ các read có ký tự khác ACGT được giữ nguyên dạng chuỗi
+    assert sorted(store.extras) == [5, 6]
+    for n, read in enumerate(READS):
+        assert np.array_equal(store.codes(n), encode(read))
+    assert store.codes(6).tolist() == [0, 1, 2, INVALID_CODE, INVALID_CODE, 3]
+    assert decode(encode("GATTACA")) == "GATTACA"
+
+
+def test_extend_and_append_keep_ids() -> None:
+    store: ReadStore = ReadStore.from_sequences(seqs=READS[:3])
+    store.extend(seqs=READS[3:6])
+    assert store.append(READS[6]) == 6
+    store.extend(seqs=(read.encode("ascii") for read in READS[7:]))
+
+    assert list(store) == READS
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_open_round_trip(tmp_path, mmap: bool) -> None:
+    store: ReadStore = ReadStore.from_sequences(seqs=READS)
+    store.save(dirname=str(tmp_path))
+    loaded: ReadStore = ReadStore.open(dirname=str(tmp_path), mmap=mmap)
+
+    assert list(loaded) == READS
+    assert loaded.extras == store.extras
+    assert isinstance(loaded.packed, np.memmap) == mmap
+    assert np.array_equal(loaded.packed, store.packed)
@@ -0,0 +1,96 @@
+"""So sánh make_superpath (gộp theo hàng đợi trên đường đi dạng ô liên kết) với bản gốc trên các input nhỏ có lặp.
+
+tests/data/superpath_baseline.json chứa kết quả make_superpath của bản gốc (gộp một lượt, read lưu position_to_edge)
+cho từng cặp (file, k): cờ Euler, các cạnh [chuỗi, bội] đã sắp xếp và đường đi [[vị trí, chuỗi cạnh], ...] của từng read.
+Hàng đợi gộp đến điểm bất động nên với một số input gộp được nhiều hơn bản gốc, các input đó chỉ được so sánh
+theo các bất biến (cùng cờ Euler, cùng tập k-mer tính cả bội, không nhiều cạnh hơn, read vẫn nằm trên đường đi của nó)
+"""
+import json
+import os
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from assembly import Assembler
+from graph import Edge, Read
+
+
+DATA_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+with open(os.path.join(DATA_DIR, "superpath_baseline.json")) as f:
+    BASELINE: Dict[str, Dict[str, Any]] = json.load(f)
+
+# Bản gốc cũng đã gộp hết nên kết quả phải trùng khớp
+EXACT_CASES: List[str] = ["c1:6", "c4:6", "c5:6", "rep1:6", "rep1:8", "rep3:10"]
+# Bản gốc dừng sau một lượt, hàng đợi gộp tiếp các cạnh mới sinh ra
+FIXPOINT_CASES: List[str] = ["c4:8", "c6:6", "c6:8", "rep2:8"]
+
+
+def superpath(case: str) -> Assembler:
+    name, k = case.split(":")
+    assembly: Assembler = Assembler(filename=os.path.join(DATA_DIR, name + ".fastq"), k=int(k))
+    assembly.make_superpath()
+
+    return assembly
+
+
+def edges_of(assembly: Assembler) -> List[List[Any]]:
+    # Như bản gốc, cạnh bội gộp hết bội bị gỡ khỏi đỉnh nhưng vẫn có thể còn trong edge_list và đường đi của read
+    return sorted([edge.sequence, edge.multiplicities] for vertex in assembly.graph.vertex_list for edge in vertex.out_edges)
+
+
+def paths_of(assembly: Assembler) -> List[List[List[Any]]]:
+    return [[[position, edge.sequence] for position, edge in read.path()] for read in assembly.graph.read_list]
+
+
+def weighted_kmers(edges: List[List[Any]], k: int) -> Counter:
+    kmers: Counter = Counter()
+    for sequence, multiplicities in edges:
+        for i in range(len(sequence) - k + 1):
+            kmers[sequence[i:i + k]] += multiplicities
+
+    return kmers
+
+
+def spelled(path: List[Tuple[int, Edge]], k: int) -> str:
+    return path[0][1].sequence + "".join(edge.sequence[k - 1:] for _, edge in path[1:])
+
+
+@pytest.mark.parametrize("case", EXACT_CASES)
+def test_matches_baseline(case: str) -> None:
+    assembly: Assembler = superpath(case=case)
+    expected: Dict[str, Any] = BASELINE[case]
+
+    assert assembly.is_eulerian() == expected["eulerian"]
+    assert edges_of(assembly) == expected["edges"]
+    assert paths_of(assembly) == expected["reads"]
+
+
+@pytest.mark.parametrize("case", FIXPOINT_CASES)
+def test_fixpoint_merges_at_least_baseline(case: str) -> None:
+    assembly: Assembler = superpath(case=case)
+    expected: Dict[str, Any] = BASELINE[case]
+    k: int = assembly.graph.k
+    edges: List[List[Any]] = edges_of(assembly)
+
+    assert assembly.is_eulerian() == expected["eulerian"]
+    assert weighted_kmers(edges=edges, k=k) == weighted_kmers(edges=expected["edges"], k=k)
+    assert len(edges) <= len(expected["edges"])
+    assert len(assembly.graph.read_list) == len(expected["reads"])
+
+
+@pytest.mark.parametrize("case", EXACT_CASES + FIXPOINT_CASES)
+def test_read_paths_are_linked(case: str) -> None:
+    assembly: Assembler = superpath(case=case)
+    k: int = assembly.graph.k
+    for read in assembly.graph.read_list:
+        path: List[Tuple[int, Edge]] = list(read.path())
+        assert len(path) > 0
+        assert read.sequence in spelled(path=path, k=k)
+        for position, edge in path:
+            assert position in edge.position_in_read[read]
+        # Mỗi cặp cạnh liền nhau trên đường đi có trong pair_index cùng vị trí của cạnh sau
+        for (_, x), (position, y) in zip(path, path[1:]):
+            reads: Dict[Read, List[int]] = assembly.graph.pair_index[(x, y)]
+            assert position in reads[read]
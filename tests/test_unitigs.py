@@ -0,0 +1,67 @@
+"""Gộp trước các unitig (Graph.compact_unitigs) không được đổi kết quả của make_superpath và phải chạy tuyến tính
+"""
+import os
+import time
+from typing import Any, List
+
+import pytest
+
+from assembly import Assembler
+from benchmark import random_genome, simulate_reads
+from graph import Graph
+
+
+DATA_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+CASES: List[str] = ["c1:6", "c4:6", "c5:6", "c6:6", "c4:8", "c6:8", "rep1:6", "rep1:8", "rep2:8", "rep3:10"]
+# Với các input này cạnh bội gộp hết bội được gỡ theo thứ tự khác nhau, một vài read còn trỏ tới cạnh đã gỡ khác nhau
+DETACHED_PATH_CASES: List[str] = ["c6:8", "rep2:8"]
+
+
+def assembler(case: str) -> Assembler:
+    name, k = case.split(":")
+
+    return Assembler(filename=os.path.join(DATA_DIR, name + ".fastq"), k=int(k))
+
+
+def edges_of(assembly: Assembler) -> List[List[Any]]:
+    return sorted([edge.sequence, edge.multiplicities] for vertex in assembly.graph.vertex_list for edge in vertex.out_edges)
+
+
+def paths_of(assembly: Assembler) -> List[List[List[Any]]]:
+    return [[[position, edge.sequence] for position, edge in read.path()] for read in assembly.graph.read_list]
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_compaction_matches_pairwise_merges(case: str) -> None:
+    compacted: Assembler = assembler(case=case)
+    compacted.make_superpath()
+    # Chỉ gộp từng cặp như trước khi có compact_unitigs
+    pairwise: Assembler = assembler(case=case)
+    pairwise.merge_single_edges()
+    pairwise.merge_multiple_edges()
+
+    assert compacted.is_eulerian() == pairwise.is_eulerian()
+    assert edges_of(compacted) == edges_of(pairwise)
+    if case not in DETACHED_PATH_CASES:
+        assert paths_of(compacted) == paths_of(pairwise)
+
+
+def compact_seconds(length: int, repeats: int=3) -> float:
+    best: float = float("inf")
+    reads: List[str] = simulate_reads(genome=random_genome(length=length, seed=1), coverage=10, read_length=100, seed=1)
+    for _ in range(repeats):
+        graph: Graph = Graph(seqs=reads, k=21, threshold=0)
+        start: float = time.perf_counter()
+        graph.compact_unitigs()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def test_compaction_scales_linearly() -> None:
+    # Bộ gen không lặp cho một chuỗi dài không phân nhánh, gấp 4 lần độ dài thì tuyến tính tốn khoảng 4 lần thời gian,
+    # bậc hai khoảng 16 lần (collapse_chain duyệt lại các read cho từng cạnh trong chuỗi cho tỉ lệ trên 10)
+    ratio: float = compact_seconds(length=16000) / compact_seconds(length=4000)
+
+    assert ratio < 8, "compact_unitigs tăng {:.1f} lần khi chuỗi dài gấp 4".format(ratio)